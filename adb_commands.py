@@ -1,88 +1,216 @@
+import shutil
 import subprocess
+import sys
 from pathlib import Path
 import os
+import adb_session
+import adb_protocol
+import adb_input
+import adb_screen
+import profile_store
 
-# Usar adb portable desde tools
-BASE_DIR = Path(__file__).resolve().parent
-ADB_PATH = BASE_DIR / "tools" / "platform-tools" / "adb.exe"
+# Núcleo sin GUI: lo usan main.py (Tkinter) y adb_gui.py (línea de comandos).
+# No importar tkinter aquí.
 
-def run_adb(cmd):
-    """Ejecuta un comando adb desde tools/platform-tools"""
-    if isinstance(cmd, str):
-        cmd = cmd.split()
+# Usar adb portable desde tools si está; si no, el adb del PATH
+BASE_DIR = Path(__file__).resolve().parent
+PERFILES_FILE = BASE_DIR / "devices.json"   # formato antiguo: se importa a profiles.db
+PROFILES_DB = BASE_DIR / "profiles.db"
+IP_CACHE_FILE = BASE_DIR / "ip_cache.json"
+LAUNCH_HISTORY_FILE = BASE_DIR / "launch_history.jsonl"
+
+
+def _find_adb():
+    exe = "adb.exe" if sys.platform.startswith("win") else "adb"
+    portable = BASE_DIR / "tools" / "platform-tools" / exe
+    if portable.exists():
+        return str(portable)
+    return shutil.which("adb") or "adb"
+
+
+ADB_PATH = _find_adb()
+
+
+def exec_adb(args, serial=None, adb=None):
+    """adb [-s serial] <args...> -> (rc, stdout, stderr).
+    shell no interactivo por la sesión persistente, devices/connect/push/pull directamente
+    contra el servidor adb y, si nada de eso vale, el ejecutable adb (ADB_PATH por defecto).
+    Al ejecutable solo se pasa si no se llegó a enviar nada (sin sesión, sin servidor): si
+    el comando ya salió y falla después (timeout, sesión caída) se devuelve el error, no
+    se repite (un tap o un install irían dos veces)."""
+    adb = adb or ADB_PATH
+    if isinstance(args, str):
+        args = args.split()
+    result = None
+    if len(args) > 1 and args[0] == "shell":
+        try:
+            result = adb_session.run_shell(args[1:], serial, adb)
+        except adb_session.AdbSessionNotSent:
+            pass  # sin dispositivo / sin sesión: adb normal para ver su mensaje de error
+        except adb_session.AdbSessionError as e:
+            result = (1, "", f"adb: error: {e}")
+    else:
+        result = adb_protocol.try_native(args, serial)
+    if result is None:
+        cmd = [adb] + (["-s", serial] if serial else []) + args
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        result = (proc.returncode, proc.stdout, proc.stderr)
+    return result
+
+
+def run_adb(cmd, serial=None):
+    """Ejecuta un comando adb y devuelve su salida como texto"""
     try:
-        result = subprocess.run([str(ADB_PATH)] + cmd, capture_output=True, text=True)
-        output = result.stdout.strip()
-        errors = result.stderr.strip()
+        _, output, errors = exec_adb(cmd, serial)
+        output, errors = output.strip(), errors.strip()
         return (output + ("\n" + errors if errors else "")).strip()
     except Exception as e:
         return f"Error ejecutando adb: {e}"
 
+def run_input(events, serial=None):
+    """Ejecuta una secuencia de eventos (ver adb_input) en una sola invocación."""
+    try:
+        _, output, errors = adb_input.run_events(events, serial, adb=ADB_PATH)
+        return (output.strip() + ("\n" + errors.strip() if errors.strip() else "")).strip()
+    except adb_session.AdbSessionError as e:
+        return f"Error ejecutando adb: {e}"
+
+# --- Perfiles ---
+def load_profiles(path=PROFILES_DB, legacy_json=PERFILES_FILE):
+    """Perfiles de profiles.db (se usa como un dict; ver profile_store)."""
+    return profile_store.open_store(path, legacy_json)
+
+
+_ip_cache = None
+
+
+def resolve_mac(mac):
+    """IP de una MAC con la caché de ip_cache.json (se importa solo si hace falta:
+    lan_discovery arrastra asyncio)."""
+    global _ip_cache
+    if not mac:
+        return None
+    if _ip_cache is None:
+        import ip_cache
+        _ip_cache = ip_cache.IpCache(IP_CACHE_FILE)
+    return _ip_cache.resolve(mac)
+
+
+def profile_serial(perfil, resolver=resolve_mac):
+    """Serial adb (ip:puerto) de un perfil, resolviendo la IP por MAC si hace falta."""
+    if not perfil:
+        return None
+    ip = perfil.get("ip") or resolver(perfil.get("mac", ""))
+    if not ip:
+        return None
+    return f"{ip}:{perfil.get('port', 5555)}"
+
+_launcher = None
+
+
+def get_launcher():
+    """AppLauncher compartido (actividades resueltas + historial de tiempos de arranque)."""
+    global _launcher
+    if _launcher is None:
+        import app_launcher
+        _launcher = app_launcher.AppLauncher(LAUNCH_HISTORY_FILE, adb=ADB_PATH)
+    return _launcher
+
+
 # --- Comandos básicos ---
-def home():
-    return run_adb(["shell", "input", "keyevent", "3"])  # KEYCODE_HOME
+def home(serial=None):
+    return run_adb(["shell", "input", "keyevent", "3"], serial)  # KEYCODE_HOME
 
-def power():
-    return run_adb(["shell", "input", "keyevent", "26"])  # KEYCODE_POWER
+def power(serial=None):
+    return run_adb(["shell", "input", "keyevent", "26"], serial)  # KEYCODE_POWER
 
-def volume_up():
-    return run_adb(["shell", "input", "keyevent", "24"])  # KEYCODE_VOLUME_UP
+def volume_up(serial=None):
+    return run_adb(["shell", "input", "keyevent", "24"], serial)  # KEYCODE_VOLUME_UP
 
-def volume_down():
-    return run_adb(["shell", "input", "keyevent", "25"])  # KEYCODE_VOLUME_DOWN
+def volume_down(serial=None):
+    return run_adb(["shell", "input", "keyevent", "25"], serial)  # KEYCODE_VOLUME_DOWN
 
-def screenshot(save_path="screenshot.png"):
-    device_path = "/sdcard/screen.png"
-    run_adb(["shell", "screencap", "-p", device_path])
-    run_adb(["pull", device_path, save_path])
+def screenshot(save_path="screenshot.png", serial=None):
+    try:
+        adb_screen.screenshot_to_file(save_path, serial, adb=ADB_PATH)
+    except Exception as e:
+        return f"Error capturando pantalla: {e}"
     return f"📸 Captura guardada en {save_path}"
 
-def close_app(package_name):
-    return run_adb(["shell", "am", "force-stop", package_name])
-
-def open_app(package_name):
-    return run_adb(["shell", "monkey", "-p", package_name, "-c", "android.intent.category.LAUNCHER", "1"])
+def close_app(package_name, serial=None):
+    return run_adb(["shell", "am", "force-stop", package_name], serial)
 
-def send_text(text):
-    return run_adb(["shell", "input", "text", text.replace(" ", "%s")])  # reemplazo espacio por %s
+def open_app(package_name, serial=None, cold=False):
+    """am start -W con la actividad cacheada (ver app_launcher); apunta el tiempo de arranque."""
+    import app_launcher
+    try:
+        return "🚀 " + app_launcher.describe(get_launcher().launch(package_name, serial, cold))
+    except (app_launcher.LaunchError, adb_session.AdbSessionError) as e:
+        return f"Error abriendo {package_name}: {e}"
+
+def send_text(text, serial=None, method="auto"):
+    """Escribe texto en el campo con foco (troceado y escapado, o por ADBKeyboard/Clipper;
+    ver text_input) e informa de los caracteres por segundo."""
+    import text_input
+    try:
+        return "⌨️ " + str(text_input.send_text(text, serial, ADB_PATH, method))
+    except (text_input.TextInputError, adb_session.AdbSessionError) as e:
+        return f"Error enviando texto: {e}"
 
-def tap(x, y):
-    return run_adb(["shell", "input", "tap", str(x), str(y)])
+def tap(x, y, serial=None):
+    return run_adb(["shell", "input", "tap", str(x), str(y)], serial)
 
-def swipe(x1, y1, x2, y2, duration=300):
-    return run_adb(["shell", "input", "swipe", str(x1), str(y1), str(x2), str(y2), str(duration)])
+def tap_element(selector, serial=None):
+    """Tap en un elemento por id/texto/desc (ver ui_tree) en vez de coordenadas fijas."""
+    import ui_tree
+    try:
+        node = ui_tree.tap_element(selector, serial, ADB_PATH)
+    except (ui_tree.UiError, adb_session.AdbSessionError) as e:
+        return f"Error tocando '{selector}': {e}"
+    return f"👆 {selector} → {node.center[0]},{node.center[1]}"
+
+def screen_center(serial=None):
+    """Centro de la pantalla según `wm size` (para no depender de la resolución)."""
+    import device_cache
+    _, out, _ = adb_session.run_shell("wm size", serial, ADB_PATH, timeout=adb_session.DEFAULT_TIMEOUT)
+    size = device_cache.parse_screen(out, "")["size"]
+    w, h = map(int, size.split("x")) if size else (1080, 2400)
+    return w // 2, h // 2
+
+def swipe(x1, y1, x2, y2, duration=300, serial=None):
+    return run_adb(["shell", "input", "swipe", str(x1), str(y1), str(x2), str(y2), str(duration)], serial)
 
 # --- Extras ---
-def show_notifications():
-    return run_adb(["shell", "cmd", "statusbar", "expand-notifications"])
+def show_notifications(serial=None):
+    return run_adb(["shell", "cmd", "statusbar", "expand-notifications"], serial)
 
-def spotify():
-    return open_app("com.spotify.music")
+def spotify(serial=None):
+    return open_app("com.spotify.music", serial)
 
-def youtube():
-    return open_app("com.google.android.youtube")
+def youtube(serial=None):
+    return open_app("com.google.android.youtube", serial)
 
-def crazy_taps(times=10):
-    """Hace taps rápidos en la pantalla como el crazy.bat."""
-    for i in range(times):
-        run_adb(["shell", "input", "tap", "500", "1000"])
+def crazy_taps(times=10, serial=None):
+    """Hace taps rápidos en el centro de la pantalla como el crazy.bat."""
+    try:
+        x, y = screen_center(serial)
+    except adb_session.AdbSessionError as e:
+        return f"Error ejecutando adb: {e}"
+    run_input([("tap", x, y)] * times, serial)
     return f"🤪 {times} taps ejecutados"
 
-def subir_bajar_volumen(veces=3):
+def subir_bajar_volumen(veces=3, serial=None):
     """Sube y baja el volumen varias veces (como subeybaja.bat)."""
-    for _ in range(veces):
-        run_adb(["shell", "input", "keyevent", "24"])  # subir
-        run_adb(["shell", "input", "keyevent", "25"])  # bajar
+    run_input([("key", 24), ("key", 25)] * veces, serial)  # subir, bajar
     return f"🔊 Volumen subido y bajado {veces} veces"
 
-def power_loop(veces=3):
+def power_loop(veces=3, serial=None):
     """Pulsa power varias veces (como Power - loop.bat)."""
-    for _ in range(veces):
-        run_adb(["shell", "input", "keyevent", "26"])
+    run_input([("key", 26)] * veces, serial)
     return f"⚡ Botón Power pulsado {veces} veces"
 
-def youtube_loop(veces=3):
+def youtube_loop(veces=3, serial=None):
     """Abre YouTube varias veces (como YT - loop.bat)."""
     for _ in range(veces):
-        open_app("com.google.android.youtube")
+        open_app("com.google.android.youtube", serial)
     return f"▶️ YouTube abierto {veces} veces"
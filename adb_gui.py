@@ -0,0 +1,291 @@
+import argparse
+import os
+import re
+import sys
+import time
+
+import adb_commands
+import adb_session
+
+# ----------------------
+# Línea de comandos sobre el mismo núcleo que la GUI (adb_commands), sin Tkinter
+# ----------------------
+#   python -m adb_gui devices
+#   python -m adb_gui connect 114
+#   python -m adb_gui -p 114 tap 500 1000
+#   python -m adb_gui fanout --profiles 114,115 tap 500 1000
+# Lo pesado (asyncio para resolver MACs, capturas, el pool del fan-out) se importa
+# solo en el comando que lo usa, para que arrancar cueste unas decenas de ms.
+
+# ----------------------
+# Acciones: fn(ns, serial) -> (rc, stdout, stderr)
+# ----------------------
+
+
+def _shell(*args):
+    return lambda ns, serial: adb_commands.exec_adb(["shell", *args], serial)
+
+
+def _screenshot(ns, serial):
+    import adb_screen
+    path = ns.path
+    if getattr(ns, "per_device", False) and serial:
+        root, ext = os.path.splitext(path)
+        path = f"{root}-{re.sub(r'[^0-9A-Za-z.-]', '_', serial)}{ext or '.png'}"
+    adb_screen.screenshot_to_file(path, serial, adb_commands.ADB_PATH)
+    return 0, f"Captura guardada en {path}", ""
+
+
+def _var(value):
+    """NOMBRE=VALOR de --var -> (nombre, valor)."""
+    name, sep, val = value.partition("=")
+    if not sep or not name.strip():
+        raise argparse.ArgumentTypeError(f"se esperaba NOMBRE=VALOR: {value!r}")
+    return name.strip(), val
+
+
+def _macro(ns, serial):
+    import macro_engine
+    prefix = f"[{serial}] " if getattr(ns, "per_device", False) and serial else ""
+
+    def out(line, level):
+        print(prefix + line, file=sys.stderr if level == "error" else sys.stdout, flush=True)
+    rc = macro_engine.run_macro(ns.path, serial, adb_commands.ADB_PATH, on_output=out,
+                                variables=dict(ns.var or []))
+    return rc, "", ""
+
+
+def _record(ns, serial):
+    import event_recorder
+    rec = event_recorder.EventRecorder(serial, adb_commands.ADB_PATH)
+    rec.start()
+    print("Grabando… (Ctrl+C para terminar)", file=sys.stderr)
+    try:
+        if ns.seconds:
+            time.sleep(ns.seconds)
+        else:
+            while rec.running():
+                time.sleep(0.2)
+    except KeyboardInterrupt:
+        pass
+    recording = rec.stop()
+    recording.save(ns.path)
+    return 0, f"{len(recording.events)} eventos ({recording.duration:.1f} s) guardados en {ns.path}", ""
+
+
+def _replay(ns, serial):
+    import event_recorder
+    lag = event_recorder.replay(event_recorder.Recording.load(ns.path), serial, adb_commands.ADB_PATH,
+                                speed=ns.speed, mode=ns.mode)
+    return 0, "Reproducción terminada" + (f" (desfase máx. {lag:.1f} ms)" if lag is not None else ""), ""
+
+
+def _open(ns, serial):
+    import app_launcher
+    try:
+        entry = adb_commands.get_launcher().launch(ns.package, serial, cold=ns.cold)
+    except (app_launcher.LaunchError, adb_session.AdbSessionError) as e:
+        return 1, "", str(e)
+    return 0, app_launcher.describe(entry), ""
+
+
+def _text(ns, serial):
+    import text_input
+    text = ns.text
+    if ns.file:
+        with open(ns.text, "r", encoding="utf-8") as f:
+            text = f.read()
+    try:
+        return 0, str(text_input.send_text(text, serial, adb_commands.ADB_PATH, ns.method)), ""
+    except (text_input.TextInputError, adb_session.AdbSessionError) as e:
+        return 1, "", str(e)
+
+
+def _tap_element(ns, serial):
+    import ui_tree
+    try:
+        node = ui_tree.tap_element(ns.selector, serial, adb_commands.ADB_PATH)
+    except (ui_tree.UiError, adb_session.AdbSessionError) as e:
+        return 1, "", str(e)
+    return 0, f"{node!r} -> tap {node.center[0]} {node.center[1]}", ""
+
+
+def _add_actions(sub):
+    """Registra las acciones por dispositivo (también las usa `fanout`)."""
+    def add(name, fn, help, *args):
+        p = sub.add_parser(name, help=help)
+        for arg, kw in args:
+            p.add_argument(arg, **kw)
+        p.set_defaults(fn=fn)
+        return p
+
+    add("home", _shell("input", "keyevent", "3"), "tecla Home")
+    add("power", _shell("input", "keyevent", "26"), "tecla Power")
+    add("vol-up", _shell("input", "keyevent", "24"), "subir volumen")
+    add("vol-down", _shell("input", "keyevent", "25"), "bajar volumen")
+    add("tap", lambda ns, s: adb_commands.exec_adb(["shell", "input", "tap", str(ns.x), str(ns.y)], s),
+        "tap en x y", ("x", {"type": int}), ("y", {"type": int}))
+    add("tap-element", _tap_element, "tap en un elemento de la UI (id=..., text=..., desc=...)",
+        ("selector", {}))
+    add("swipe", lambda ns, s: adb_commands.exec_adb(
+        ["shell", "input", "swipe", *map(str, (ns.x1, ns.y1, ns.x2, ns.y2, ns.ms))], s),
+        "swipe de x1 y1 a x2 y2", ("x1", {"type": int}), ("y1", {"type": int}),
+        ("x2", {"type": int}), ("y2", {"type": int}), ("ms", {"type": int, "nargs": "?", "default": 300}))
+    add("key", lambda ns, s: adb_commands.exec_adb(["shell", "input", "keyevent", *map(str, ns.codes)], s),
+        "uno o más keycodes", ("codes", {"type": int, "nargs": "+"}))
+    add("text", _text, "escribir texto (troceado/escapado, o por ADBKeyboard/Clipper)", ("text", {}),
+        ("--method", {"choices": ["auto", "input", "ime", "clipboard"], "default": "auto"}),
+        ("--file", {"action": "store_true", "help": "`text` es la ruta de un fichero UTF-8 a teclear"}))
+    add("open", _open, "abrir una app (am start -W) e indicar su tiempo de arranque", ("package", {}),
+        ("--cold", {"action": "store_true", "help": "forzar cierre antes (arranque en frío)"}))
+    add("close", lambda ns, s: adb_commands.exec_adb(["shell", "am", "force-stop", ns.package], s),
+        "forzar cierre de una app", ("package", {}))
+    add("install", lambda ns, s: adb_commands.exec_adb(["install", "-r", ns.apk], s),
+        "instalar un APK", ("apk", {}))
+    add("reboot", lambda ns, s: adb_commands.exec_adb(["reboot"], s), "reiniciar")
+    add("screenshot", _screenshot, "captura de pantalla a PNG",
+        ("path", {"nargs": "?", "default": "screenshot.png"}))
+    add("macro", _macro, "ejecutar una .macro (ver macro_engine)", ("path", {}),
+        ("--var", {"action": "append", "type": _var, "metavar": "NOMBRE=VALOR", "help": "variable inicial"}))
+    add("record", _record, "grabar toques/teclas (getevent) a un fichero .events", ("path", {}),
+        ("--seconds", {"type": float, "help": "duración; sin ella, hasta Ctrl+C"}))
+    add("replay", _replay, "reproducir un fichero .events", ("path", {}),
+        ("--speed", {"type": float, "default": 1.0}),
+        ("--mode", {"choices": ["binary", "sendevent"], "default": "binary"}))
+    add("shell", lambda ns, s: adb_commands.exec_adb(["shell", *ns.command], s),
+        "comando de shell", ("command", {"nargs": argparse.REMAINDER}))
+
+
+# ----------------------
+# Destinos: perfil (profiles.db), ip[:puerto] o serial tal cual
+# ----------------------
+_IP_RE = re.compile(r"^\d{1,3}(\.\d{1,3}){3}$")
+
+
+def resolve_target(target, profiles=None):
+    if profiles is None:
+        profiles = adb_commands.load_profiles()
+    if target in profiles:
+        serial = adb_commands.profile_serial(profiles[target])
+        if not serial:
+            raise SystemExit(f"No se encontró IP para el perfil '{target}'")
+        return serial
+    if _IP_RE.match(target):
+        return f"{target}:5555"
+    return target
+
+
+def _emit(result, prefix=""):
+    rc, out, err = result
+    if out and out.strip():
+        print("\n".join(prefix + line for line in out.strip().splitlines()))
+    if err and err.strip():
+        print("\n".join(prefix + line for line in err.strip().splitlines()), file=sys.stderr)
+    return rc
+
+
+# ----------------------
+# Comandos de nivel superior
+# ----------------------
+def cmd_devices(ns):
+    return _emit(adb_commands.exec_adb(["devices", "-l"]))
+
+
+def cmd_profiles(ns):
+    profiles = adb_commands.load_profiles()
+    for name in profiles.search(" ".join(ns.query)):
+        p = profiles[name]
+        print(f"{name}\t{p.get('ip') or '-'}\t{p.get('mac') or '-'}\t{p.get('port', 5555)}")
+    return 0
+
+
+def cmd_connect(ns):
+    return _emit(adb_commands.exec_adb(["connect", resolve_target(ns.target)]))
+
+
+def cmd_disconnect(ns):
+    return _emit(adb_commands.exec_adb(["disconnect"] + ([resolve_target(ns.target)] if ns.target else [])))
+
+
+def cmd_launches(ns):
+    launcher = adb_commands.get_launcher()
+    serial = resolve_target(ns.target) if ns.target else None
+    for (package, state), st in launcher.stats(serial, ns.package).items():
+        print(f"{package}\t{state}\tn={st['n']}\tp50={st['p50_ms']:.0f} ms\tmedia={st['mean_ms']:.0f} ms")
+    if ns.export:
+        print(f"{launcher.export(ns.export, serial)} arranques exportados a {ns.export}")
+    return 0
+
+
+def cmd_fanout(ns):
+    import fanout
+    profiles = adb_commands.load_profiles()
+    names = [n for n in (ns.profiles or "").split(",") if n]
+    serials = [s for s in (ns.serials or "").split(",") if s]
+    for name in names:
+        serial = adb_commands.profile_serial(profiles.get(name))
+        if serial:
+            serials.append(serial)
+        else:
+            print(f"No se encontró IP para el perfil '{name}'", file=sys.stderr)
+    if not serials:
+        print("fanout: sin dispositivos (usa --profiles y/o --serials)", file=sys.stderr)
+        return 2
+    ns.per_device = True
+
+    def run(serial):
+        return _emit(ns.fn(ns, serial), prefix=f"[{serial}] ")
+
+    results = fanout.run_fanout(serials, run, max_workers=ns.workers)
+    for res in results:
+        if res.error is not None:
+            print(f"[{res.target}] error: {res.error}", file=sys.stderr)
+    print(fanout.summarize(results))
+    return 0 if all(r.ok for r in results) else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="adb_gui", description="ADB GUI sin interfaz gráfica.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("-s", "--serial", help="serial adb (ip:puerto) del dispositivo")
+    group.add_argument("-p", "--profile", help="perfil de profiles.db")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("devices", help="adb devices -l").set_defaults(cmd=cmd_devices)
+    p = sub.add_parser("profiles", help="listar perfiles (con filtro: texto, tag:x, mac:aa:bb, ip:192.168.)")
+    p.add_argument("query", nargs="*")
+    p.set_defaults(cmd=cmd_profiles)
+    p = sub.add_parser("connect", help="adb connect a un perfil, ip o ip:puerto")
+    p.add_argument("target")
+    p.set_defaults(cmd=cmd_connect)
+    p = sub.add_parser("disconnect", help="adb disconnect (todos si no se indica destino)")
+    p.add_argument("target", nargs="?")
+    p.set_defaults(cmd=cmd_disconnect)
+
+    p = sub.add_parser("launches", help="tiempos de arranque registrados (cold/warm/hot)")
+    p.add_argument("target", nargs="?", help="perfil, ip o serial (todos si se omite)")
+    p.add_argument("--package", help="solo esta app")
+    p.add_argument("--export", metavar="RUTA", help="exportar el historial (.csv o .json)")
+    p.set_defaults(cmd=cmd_launches)
+
+    p = sub.add_parser("fanout", help="misma acción en varios dispositivos a la vez")
+    p.add_argument("--profiles", help="perfiles separados por comas")
+    p.add_argument("--serials", help="seriales separados por comas")
+    p.add_argument("--workers", type=int, default=8, help="dispositivos a la vez (por defecto 8)")
+    p.set_defaults(cmd=cmd_fanout)
+    _add_actions(p.add_subparsers(dest="action", required=True))
+
+    _add_actions(sub)
+    return parser
+
+
+def main(argv=None):
+    ns = build_parser().parse_args(argv)
+    if getattr(ns, "cmd", None):
+        return ns.cmd(ns)
+    serial = resolve_target(ns.profile) if ns.profile else ns.serial
+    return _emit(ns.fn(ns, serial))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import shlex
+import threading
+import adb_session
+
+# ----------------------
+# Inyección de eventos por lotes
+# ----------------------
+# Cada `adb shell input ...` suelto arranca un proceso (y en Android < 12 una JVM)
+# en el dispositivo. Aquí una secuencia entera de taps/swipes/teclas/pausas se
+# convierte en UN script de shell que se ejecuta de una vez en la sesión persistente.
+# Límite: por debajo de Android 12 (SDK 31) no hay `cmd input`, y cada `input` del
+# script sigue arrancando su propia JVM (cientos de ms por evento). El lote ahorra los
+# viajes de adb, no ese arranque; para ráfagas rápidas en esos dispositivos, grabar y
+# reproducir con event_recorder (sendevent / escritura directa en /dev/input).
+#
+# Eventos (tuplas):
+#   ("tap", x, y)
+#   ("swipe", x1, y1, x2, y2[, duracion_ms])
+#   ("key", keycode)            -> teclas seguidas sin pausa van en un solo `input keyevent`
+#   ("text", texto)             -> texto tal cual (ASCII); se escapa y trocea aquí
+#   ("sleep", ms)
+#
+# `input text` recibe un único argumento: espacios como %s, comillas simples para el
+# shell, y saltos de línea/tabuladores como teclas (ENTER/TAB). Los textos largos se
+# parten en trozos de TEXT_CHUNK caracteres (el argumento tiene un límite y cada
+# trozo es una inyección corta). Un "%" literal siempre cierra su trozo: así ningún
+# argumento lleva un "%" del usuario seguido de nada ("100%s" no acaba en "100 "). Para textos no ASCII o muy largos ver text_input.
+
+TEXT_CHUNK = 256
+_TEXT_KEYS = {"\n": "66", "\t": "61"}   # KEYCODE_ENTER, KEYCODE_TAB
+
+_input_cmd_cache = {}
+_cache_lock = threading.Lock()
+
+
+def input_command(serial=None, adb="adb"):
+    """'cmd input' en Android 12+ (no arranca JVM), 'input' en versiones anteriores.
+    Se consulta una vez por dispositivo. Con 'input' cada evento del script cuesta un
+    arranque de JVM en el dispositivo: el lote no baja de ahí (ver cabecera)."""
+    key = (adb, serial)
+    with _cache_lock:
+        if key in _input_cmd_cache:
+            return _input_cmd_cache[key]
+    try:
+        _, out, _ = adb_session.run_shell(["getprop", "ro.build.version.sdk"], serial, adb,
+                                         timeout=adb_session.DEFAULT_TIMEOUT)
+        sdk = int(out.strip() or 0)
+    except (adb_session.AdbSessionError, ValueError):
+        return "input"  # sin dispositivo aún: no cachear
+    cmd = "cmd input" if sdk >= 31 else "input"
+    with _cache_lock:
+        _input_cmd_cache[key] = cmd
+    return cmd
+
+
+def split_text(text, size=TEXT_CHUNK):
+    """Trozos de como mucho `size` caracteres; corta también tras cada '%' literal."""
+    chunks, start = [], 0
+    for i in range(1, len(text)):
+        if i - start >= size or text[i - 1] == "%":
+            chunks.append(text[start:i])
+            start = i
+    if text[start:]:
+        chunks.append(text[start:])
+    return chunks
+
+
+def text_commands(text, input_cmd="input", size=TEXT_CHUNK):
+    """Comandos de shell que teclean `text` (ASCII) con input text / keyevent."""
+    cmds = []
+    line = []
+    for ch in text + "\0":
+        key = _TEXT_KEYS.get(ch)
+        if key is None and ch != "\0":
+            line.append(ch)
+            continue
+        for chunk in split_text("".join(line), size):
+            cmds.append(f"{input_cmd} text {shlex.quote(chunk.replace(' ', '%s'))}")
+        line = []
+        if key:
+            cmds.append(f"{input_cmd} keyevent {key}")
+    return cmds
+
+
+def build_script(events, input_cmd="input"):
+    """Convierte la lista de eventos en una línea de shell."""
+    parts = []
+    pending_keys = []
+
+    def flush_keys():
+        if pending_keys:
+            parts.append(f"{input_cmd} keyevent {' '.join(pending_keys)}")
+            pending_keys.clear()
+
+    for ev in events:
+        kind = ev[0]
+        if kind == "key":
+            pending_keys.append(str(ev[1]))
+            continue
+        flush_keys()
+        if kind == "tap":
+            parts.append(f"{input_cmd} tap {int(ev[1])} {int(ev[2])}")
+        elif kind == "swipe":
+            dur = int(ev[5]) if len(ev) > 5 else 300
+            parts.append(f"{input_cmd} swipe {int(ev[1])} {int(ev[2])} {int(ev[3])} {int(ev[4])} {dur}")
+        elif kind == "text":
+            parts += text_commands(ev[1], input_cmd)
+        elif kind == "sleep":
+            parts.append(f"sleep {max(0, ev[1]) / 1000:.3f}")
+        else:
+            raise ValueError(f"Evento desconocido: {kind}")
+    flush_keys()
+    return "; ".join(parts)
+
+
+def script_for(events, serial=None, adb="adb"):
+    return build_script(events, input_command(serial, adb))
+
+
+def run_events(events, serial=None, adb="adb", timeout=None):
+    """Ejecuta la secuencia en una sola invocación en el dispositivo.
+    Devuelve (returncode, stdout, stderr) como adb_session.run_shell."""
+    script = script_for(events, serial, adb)
+    if not script:
+        return 0, "", ""
+    if timeout is None:
+        # margen para las pausas de la secuencia + 1 s por evento
+        pauses = sum(ev[1] for ev in events if ev[0] == "sleep") / 1000
+        timeout = adb_session.DEFAULT_TIMEOUT + pauses + len(events)
+    return adb_session.run_shell(script, serial, adb, timeout=timeout)
@@ -0,0 +1,376 @@
+import os
+import socket
+import struct
+import threading
+import time
+
+# ----------------------
+# Cliente nativo del protocolo del servidor adb (TCP 5037)
+# ----------------------
+# El servidor adb habla un protocolo de texto con prefijo de longitud (4 hex):
+#   host:version, host:devices-l, host:connect:<ip:port>, host:transport:<serial>...
+# Tras host:transport:<serial> el socket queda enganchado al dispositivo y se puede
+# pedir un servicio (shell:, exec:, sync:). Así nos ahorramos lanzar adb.exe.
+
+ADB_HOST = "127.0.0.1"
+ADB_PORT = int(os.environ.get("ANDROID_ADB_SERVER_PORT", "5037"))
+CONNECT_TIMEOUT = 2
+SOCKET_TIMEOUT = 30
+SYNC_CHUNK = 64 * 1024
+
+
+class AdbProtocolError(Exception):
+    """El servidor adb respondió FAIL o algo inesperado."""
+
+
+class AdbConnectionClosed(AdbProtocolError):
+    """El servidor adb cerró la conexión a mitad de respuesta."""
+
+
+class AdbServerUnavailable(ConnectionRefusedError):
+    """No se pudo conectar con el servidor adb (no está levantado, puerto cerrado,
+    timeout al conectar). No se ha enviado nada: se puede usar el ejecutable adb."""
+
+
+# ----------------------
+# Bajo nivel
+# ----------------------
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise AdbConnectionClosed("Conexión cerrada por el servidor adb")
+        buf += chunk
+    return bytes(buf)
+
+
+def _recv_all(sock):
+    parts = []
+    while True:
+        chunk = sock.recv(SYNC_CHUNK)
+        if not chunk:
+            return b"".join(parts)
+        parts.append(chunk)
+
+
+def _send_request(sock, payload):
+    data = payload.encode("utf-8")
+    sock.sendall(b"%04x" % len(data) + data)
+
+
+def _read_hex_block(sock):
+    n = int(_recv_exact(sock, 4), 16)
+    return _recv_exact(sock, n).decode("utf-8", errors="replace")
+
+
+def _read_status(sock):
+    status = _recv_exact(sock, 4)
+    if status == b"OKAY":
+        return
+    if status == b"FAIL":
+        raise AdbProtocolError(_read_hex_block(sock))
+    raise AdbProtocolError(f"Respuesta inesperada del servidor adb: {status!r}")
+
+
+class AdbClient:
+    """Cliente del servidor adb. Las conexiones sync: se reutilizan por dispositivo
+    (el resto de servicios de adb son de un solo uso: el servidor cierra el socket)."""
+
+    def __init__(self, host=ADB_HOST, port=ADB_PORT):
+        self.host = host
+        self.port = port
+        self._sync_pool = {}
+        self._lock = threading.Lock()
+
+    # --- conexión ---
+    def _connect(self):
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=CONNECT_TIMEOUT)
+        except OSError as e:
+            raise AdbServerUnavailable(f"Servidor adb no disponible en {self.host}:{self.port}: {e}") from e
+        sock.settimeout(SOCKET_TIMEOUT)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _host_query(self, request):
+        """Petición host:* que devuelve un bloque de texto."""
+        with self._connect() as sock:
+            _send_request(sock, request)
+            _read_status(sock)
+            return _read_hex_block(sock)
+
+    def _transport(self, serial):
+        sock = self._connect()
+        try:
+            _send_request(sock, f"host:transport:{serial}" if serial else "host:transport-any")
+            _read_status(sock)
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    def open_service(self, service, serial=None):
+        """Abre un servicio del dispositivo (p.ej. 'exec:screencap -p') y devuelve el socket."""
+        sock = self._transport(serial)
+        try:
+            _send_request(sock, service)
+            _read_status(sock)
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    # --- host ---
+    def version(self):
+        return int(self._host_query("host:version"), 16)
+
+    def devices(self, long=False):
+        """Lista de (serial, estado, extra) conectados al servidor."""
+        out = self._host_query("host:devices-l" if long else "host:devices")
+        result = []
+        for line in out.splitlines():
+            parts = line.split(None, 2)
+            if len(parts) >= 2:
+                result.append((parts[0], parts[1], parts[2] if len(parts) > 2 else ""))
+        return result
+
+    def devices_text(self, long=False):
+        return self._host_query("host:devices-l" if long else "host:devices")
+
+    def track_devices(self):
+        """Abre host:track-devices y devuelve el socket: el servidor manda la lista
+        entera cada vez que algo cambia (ver read_devices_update). Se corta cerrándolo."""
+        sock = self._connect()
+        try:
+            _send_request(sock, "host:track-devices")
+            _read_status(sock)
+        except Exception:
+            sock.close()
+            raise
+        sock.settimeout(None)
+        return sock
+
+    @staticmethod
+    def read_devices_update(sock):
+        """Bloquea hasta el siguiente cambio; devuelve {serial: estado}."""
+        states = {}
+        for line in _read_hex_block(sock).splitlines():
+            parts = line.split(None, 1)
+            if len(parts) == 2:
+                states[parts[0]] = parts[1].strip()
+        return states
+
+    def connect(self, address):
+        return self._host_query(f"host:connect:{address}").strip()
+
+    def disconnect(self, address=""):
+        return self._host_query(f"host:disconnect:{address}").strip()
+
+    # --- shell ---
+    def shell(self, command, serial=None):
+        """Ejecuta un comando con shell v2 (stdout/stderr separados y código de salida).
+        Si el dispositivo no soporta v2 se usa shell: clásico (rc = 0, salida mezclada)."""
+        try:
+            sock = self.open_service(f"shell,v2,raw:{command}", serial)
+        except AdbProtocolError:
+            sock = self.open_service(f"shell:{command}", serial)
+            with sock:
+                return 0, _recv_all(sock).decode("utf-8", errors="replace"), ""
+        out, err, rc = bytearray(), bytearray(), 0
+        with sock:
+            while True:
+                try:
+                    header = _recv_exact(sock, 5)
+                except AdbProtocolError:
+                    break
+                kind, n = header[0], struct.unpack("<I", header[1:])[0]
+                data = _recv_exact(sock, n)
+                if kind == 1:
+                    out += data
+                elif kind == 2:
+                    err += data
+                elif kind == 3:
+                    rc = data[0] if data else 0
+                    break
+        return rc, out.decode("utf-8", errors="replace"), err.decode("utf-8", errors="replace")
+
+    def exec_out(self, command, serial=None):
+        """`adb exec-out <command>`: salida binaria sin tocar."""
+        with self.open_service(f"exec:{command}", serial) as sock:
+            return _recv_all(sock)
+
+    def exec_in(self, command, data, serial=None, on_sent=None):
+        """exec:<command> enviando `data` por su stdin (p.ej. `cmd package install -S`).
+        on_sent() se llama al terminar de enviar, antes de esperar la respuesta."""
+        with self.open_service(f"exec:{command}", serial) as sock:
+            view = memoryview(data)
+            for i in range(0, len(view), SYNC_CHUNK):
+                sock.sendall(view[i:i + SYNC_CHUNK])
+            if on_sent:
+                on_sent()
+            return _recv_all(sock)
+
+    # --- sync ---
+    def _sync_acquire(self, serial, fresh=False):
+        """(socket, venía_del_pool)."""
+        if not fresh:
+            with self._lock:
+                idle = self._sync_pool.get(serial)
+                if idle:
+                    return idle.pop(), True
+        return self.open_service("sync:", serial), False
+
+    def _sync_release(self, serial, sock):
+        with self._lock:
+            self._sync_pool.setdefault(serial, []).append(sock)
+
+    def _sync(self, serial, fn):
+        """Ejecuta fn(sock) sobre una conexión sync: del pool; si falla se descarta.
+        Si la del pool estaba muerta (el servidor o el dispositivo la cerró mientras
+        esperaba) se repite una vez con una conexión nueva: stat, push y pull se
+        pueden repetir sin efectos de más."""
+        for attempt in range(2):
+            sock, pooled = self._sync_acquire(serial, fresh=attempt > 0)
+            try:
+                result = fn(sock)
+            except (AdbConnectionClosed, ConnectionError):
+                sock.close()
+                if pooled and not attempt:
+                    continue
+                raise
+            except Exception:
+                sock.close()
+                raise
+            self._sync_release(serial, sock)
+            return result
+
+    @staticmethod
+    def _sync_cmd(sock, cmd, arg):
+        data = arg.encode("utf-8")
+        sock.sendall(cmd + struct.pack("<I", len(data)) + data)
+
+    def stat(self, remote, serial=None):
+        """(mode, size, mtime) de una ruta remota; mode == 0 si no existe."""
+        def op(sock):
+            self._sync_cmd(sock, b"STAT", remote)
+            resp = _recv_exact(sock, 16)
+            if resp[:4] != b"STAT":
+                raise AdbProtocolError(f"Respuesta STAT inesperada: {resp[:4]!r}")
+            return struct.unpack("<III", resp[4:])
+        return self._sync(serial, op)
+
+    def push(self, local, remote, serial=None):
+        """Sube un fichero. Devuelve bytes transferidos."""
+        st = os.stat(local)
+        mode, _, _ = self.stat(remote, serial)
+        if mode & 0o170000 == 0o040000:  # destino es carpeta
+            remote = remote.rstrip("/") + "/" + os.path.basename(local)
+
+        def op(sock):
+            self._sync_cmd(sock, b"SEND", f"{remote},{0o100000 | (st.st_mode & 0o777)}")
+            sent = 0
+            with open(local, "rb") as f:
+                while True:
+                    chunk = f.read(SYNC_CHUNK)
+                    if not chunk:
+                        break
+                    sock.sendall(b"DATA" + struct.pack("<I", len(chunk)) + chunk)
+                    sent += len(chunk)
+            sock.sendall(b"DONE" + struct.pack("<I", int(st.st_mtime)))
+            resp = _recv_exact(sock, 8)
+            if resp[:4] == b"FAIL":
+                raise AdbProtocolError(_recv_exact(sock, struct.unpack("<I", resp[4:])[0]).decode("utf-8", "replace"))
+            if resp[:4] != b"OKAY":
+                raise AdbProtocolError(f"Respuesta inesperada a SEND: {resp[:4]!r}")
+            return sent
+        return self._sync(serial, op)
+
+    def pull(self, remote, local, serial=None):
+        """Descarga un fichero. Devuelve bytes transferidos."""
+        if os.path.isdir(local):
+            local = os.path.join(local, os.path.basename(remote.rstrip("/")))
+
+        def op(sock):
+            self._sync_cmd(sock, b"RECV", remote)
+            received = 0
+            tmp = local + ".part"
+            try:
+                with open(tmp, "wb") as f:
+                    while True:
+                        header = _recv_exact(sock, 8)
+                        kind, n = header[:4], struct.unpack("<I", header[4:])[0]
+                        if kind == b"DATA":
+                            f.write(_recv_exact(sock, n))
+                            received += n
+                        elif kind == b"DONE":
+                            break
+                        elif kind == b"FAIL":
+                            raise AdbProtocolError(_recv_exact(sock, n).decode("utf-8", "replace"))
+                        else:
+                            raise AdbProtocolError(f"Respuesta inesperada a RECV: {kind!r}")
+                os.replace(tmp, local)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            return received
+        return self._sync(serial, op)
+
+    def close(self):
+        with self._lock:
+            pools, self._sync_pool = self._sync_pool, {}
+        for socks in pools.values():
+            for sock in socks:
+                try:
+                    self._sync_cmd(sock, b"QUIT", "")
+                    sock.close()
+                except Exception:
+                    pass
+
+
+# ----------------------
+# Despachador compatible con la línea de comandos de adb
+# ----------------------
+_client = AdbClient()
+
+
+def get_client():
+    return _client
+
+
+def _transfer_msg(verb, n, elapsed):
+    mbps = n / (1024 * 1024) / elapsed if elapsed > 0 else 0
+    return f"1 file {verb}. {n} bytes in {elapsed:.3f}s ({mbps:.1f} MB/s)"
+
+
+def try_native(args, serial=None):
+    """Intenta resolver `adb <args>` sin lanzar adb. Devuelve (rc, stdout, stderr) o None
+    si el comando no está soportado o no se pudo conectar con el servidor (el llamante
+    usa entonces el ejecutable adb, que además arranca el servidor). Un error con la
+    petición ya enviada se devuelve como resultado: repetirla podría duplicar el comando."""
+    if not args:
+        return None
+    cmd, rest = args[0], args[1:]
+    try:
+        if cmd == "devices":
+            long = "-l" in rest
+            return 0, "List of devices attached\n" + _client.devices_text(long), ""
+        if cmd == "connect" and len(rest) == 1:
+            msg = _client.connect(rest[0])
+            return (1 if "failed" in msg or "cannot" in msg else 0), msg, ""
+        if cmd == "disconnect" and len(rest) <= 1:
+            return 0, _client.disconnect(rest[0] if rest else ""), ""
+        if cmd == "push" and len(rest) == 2 and os.path.isfile(rest[0]):
+            t0 = time.perf_counter()
+            n = _client.push(rest[0], rest[1], serial)
+            return 0, f"{rest[0]}: " + _transfer_msg("pushed", n, time.perf_counter() - t0), ""
+        if cmd == "pull" and len(rest) == 2:
+            t0 = time.perf_counter()
+            n = _client.pull(rest[0], rest[1], serial)
+            return 0, f"{rest[0]}: " + _transfer_msg("pulled", n, time.perf_counter() - t0), ""
+    except AdbServerUnavailable:
+        return None
+    except (AdbProtocolError, OSError) as e:
+        return 1, "", f"adb: error: {e}"
+    return None
@@ -0,0 +1,232 @@
+import struct
+import subprocess
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import adb_protocol
+
+# ----------------------
+# Capturas por `exec-out screencap` (sin fichero en /sdcard ni pull)
+# ----------------------
+# screencap -p  -> PNG (el dispositivo comprime)
+# screencap     -> raw: cabecera w, h, formato (+ colorspace en Android 9+) y RGBA
+
+RAW_FORMAT_RGBA = 1
+CACHE_SIZE = 8
+
+
+class Frame:
+    """Una captura. `data` es PNG (png=True) o píxeles RGBA (png=False)."""
+
+    __slots__ = ("serial", "timestamp", "width", "height", "png", "data")
+
+    def __init__(self, serial, timestamp, width, height, png, data):
+        self.serial = serial
+        self.timestamp = timestamp
+        self.width = width
+        self.height = height
+        self.png = png
+        self.data = data
+
+    def to_png(self):
+        if self.png:
+            return bytes(self.data)
+        return encode_png(self.data, self.width, self.height)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_png())
+
+
+def encode_png(rgba, width, height, level=1):
+    """PNG RGBA mínimo con zlib (sin dependencias). Nivel 1: rápido, que es lo que importa aquí."""
+    stride = width * 4
+    view = memoryview(rgba)
+    raw = bytearray()
+    for y in range(height):
+        raw += b"\x00"  # filtro None
+        raw += view[y * stride:(y + 1) * stride]
+
+    def chunk(tag, payload):
+        return struct.pack(">I", len(payload)) + tag + payload + struct.pack(">I", zlib.crc32(tag + payload))
+
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr)
+            + chunk(b"IDAT", zlib.compress(bytes(raw), level)) + chunk(b"IEND", b""))
+
+
+def _png_size(data):
+    if data[:8] != b"\x89PNG\r\n\x1a\n" or len(data) < 24:
+        raise ValueError("screencap no devolvió un PNG válido")
+    return struct.unpack(">II", data[16:24])
+
+
+def _raw_header_len(data, width, height):
+    # Android 9+ añade un uint32 de colorspace a la cabecera
+    return 16 if len(data) - width * height * 4 == 16 else 12
+
+
+# ----------------------
+# Caché acotada de frames por (serial, timestamp)
+# ----------------------
+class FrameCache:
+    def __init__(self, max_frames=CACHE_SIZE):
+        self.max_frames = max_frames
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, frame):
+        """Guarda el frame y devuelve el expulsado (si lo hay)."""
+        with self._lock:
+            self._frames[(frame.serial, frame.timestamp)] = frame
+            if len(self._frames) > self.max_frames:
+                return self._frames.popitem(last=False)[1]
+        return None
+
+    def get(self, serial, timestamp):
+        with self._lock:
+            return self._frames.get((serial, timestamp))
+
+    def timestamps(self, serial=None):
+        """Timestamps de los frames cacheados del dispositivo, del más antiguo al último."""
+        with self._lock:
+            return [ts for (s, ts) in self._frames if s == serial]
+
+    def latest(self, serial=None):
+        with self._lock:
+            for (s, _), frame in reversed(self._frames.items()):
+                if s == serial:
+                    return frame
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+
+frame_cache = FrameCache()
+
+
+# ----------------------
+# Captura
+# ----------------------
+def _exec_out_into(command, serial, buf):
+    """Lee la salida de exec:<command> reutilizando `buf` (bytearray). Devuelve bytes leídos."""
+    sock = adb_protocol.get_client().open_service(f"exec:{command}", serial)
+    n = 0
+    with sock:
+        while True:
+            if n == len(buf):
+                buf.extend(bytes(max(len(buf), 1 << 20)))  # crecer solo si no cabe
+            got = sock.recv_into(memoryview(buf)[n:])
+            if not got:
+                return n
+            n += got
+
+
+def _exec_out_subprocess(command, serial, adb):
+    cmd = [adb] + (["-s", serial] if serial else []) + ["exec-out"] + command.split()
+    proc = subprocess.run(cmd, capture_output=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.decode("utf-8", "replace").strip() or "exec-out falló")
+    return proc.stdout
+
+
+def capture(serial=None, raw=False, adb="adb", buf=None, cache=frame_cache):
+    """Captura la pantalla en memoria. raw=True evita la compresión PNG en el dispositivo.
+    `buf` (bytearray) permite reutilizar memoria entre capturas."""
+    command = "screencap" if raw else "screencap -p"
+    ts = time.time()
+    try:
+        if buf is None:
+            buf = bytearray()
+        n = _exec_out_into(command, serial, buf)
+        data = memoryview(buf)[:n]
+    except ConnectionRefusedError:
+        data = memoryview(_exec_out_subprocess(command, serial, adb))
+
+    if raw:
+        if len(data) < 12:
+            raise ValueError("screencap raw demasiado corto")
+        width, height, fmt = struct.unpack("<III", data[:12])
+        if fmt != RAW_FORMAT_RGBA:
+            raise ValueError(f"Formato raw no soportado: {fmt}")
+        hdr = _raw_header_len(data, width, height)
+        pixels = data[hdr:hdr + width * height * 4]
+        frame = Frame(serial, ts, width, height, False, pixels)
+    else:
+        width, height = _png_size(data)
+        frame = Frame(serial, ts, width, height, True, data)
+    if cache is not None:
+        cache.add(frame)
+    return frame
+
+
+def screenshot_to_file(path, serial=None, adb="adb"):
+    frame = capture(serial, adb=adb)
+    frame.save(path)
+    return frame
+
+
+# ----------------------
+# Captura periódica
+# ----------------------
+class PeriodicCapture:
+    """Captura cada `interval` s en un hilo. La recepción usa un juego fijo de `buffers`
+    bytearray que se reutilizan de una captura a otra; a la caché y a on_frame solo
+    llegan frames con sus propios bytes (inmutables), así que nadie se queda con una
+    vista de un buffer que se va a sobrescribir."""
+
+    def __init__(self, serial=None, interval=1.0, raw=True, adb="adb", cache=None, on_frame=None, buffers=2):
+        self.serial = serial
+        self.interval = interval
+        self.raw = raw
+        self.adb = adb
+        self.cache = cache or FrameCache()
+        self.on_frame = on_frame
+        self.errors = 0
+        self._free = [bytearray() for _ in range(max(1, buffers))]
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 5)
+
+    def fps(self):
+        """Frames por segundo medidos sobre los frames en caché."""
+        stamps = self.cache.timestamps(self.serial)
+        if len(stamps) < 2 or stamps[-1] == stamps[0]:
+            return 0.0
+        return (len(stamps) - 1) / (stamps[-1] - stamps[0])
+
+    def _loop(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            buf = self._free.pop()
+            try:
+                frame = capture(self.serial, self.raw, self.adb, buf=buf, cache=None)
+                # copia propia: el buffer vuelve al juego en cuanto sale de aquí
+                data = frame.data
+                frame.data = bytes(data)
+                if isinstance(data, memoryview):
+                    data.release()
+            except Exception:
+                self.errors += 1
+            else:
+                self.cache.add(frame)
+                if self.on_frame:
+                    self.on_frame(frame)
+            finally:
+                self._free.append(buf)
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
@@ -0,0 +1,197 @@
+import subprocess
+import threading
+import queue
+import uuid
+import atexit
+
+# ----------------------
+# Sesiones persistentes de `adb shell`
+# ----------------------
+# En lugar de lanzar un proceso adb (y un servicio shell: nuevo) por cada comando,
+# se mantiene un `adb shell` abierto por dispositivo y se le escriben los comandos
+# por stdin. Cada comando termina con un marcador (sentinel) que lleva el código
+# de salida, para saber dónde acaba su salida.
+
+DEFAULT_TIMEOUT = 30   # para las consultas internas (getprop, wm size...); los comandos del usuario no tienen límite
+STDERR_GRACE = 2  # segundos extra para esperar el marcador de stderr
+
+
+class AdbSessionError(Exception):
+    """La sesión adb shell no se pudo abrir o murió durante un comando."""
+
+
+class AdbSessionNotSent(AdbSessionError):
+    """No se pudo abrir la sesión o escribir el comando: no se llegó a ejecutar nada,
+    así que se puede repetir por otro camino (el ejecutable adb) sin riesgo."""
+
+
+class ShellSession:
+    """Un `adb [-s serial] shell` de larga duración."""
+
+    def __init__(self, serial=None, adb="adb"):
+        self.serial = serial
+        self.adb = adb
+        self.proc = None
+        self.lock = threading.Lock()
+        self._marker = f"__ADBGUI_{uuid.uuid4().hex}__"
+        self._seq = 0
+        self._sent = False
+        self._out_q = None
+        self._err_q = None
+
+    # --- ciclo de vida ---
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self):
+        cmd = [self.adb]
+        if self.serial:
+            cmd += ["-s", self.serial]
+        cmd.append("shell")
+        try:
+            self.proc = subprocess.Popen(
+                cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                text=True, encoding="utf-8", errors="replace", bufsize=1,
+            )
+        except Exception as e:
+            self.proc = None
+            raise AdbSessionNotSent(f"No se pudo abrir adb shell: {e}")
+        self._out_q = queue.Queue()
+        self._err_q = queue.Queue()
+        for stream, q in ((self.proc.stdout, self._out_q), (self.proc.stderr, self._err_q)):
+            threading.Thread(target=self._pump, args=(stream, q), daemon=True).start()
+
+    def close(self):
+        proc, self.proc = self.proc, None
+        if not proc:
+            return
+        try:
+            proc.stdin.write("exit\n")
+            proc.stdin.flush()
+            proc.wait(timeout=1)
+        except Exception:
+            try:
+                proc.kill()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _pump(stream, q):
+        """Hilo lector: pasa cada línea del pipe a la cola (None = EOF)."""
+        try:
+            for line in stream:
+                q.put(line)
+        except Exception:
+            pass
+        q.put(None)
+
+    # --- ejecución ---
+    def run(self, command, timeout=None):
+        """Ejecuta `command` (str) en la sesión. Devuelve (returncode, stdout, stderr).
+        timeout=None espera lo que haga falta (un `pm install` grande, `bugreportz`...).
+        Si la sesión estaba muerta se reabre; si muere con el comando ya enviado no se
+        reintenta (podría repetir un tap, un install...)."""
+        with self.lock:
+            for attempt in range(2):
+                if not self.alive():
+                    self.start()
+                self._sent = False
+                try:
+                    return self._run_locked(command, timeout)
+                except AdbSessionError:
+                    self.close()
+                    if attempt or self._sent:
+                        raise
+
+    def _run_locked(self, command, timeout):
+        self._seq += 1
+        m = f"{self._marker}{self._seq}"
+        # stdin de /dev/null para que el comando no se coma los siguientes; el `echo`
+        # suelto garantiza que el marcador empiece en línea nueva.
+        script = (
+            f"{{ {command}\n}} </dev/null; __rc=$?; "
+            f"echo >&2; echo {m} >&2; echo; echo {m} $__rc\n"
+        )
+        try:
+            self.proc.stdin.write(script)
+            self.proc.stdin.flush()
+        except (OSError, ValueError, AttributeError) as e:
+            raise AdbSessionNotSent(f"Sesión adb cerrada: {e}")
+        self._sent = True
+
+        out, rc, merged = self._collect(self._out_q, m, timeout, want_rc=True)
+        if merged:
+            # dispositivo sin shell v2: stderr llega mezclado en stdout
+            return rc, out, ""
+        try:
+            err, _, _ = self._collect(self._err_q, m, STDERR_GRACE, want_rc=False)
+        except AdbSessionError:
+            err = ""
+        return rc, out, err
+
+    def _collect(self, q, m, timeout, want_rc):
+        lines = []
+        merged = False
+        while True:
+            try:
+                line = q.get(timeout=timeout)
+            except queue.Empty:
+                raise AdbSessionError("Timeout esperando respuesta de adb shell")
+            if line is None:
+                raise AdbSessionError("La sesión adb shell terminó: " + "".join(lines).strip())
+            clean = line.rstrip("\r\n")
+            head, _, rest = clean.partition(" ")
+            if head.startswith(self._marker) and head != m:
+                lines = []  # restos de un comando anterior que agotó su tiempo
+                continue
+            if head == m:
+                rest = rest.strip()
+                if want_rc and not rest:
+                    merged = True  # marcador de stderr colado en stdout
+                    continue
+                text = "".join(lines).replace("\r\n", "\n")
+                # quitar el salto de línea extra que añade el `echo` previo al marcador
+                if text.endswith("\n"):
+                    text = text[:-1]
+                if merged and text.endswith("\n"):
+                    text = text[:-1]
+                rc = int(rest) if rest.lstrip("-").isdigit() else -1
+                return text, rc, merged
+            lines.append(line)
+
+
+# ----------------------
+# Pool de sesiones por serial
+# ----------------------
+_sessions = {}
+_pool_lock = threading.Lock()
+
+
+def get_session(serial=None, adb="adb"):
+    key = (adb, serial)
+    with _pool_lock:
+        sess = _sessions.get(key)
+        if sess is None:
+            sess = ShellSession(serial, adb)
+            _sessions[key] = sess
+        return sess
+
+
+def run_shell(args, serial=None, adb="adb", timeout=None):
+    """Equivalente a `adb [-s serial] shell <args...>` sobre la sesión persistente.
+    Los argumentos se unen con espacios, igual que hace el propio cliente adb.
+    Sin timeout por defecto, como `adb shell`; las consultas internas pasan DEFAULT_TIMEOUT."""
+    if not isinstance(args, str):
+        args = " ".join(str(a) for a in args)
+    return get_session(serial, adb).run(args, timeout=timeout)
+
+
+def close_all():
+    with _pool_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for sess in sessions:
+        sess.close()
+
+
+atexit.register(close_all)
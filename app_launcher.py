@@ -0,0 +1,207 @@
+import csv
+import json
+import os
+import re
+import shlex
+import statistics
+import threading
+import time
+from collections import deque
+
+import adb_session
+
+# ----------------------
+# Arranque de apps con `am start -W` y tiempos de arranque
+# ----------------------
+# `monkey -p <pkg> -c LAUNCHER 1` levanta su propia JVM y vuelve a buscar la actividad
+# de entrada en cada llamada. Aquí la actividad se resuelve una vez por dispositivo y
+# paquete (`cmd package resolve-activity`) y se arranca con `am start -W -n`, que
+# espera a que se dibuje y devuelve TotalTime/WaitTime. Todo en un solo script por la
+# sesión persistente: comprobar si el proceso ya estaba vivo (pidof), force-stop si se
+# pide arranque en frío y el am start.
+# Tipo de arranque: LaunchState si el sistema lo da (Android 10+); si no, "hot" cuando
+# am avisa de que solo ha traído la tarea al frente, "warm" si el proceso ya existía y
+# "cold" si no. Cada arranque se añade a launch_history.jsonl (una línea JSON, solo
+# append: la GUI y la CLI pueden escribir a la vez) y se exporta a CSV o JSON.
+
+LAUNCHER_CATEGORY = "android.intent.category.LAUNCHER"
+HISTORY_PER_DEVICE = 1000
+STATES = ("cold", "warm", "hot")
+
+_RUNNING_MARK = "__ADBGUI_RUNNING__"
+_FIELD_RE = re.compile(r"^(Status|LaunchState|Activity|TotalTime|WaitTime):\s*(.*)$")
+
+
+class LaunchError(Exception):
+    pass
+
+
+def parse_resolve_activity(text):
+    """pkg/actividad de `cmd package resolve-activity --brief` (última línea con '/'), o None."""
+    for line in reversed(text.strip().splitlines()):
+        line = line.strip()
+        if "/" in line and " " not in line:
+            return line
+    return None
+
+
+def parse_am_start(text):
+    """Campos de `am start -W`: status, state, activity, total_ms, wait_ms, error."""
+    res = {"status": None, "state": None, "activity": None, "total_ms": None, "wait_ms": None, "error": None}
+    for line in text.splitlines():
+        line = line.strip()
+        m = _FIELD_RE.match(line)
+        if m:
+            key, value = m.groups()
+            if key in ("TotalTime", "WaitTime"):
+                res["total_ms" if key == "TotalTime" else "wait_ms"] = int(value) if value.isdigit() else None
+            elif key == "LaunchState":
+                res["state"] = value.split()[0].lower()   # "COLD", "WARM", "HOT" (o "UNKNOWN (0)")
+            else:
+                res[key.lower()] = value
+        elif line.startswith("Error") or line.startswith("Exception"):
+            res["error"] = line
+        elif "brought to the front" in line:
+            res["state"] = res["state"] or "hot"
+    return res
+
+
+def _launch_script(package, activity, cold):
+    q = shlex.quote
+    lines = [f"pidof {q(package)} >/dev/null 2>&1 && echo {_RUNNING_MARK}"]
+    if cold:
+        lines.append(f"am force-stop {q(package)}")
+    # MAIN/LAUNCHER como el launcher: si la tarea ya existe se trae al frente (hot)
+    lines.append(f"am start -W -a android.intent.action.MAIN -c {LAUNCHER_CATEGORY} -n {q(activity)}")
+    return "\n".join(lines)
+
+
+class AppLauncher:
+    def __init__(self, history_path=None, adb="adb"):
+        self.history_path = str(history_path) if history_path else None
+        self.adb = adb
+        self._activities = {}       # (serial, paquete) -> "pkg/.Actividad"
+        self._history = {}          # serial -> deque de entradas
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    # --- actividad de entrada ---
+    def resolve_activity(self, package, serial=None, refresh=False):
+        key = (serial or "", package)
+        with self._lock:
+            activity = self._activities.get(key)
+        if activity and not refresh:
+            return activity
+        cmd = (f"cmd package resolve-activity --brief -a android.intent.action.MAIN "
+               f"-c {LAUNCHER_CATEGORY} {shlex.quote(package)}")
+        _, out, _ = adb_session.run_shell(cmd, serial, self.adb, timeout=adb_session.DEFAULT_TIMEOUT)
+        activity = parse_resolve_activity(out)
+        if not activity:
+            raise LaunchError(f"{package}: no tiene actividad de entrada (¿está instalado?)")
+        with self._lock:
+            self._activities[key] = activity
+        return activity
+
+    def invalidate(self, serial=None):
+        """Olvida las actividades resueltas de un dispositivo (reconexión, apps actualizadas...)."""
+        key = serial or ""
+        with self._lock:
+            for k in [k for k in self._activities if k[0] == key]:
+                del self._activities[k]
+
+    # --- arranque ---
+    def launch(self, package, serial=None, cold=False):
+        """Arranca la app y devuelve la entrada de historial
+        {ts, serial, package, activity, state, total_ms, wait_ms}."""
+        activity = self.resolve_activity(package, serial)
+        res, running = self._start(package, activity, serial, cold)
+        if res["error"] and "does not exist" in res["error"]:
+            # la app se ha actualizado y la actividad ha cambiado de nombre
+            activity = self.resolve_activity(package, serial, refresh=True)
+            res, running = self._start(package, activity, serial, cold)
+        if res["error"] or (res["status"] and res["status"] != "ok"):
+            raise LaunchError(res["error"] or f"{package}: am start devolvió {res['status']}")
+        state = res["state"] if res["state"] in STATES else ("warm" if running and not cold else "cold")
+        entry = {"ts": round(time.time(), 3), "serial": serial or "", "package": package,
+                 "activity": res["activity"] or activity, "state": state,
+                 "total_ms": res["total_ms"], "wait_ms": res["wait_ms"]}
+        self._record(entry)
+        return entry
+
+    def _start(self, package, activity, serial, cold):
+        rc, out, err = adb_session.run_shell(_launch_script(package, activity, cold), serial, self.adb)
+        res = parse_am_start(out + "\n" + err)
+        if rc != 0 and not res["error"]:
+            res["error"] = (err or out).strip() or f"am start rc={rc}"
+        return res, _RUNNING_MARK in out
+
+    # --- historial ---
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.history_path:
+            return
+        try:
+            with open(self.history_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue   # línea a medias de un cierre brusco
+                    self._history.setdefault(entry.get("serial", ""), deque(maxlen=HISTORY_PER_DEVICE)).append(entry)
+        except OSError:
+            pass
+
+    def _record(self, entry):
+        with self._lock:
+            self._load()
+            self._history.setdefault(entry["serial"], deque(maxlen=HISTORY_PER_DEVICE)).append(entry)
+            if self.history_path:
+                try:
+                    with open(self.history_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                except OSError:
+                    pass
+
+    def history(self, serial=None, package=None):
+        """Entradas (las más recientes al final); serial=None = todos los dispositivos."""
+        with self._lock:
+            self._load()
+            if serial is None:
+                entries = [e for d in self._history.values() for e in d]
+                entries.sort(key=lambda e: e["ts"])
+            else:
+                entries = list(self._history.get(serial, ()))
+        return [e for e in entries if package is None or e["package"] == package]
+
+    def stats(self, serial=None, package=None):
+        """{(paquete, estado): {"n", "p50_ms", "mean_ms", "last_ms"}} sobre TotalTime."""
+        groups = {}
+        for e in self.history(serial, package):
+            if e.get("total_ms") is not None:
+                groups.setdefault((e["package"], e["state"]), []).append(e["total_ms"])
+        return {key: {"n": len(v), "p50_ms": statistics.median(v), "mean_ms": round(statistics.fmean(v), 1),
+                      "last_ms": v[-1]}
+                for key, v in sorted(groups.items())}
+
+    def export(self, path, serial=None):
+        """Exporta el historial a CSV (por extensión) o JSON. Devuelve nº de entradas."""
+        entries = self.history(serial)
+        fields = ("ts", "serial", "package", "activity", "state", "total_ms", "wait_ms")
+        tmp = str(path) + ".tmp"
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            if str(path).lower().endswith(".csv"):
+                writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+                writer.writeheader()
+                writer.writerows(entries)
+            else:
+                json.dump(entries, f, indent=2)
+        os.replace(tmp, path)
+        return len(entries)
+
+
+def describe(entry):
+    """Texto corto para la consola: 'com.app (cold, 523 ms)'."""
+    ms = f", {entry['total_ms']} ms" if entry.get("total_ms") is not None else ""
+    return f"{entry['package']} ({entry['state']}{ms})"
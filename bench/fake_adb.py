@@ -0,0 +1,321 @@
+import os
+import socket
+import struct
+import sys
+import threading
+import zlib
+
+# ----------------------
+# Servidor adb falso para los benchmarks (bench/run.py)
+# ----------------------
+# Habla el protocolo del servidor adb (lo que usa adb_protocol) sin dispositivo real:
+#   host:version, host:devices(-l), host:track-devices, host:connect/disconnect,
+#   host:transport(-any), shell,v2 / shell:, exec: y sync: (STAT/SEND/RECV).
+# Los comandos de shell no se ejecutan: se responde con salidas fijas (ver RESPONSES,
+# o `shell_results` para dar también stderr y código de salida) o vacío con rc 0. screencap -p devuelve un PNG sintético y screencap a secas el raw
+# (cabecera w, h, formato + RGBA). Los ficheros de sync: viven en memoria.
+# Cuenta las peticiones por servicio en `requests` para ver cuántas idas y vueltas
+# cuesta cada operación.
+
+SERIAL = "fake-0001"
+SCREEN_W, SCREEN_H = 1080, 2400
+
+RESPONSES = {
+    "getprop ro.build.version.sdk": "34\n",
+    "getprop ro.product.cpu.abi": "arm64-v8a\n",
+    "wm size": f"Physical size: {SCREEN_W}x{SCREEN_H}\n",
+    "wm density": "Physical density: 420\n",
+    "cat /proc/sys/kernel/random/boot_id": "00000000-0000-0000-0000-000000000000\n",
+}
+
+
+def _png(width, height, rgba):
+    def chunk(tag, payload):
+        return struct.pack(">I", len(payload)) + tag + payload + struct.pack(">I", zlib.crc32(tag + payload))
+    stride = width * 4
+    raw = b"".join(b"\x00" + rgba[y * stride:(y + 1) * stride] for y in range(height))
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr)
+            + chunk(b"IDAT", zlib.compress(raw, 1)) + chunk(b"IEND", b""))
+
+
+def synthetic_screen(width=SCREEN_W, height=SCREEN_H):
+    """(png, raw) de una pantalla con bandas de color: algo que comprimir, pero poco."""
+    row = b"".join(bytes(((x * 7) & 0xFF, (x * 3) & 0xFF, 0x80, 0xFF)) for x in range(width))
+    rgba = row * height
+    raw = struct.pack("<IIII", width, height, 1, 0) + rgba
+    return _png(width, height, rgba), raw
+
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("conexión cerrada")
+        buf += chunk
+    return bytes(buf)
+
+
+def _read_request(sock):
+    n = int(_recv_exact(sock, 4), 16)
+    return _recv_exact(sock, n).decode("utf-8")
+
+
+def _okay(sock, payload=None):
+    if payload is None:
+        sock.sendall(b"OKAY")
+    else:
+        data = payload.encode("utf-8")
+        sock.sendall(b"OKAY" + f"{len(data):04x}".encode() + data)
+
+
+def _fail(sock, msg):
+    data = msg.encode("utf-8")
+    sock.sendall(b"FAIL" + f"{len(data):04x}".encode() + data)
+
+
+class FakeAdbServer:
+    def __init__(self, host="127.0.0.1", port=0, screen=None):
+        self.host = host
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind((host, port))
+        self._listener.listen(128)
+        self.port = self._listener.getsockname()[1]
+        self.devices = {SERIAL: "device"}
+        self.files = {}                 # ruta remota -> (bytes, mode, mtime)
+        self.requests = {}              # servicio (hasta ':') -> nº de peticiones
+        self.shell_results = {}         # comando -> (stdout, stderr, rc) para shell,v2
+        self._conns = set()
+        self._png, self._raw = screen or synthetic_screen()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+    # --- ciclo de vida ---
+    def start(self):
+        self._thread = threading.Thread(target=self._accept_loop, name="fake-adb", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._closed = True
+        try:
+            self._listener.close()
+        except OSError:
+            pass
+
+    def drop_connections(self):
+        """Cierra las conexiones abiertas (p.ej. las sync: del pool del cliente), como
+        cuando se reinicia el servidor o el dispositivo se desconecta."""
+        with self._lock:
+            conns, self._conns = list(self._conns), set()
+        for conn in conns:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def reset_counts(self):
+        with self._lock:
+            self.requests = {}
+
+    def count(self, kind=None):
+        with self._lock:
+            return self.requests.get(kind, 0) if kind else sum(self.requests.values())
+
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _note(self, request):
+        kind = request.split(":", 1)[0].split(",", 1)[0]
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    # --- servicios ---
+    def _serve(self, conn):
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self._lock:
+            self._conns.add(conn)
+        try:
+            with conn:
+                self._dispatch(conn)
+        except (OSError, ConnectionError, ValueError):
+            pass
+        finally:
+            with self._lock:
+                self._conns.discard(conn)
+
+    def _dispatch(self, conn):
+        req = _read_request(conn)
+        self._note(req)
+        if req == "host:version":
+            return _okay(conn, "0029")
+        if req in ("host:devices", "host:devices-l"):
+            return _okay(conn, self._devices_text(req.endswith("-l")))
+        if req == "host:track-devices":
+            _okay(conn, self._devices_text(False))
+            conn.recv(1)   # se mantiene abierto hasta que el cliente lo cierra
+            return
+        if req.startswith("host:connect:"):
+            addr = req.split(":", 2)[2]
+            self.devices[addr] = "device"
+            return _okay(conn, f"connected to {addr}")
+        if req.startswith("host:disconnect:"):
+            addr = req.split(":", 2)[2]
+            if addr:
+                self.devices.pop(addr, None)
+            return _okay(conn, f"disconnected {addr}".strip())
+        if req.startswith("host:transport"):
+            serial = req.split(":", 2)[2] if req.startswith("host:transport:") else None
+            if serial is not None and serial not in self.devices:
+                return _fail(conn, f"device '{serial}' not found")
+            _okay(conn)
+            req = _read_request(conn)
+            self._note(req)
+            return self._device_service(conn, req)
+        return _fail(conn, f"unknown host service: {req}")
+
+    def _devices_text(self, long):
+        extra = " product:fake model:Fake_Device device:fake transport_id:1" if long else ""
+        return "".join(f"{s}\t{st}{extra}\n" for s, st in self.devices.items())
+
+    def _device_service(self, conn, req):
+        if req.startswith("shell,v2,raw:") or req.startswith("shell,v2:"):
+            _okay(conn)
+            command = req.split(":", 1)[1]
+            out, err, rc = self.shell_results.get(command.strip(), (self._run(command), "", 0))
+            for kind, text in ((1, out), (2, err)):
+                if text:
+                    data = text if isinstance(text, bytes) else text.encode("utf-8")
+                    conn.sendall(bytes([kind]) + struct.pack("<I", len(data)) + data)
+            conn.sendall(b"\x03" + struct.pack("<I", 1) + bytes([rc & 0xFF]))
+            return
+        if req.startswith("shell:") or req.startswith("exec:"):
+            _okay(conn)
+            command = req.split(":", 1)[1]
+            if command.startswith("cat > "):
+                while conn.recv(65536):   # replay binario de event_recorder
+                    pass
+                return
+            out = self._run(command)
+            conn.sendall(out if isinstance(out, bytes) else out.encode("utf-8"))
+            return
+        if req == "sync:":
+            _okay(conn)
+            return self._sync(conn)
+        return _fail(conn, f"unknown service: {req}")
+
+    def _run(self, command):
+        command = command.strip()
+        if command == "screencap -p":
+            return self._png
+        if command == "screencap":
+            return self._raw
+        return RESPONSES.get(command, "")
+
+    def _sync(self, conn):
+        while True:
+            header = conn.recv(8, socket.MSG_WAITALL)
+            if len(header) < 8:
+                return
+            cmd, n = header[:4], struct.unpack("<I", header[4:])[0]
+            arg = _recv_exact(conn, n).decode("utf-8") if n else ""
+            if cmd == b"QUIT":
+                return
+            if cmd == b"STAT":
+                data, mode, mtime = self.files.get(arg, (b"", 0, 0))
+                if arg in self.files:
+                    conn.sendall(b"STAT" + struct.pack("<III", mode, len(data), mtime))
+                elif arg.rstrip("/") in ("/sdcard", "/data/local/tmp"):
+                    conn.sendall(b"STAT" + struct.pack("<III", 0o040771, 4096, 0))
+                else:
+                    conn.sendall(b"STAT" + struct.pack("<III", 0, 0, 0))
+            elif cmd == b"SEND":
+                path, _, mode = arg.rpartition(",")
+                chunks = []
+                while True:
+                    h = _recv_exact(conn, 8)
+                    kind, size = h[:4], struct.unpack("<I", h[4:])[0]
+                    if kind == b"DATA":
+                        chunks.append(_recv_exact(conn, size))
+                    elif kind == b"DONE":
+                        self.files[path] = (b"".join(chunks), int(mode or 0o100644), size)
+                        conn.sendall(b"OKAY" + struct.pack("<I", 0))
+                        break
+                    else:
+                        return
+            elif cmd == b"RECV":
+                if arg not in self.files:
+                    msg = b"No such file or directory"
+                    conn.sendall(b"FAIL" + struct.pack("<I", len(msg)) + msg)
+                    continue
+                data = memoryview(self.files[arg][0])
+                for i in range(0, len(data), 64 * 1024):
+                    part = data[i:i + 64 * 1024]
+                    conn.sendall(b"DATA" + struct.pack("<I", len(part)) + part)
+                conn.sendall(b"DONE" + struct.pack("<I", 0))
+            else:
+                return
+
+
+# ----------------------
+# Ejecutable `adb` de mentira
+# ----------------------
+# stub_adb.py imita la línea de comandos de adb con sh local como "dispositivo" y
+# herramientas de Android vacías en el PATH (input, am, pm...). Cada arranque se anota
+# en ADB_STUB_LOG para contar procesos por operación.
+
+DEVICE_TOOLS = ("input", "am", "pm", "cmd", "monkey", "settings", "sendevent", "getevent", "uiautomator")
+
+
+def make_stub(workdir):
+    """Crea en workdir el ejecutable `adb` (envoltorio de stub_adb.py), la carpeta de
+    herramientas falsas y el log de arranques. Devuelve (ruta_adb, ruta_log)."""
+    os.makedirs(workdir, exist_ok=True)
+    tools = os.path.join(workdir, "device-bin")
+    os.makedirs(tools, exist_ok=True)
+    log = os.path.join(workdir, "spawns.log")
+    open(log, "w").close()
+    stub = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_adb.py")
+    if sys.platform.startswith("win"):
+        path = os.path.join(workdir, "adb.cmd")
+        with open(path, "w") as f:
+            f.write(f'@"{sys.executable}" "{stub}" %*\r\n')
+        for name in DEVICE_TOOLS + ("getprop", "wm"):
+            with open(os.path.join(tools, name + ".cmd"), "w") as f:
+                f.write("@exit /b 0\r\n")
+    else:
+        path = os.path.join(workdir, "adb")
+        with open(path, "w") as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{stub}" "$@"\n')
+        os.chmod(path, 0o755)
+        for name in DEVICE_TOOLS:
+            _write_tool(tools, name, "exit 0")
+        _write_tool(tools, "getprop", 'case "$1" in\n  ro.build.version.sdk) echo 34;;\n'
+                                      '  ro.product.cpu.abi) echo arm64-v8a;;\nesac')
+        _write_tool(tools, "wm", f'echo "Physical {"size: %dx%d" % (SCREEN_W, SCREEN_H)}"')
+    os.environ["ADB_STUB_LOG"] = log
+    os.environ["ADB_STUB_TOOLS"] = tools
+    return path, log
+
+
+def _write_tool(folder, name, body):
+    path = os.path.join(folder, name)
+    with open(path, "w") as f:
+        f.write(f"#!/bin/sh\n{body}\n")
+    os.chmod(path, 0o755)
+
+
+def spawn_count(log):
+    try:
+        with open(log, "rb") as f:
+            return f.read().count(b"\n")
+    except OSError:
+        return 0
@@ -0,0 +1,303 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# ----------------------
+# Benchmarks de los caminos adb (sin dispositivo)
+# ----------------------
+#   python bench/run.py                       -> tabla + bench_results.json
+#   python bench/run.py --out v2.json --compare v1.json
+#   python bench/run.py --quick               -> menos repeticiones
+# Todo corre contra fake_adb.FakeAdbServer (en un puerto libre, vía
+# ANDROID_ADB_SERVER_PORT) y el adb de mentira de stub_adb.py, así que los números
+# miden el coste propio de la app (procesos, idas y vueltas, Tk) y se pueden comparar
+# entre versiones en la misma máquina. Por cada caso: n, p50/p99/media en ms, procesos
+# `adb` arrancados por operación y, si aplica, throughput.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+REGRESSION = 1.25   # --compare marca lo que empeora más de un 25%
+
+sys.path.insert(0, HERE)
+import fake_adb  # noqa: E402
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _stats(samples, n_ops=None):
+    ms = sorted(s * 1000 for s in samples)
+    if not ms:
+        return {"n": 0}
+    p99 = ms[min(len(ms) - 1, int(round(0.99 * (len(ms) - 1))))]
+    return {"n": n_ops or len(ms), "p50_ms": round(statistics.median(ms), 3),
+            "p99_ms": round(p99, 3), "mean_ms": round(statistics.fmean(ms), 3)}
+
+
+class Bench:
+    def __init__(self, server, adb, spawn_log, quick=False):
+        self.server = server
+        self.adb = adb
+        self.spawn_log = spawn_log
+        self.quick = quick
+        self.results = {}
+
+    def reps(self, n):
+        return max(3, n // 10) if self.quick else n
+
+    def measure(self, name, fn, n, warmup=1, **extra):
+        """Llama fn() n veces; anota latencias y procesos adb por llamada."""
+        for _ in range(warmup):
+            fn()
+        n = self.reps(n)
+        spawns0 = fake_adb.spawn_count(self.spawn_log)
+        self.server.reset_counts()
+        samples = []
+        for _ in range(n):
+            t0 = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - t0)
+        res = _stats(samples)
+        res["spawns_per_op"] = round((fake_adb.spawn_count(self.spawn_log) - spawns0) / n, 3)
+        res["server_requests_per_op"] = round(self.server.count() / n, 3)
+        res.update(extra)
+        self.record(name, res)
+        return res
+
+    def record(self, name, res):
+        self.results[name] = res
+        detail = "  ".join(f"{k}={v}" for k, v in res.items() if k != "n")
+        print(f"{name:<28} n={res.get('n', 0):<5} {detail}", flush=True)
+
+    def skip(self, name, reason):
+        self.record(name, {"n": 0, "skipped": reason})
+
+
+# ----------------------
+# Casos
+# ----------------------
+def bench_commands(b):
+    import adb_commands
+    import adb_protocol
+    import adb_session
+    serial = fake_adb.SERIAL
+
+    b.measure("exec_adb.devices", lambda: adb_commands.exec_adb(["devices"]), 200)
+    b.measure("protocol.shell_v2", lambda: adb_protocol.get_client().shell("echo hi", serial), 200)
+    if shutil.which("sh") is None:
+        b.skip("exec_adb.shell_session", "sin sh para el adb de mentira")
+    else:
+        b.measure("exec_adb.shell_session",
+                  lambda: adb_commands.exec_adb(["shell", "input", "keyevent", "3"], serial), 200, warmup=2)
+        b.measure("run_adb.keyevent", lambda: adb_commands.run_adb(["shell", "input", "keyevent", "3"], serial), 200)
+        taps = [("tap", 500, 1000)] * 10
+        b.measure("run_input.10_taps", lambda: adb_commands.run_input(taps, serial), 100, events_per_op=10)
+    b.measure("subprocess.adb_shell",
+              lambda: subprocess.run([b.adb, "-s", serial, "shell", "input", "keyevent", "3"],
+                                     capture_output=True), 30)
+    adb_session.close_all()
+
+
+def bench_screenshots(b):
+    import adb_screen
+    serial = fake_adb.SERIAL
+    buf = bytearray()
+    for name, raw in (("screenshot.png", False), ("screenshot.raw", True)):
+        res = b.measure(name, lambda raw=raw: adb_screen.capture(serial, raw=raw, adb=b.adb, buf=buf, cache=None), 40)
+        res["fps"] = round(1000 / res["mean_ms"], 2) if res.get("mean_ms") else None
+    res = b.measure("screenshot.subprocess",
+                    lambda: adb_screen._exec_out_subprocess("screencap -p", serial, b.adb), 10)
+    res["fps"] = round(1000 / res["mean_ms"], 2) if res.get("mean_ms") else None
+
+
+def bench_transfer(b):
+    import adb_protocol
+    client = adb_protocol.get_client()
+    size = (2 if b.quick else 16) * 1024 * 1024
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(os.urandom(size))
+        local = f.name
+    try:
+        res = b.measure("sync.push", lambda: client.push(local, "/sdcard/bench.bin", fake_adb.SERIAL), 5)
+        res["mb_per_s"] = round(size / 1048576 / (res["mean_ms"] / 1000), 1)
+        res = b.measure("sync.pull", lambda: client.pull("/sdcard/bench.bin", local, fake_adb.SERIAL), 5)
+        res["mb_per_s"] = round(size / 1048576 / (res["mean_ms"] / 1000), 1)
+    finally:
+        os.remove(local)
+
+
+def bench_discovery(b, workdir):
+    import ip_cache
+    import lan_discovery
+    closed = _free_port()   # nadie escucha: se mide el barrido, no las respuestas
+    res = b.measure("lan.scan_24", lambda: lan_discovery.scan_subnet("127.0.0.0/24", port=closed), 5, warmup=0)
+    res["hosts"] = 254
+    cache = ip_cache.IpCache(os.path.join(workdir, "ip_cache.json"))
+    cache.put("aa:bb:cc:dd:ee:ff", "127.0.0.1")
+    b.measure("ip_cache.hit", lambda: cache.resolve("aa:bb:cc:dd:ee:ff"), 2000)
+
+
+def bench_log_sink(b):
+    import log_sink
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        return b.skip("log_sink.text_log", f"sin Tk: {e}")
+    try:
+        root.withdraw()
+        text_log = tk.Text(root)
+        sink = log_sink.LogSink()
+        sink.widget = text_log
+        n = b.reps(20000)
+        t0 = time.perf_counter()
+        for i in range(n):
+            sink.emit(f"[{fake_adb.SERIAL}] línea de log número {i}", "info" if i % 10 else "error")
+        emitted = time.perf_counter() - t0
+        frames = []
+        while True:
+            f0 = time.perf_counter()
+            if not sink.flush():
+                break
+            root.update_idletasks()
+            frames.append(time.perf_counter() - f0)
+        total = time.perf_counter() - t0
+        res = _stats(frames, n)
+        res.update({"frames": len(frames), "emit_us": round(emitted / n * 1e6, 3),
+                    "msgs_per_s": round(n / total), "dropped": sink.dropped,
+                    "lines_kept": int(text_log.index("end-1c").split(".")[0])})
+        b.record("log_sink.text_log", res)
+    finally:
+        root.destroy()
+
+
+def bench_batch_vs_macro(b, workdir):
+    import adb_session
+    import macro_engine
+    serial = fake_adb.SERIAL
+    loops = b.reps(20)
+    per_loop = 4   # tap, shell, keyevent 24, keyevent 25 (igual en la macro y en el script)
+    macro = (f"repeat {loops}\n  tap 500 1000\n  shell settings get system screen_brightness\n"
+             f"  key 24 25\nend\n")
+    program = macro_engine.parse(macro)
+    b.measure("macro.tap_shell_key", lambda: macro_engine.run_macro(program, serial, b.adb), 3,
+              warmup=1, commands_per_op=loops * per_loop)
+    adb_session.close_all()
+    if sys.platform.startswith("win"):
+        script = os.path.join(workdir, "bench.bat")
+        lines = ["@echo off"] + [
+            f'call "{b.adb}" -s {serial} shell {c}' for _ in range(loops)
+            for c in ("input tap 500 1000", "settings get system screen_brightness",
+                      "input keyevent 24", "input keyevent 25")]
+        argv = ["cmd", "/c", script]
+    elif shutil.which("sh"):
+        script = os.path.join(workdir, "bench.sh")
+        lines = [f'"{b.adb}" -s {serial} shell {c}' for _ in range(loops)
+                 for c in ("input tap 500 1000", "settings get system screen_brightness",
+                           "input keyevent 24", "input keyevent 25")]
+        argv = ["sh", script]
+    else:
+        return b.skip("bat.tap_shell_key", "sin intérprete de scripts")
+    with open(script, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    b.measure("bat.tap_shell_key", lambda: subprocess.run(argv, capture_output=True), 3, warmup=0,
+              commands_per_op=loops * per_loop)
+
+
+CASES = ("commands", "screenshots", "transfer", "discovery", "log_sink", "batch")
+
+
+# ----------------------
+# Comparación entre versiones
+# ----------------------
+def compare(old, new):
+    """Líneas con el cambio de p50 (y throughput) de cada caso común."""
+    lines = []
+    for name, res in new["results"].items():
+        prev = old.get("results", {}).get(name)
+        if not prev or not prev.get("p50_ms") or not res.get("p50_ms"):
+            continue
+        ratio = res["p50_ms"] / prev["p50_ms"]
+        flag = "  REGRESIÓN" if ratio > REGRESSION else ""
+        spawns = ""
+        if prev.get("spawns_per_op") != res.get("spawns_per_op"):
+            spawns = f"  procesos {prev.get('spawns_per_op')} -> {res.get('spawns_per_op')}"
+        lines.append(f"{name:<28} p50 {prev['p50_ms']:>9.3f} -> {res['p50_ms']:>9.3f} ms "
+                     f"(x{ratio:.2f}){spawns}{flag}")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de ADB GUI contra un servidor adb falso.")
+    parser.add_argument("--out", default=os.path.join(ROOT, "bench_results.json"))
+    parser.add_argument("--compare", help="JSON de una ejecución anterior")
+    parser.add_argument("--quick", action="store_true", help="menos repeticiones")
+    parser.add_argument("--only", help=f"casos separados por comas ({','.join(CASES)})")
+    ns = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="adbgui-bench-")
+    server = fake_adb.FakeAdbServer().start()
+    os.environ["ANDROID_ADB_SERVER_PORT"] = str(server.port)
+    adb, spawn_log = fake_adb.make_stub(workdir)
+    sys.path.insert(0, ROOT)
+    import adb_commands
+    import adb_protocol
+    adb_protocol.get_client().port = server.port
+    adb_commands.ADB_PATH = adb
+
+    b = Bench(server, adb, spawn_log, quick=ns.quick)
+    only = set(ns.only.split(",")) if ns.only else set(CASES)
+    try:
+        if "commands" in only:
+            bench_commands(b)
+        if "screenshots" in only:
+            bench_screenshots(b)
+        if "transfer" in only:
+            bench_transfer(b)
+        if "discovery" in only:
+            bench_discovery(b, workdir)
+        if "log_sink" in only:
+            bench_log_sink(b)
+        if "batch" in only:
+            bench_batch_vs_macro(b, workdir)
+    finally:
+        server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    data = {"version": _version(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "quick": ns.quick, "results": b.results}
+    with open(ns.out, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados en {ns.out}")
+    if ns.compare:
+        with open(ns.compare, "r", encoding="utf-8") as f:
+            old = json.load(f)
+        print(f"\nComparación con {ns.compare} ({old.get('version')}):")
+        lines = compare(old, data)
+        print("\n".join(lines) if lines else "(sin casos en común)")
+        return 1 if any(line.endswith("REGRESIÓN") for line in lines) else 0
+    return 0
+
+
+def _version():
+    try:
+        return subprocess.run(["git", "-C", ROOT, "describe", "--always", "--dirty"],
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
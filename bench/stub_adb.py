@@ -0,0 +1,83 @@
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+# ----------------------
+# `adb` de mentira para los benchmarks (lo genera fake_adb.make_stub)
+# ----------------------
+# El "dispositivo" es el sh local con herramientas vacías en el PATH (ADB_STUB_TOOLS),
+# así que lo que se mide es el coste de arrancar procesos y de ida y vuelta, no lo que
+# tarda Android. Cada arranque añade una línea a ADB_STUB_LOG.
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import fake_adb  # noqa: E402
+
+
+def _log(argv):
+    log = os.environ.get("ADB_STUB_LOG")
+    if log:
+        with open(log, "a", encoding="utf-8") as f:
+            f.write(f"{time.time():.6f} {' '.join(argv)}\n")
+
+
+def _device_env():
+    env = dict(os.environ)
+    tools = env.get("ADB_STUB_TOOLS")
+    if tools:
+        env["PATH"] = tools + os.pathsep + env.get("PATH", "")
+    return env
+
+
+def _sh():
+    return shutil.which("sh") or "sh"
+
+
+def main(argv):
+    _log(argv)
+    if len(argv) >= 2 and argv[0] == "-s":
+        argv = argv[2:]
+    if not argv:
+        return 1
+    cmd, rest = argv[0], argv[1:]
+    if cmd == "version":
+        print("Android Debug Bridge version 1.0.41 (stub)")
+        return 0
+    if cmd == "start-server":
+        return 0
+    if cmd == "devices":
+        print(f"List of devices attached\n{fake_adb.SERIAL}\tdevice\n")
+        return 0
+    if cmd == "connect" and rest:
+        print(f"connected to {rest[0]}")
+        return 0
+    if cmd == "disconnect":
+        print(f"disconnected {' '.join(rest)}".strip())
+        return 0
+    if cmd == "shell":
+        sys.stdout.flush()
+        if not rest:   # interactivo: la sesión persistente de adb_session
+            return subprocess.call([_sh()], env=_device_env())
+        return subprocess.call([_sh(), "-c", " ".join(rest)], env=_device_env())
+    if cmd == "exec-out":
+        command = " ".join(rest).strip()
+        if command in ("screencap -p", "screencap"):
+            png, raw = fake_adb.synthetic_screen()
+            sys.stdout.buffer.write(png if command.endswith("-p") else raw)
+            return 0
+        return subprocess.call([_sh(), "-c", command], env=_device_env())
+    if cmd in ("push", "pull") and len(rest) >= 2:
+        print(f"{rest[-2]}: 1 file {cmd}ed. 0 bytes in 0.000s (0.0 MB/s)")
+        return 0
+    if cmd == "install":
+        print("Performing Streamed Install\nSuccess")
+        return 0
+    if cmd in ("reboot", "kill-server"):
+        return 0
+    print(f"adb: unknown command {cmd}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,196 @@
+import json
+import os
+import re
+import threading
+import time
+
+import adb_session
+
+# ----------------------
+# Caché de metadatos por dispositivo
+# ----------------------
+# getprop, lista de paquetes (pm list packages -f --show-versioncode) y tamaño/densidad
+# de pantalla, en memoria y en disco (device_cache.json), por serial.
+#   - cada sección se refresca por separado cuando caduca su TTL (o a petición);
+#   - el boot_id del kernel identifica el arranque: si cambia (reinicio) se tira todo
+#     lo del dispositivo. Se comprueba como mucho cada VALIDATE_INTERVAL s;
+#   - al reconectar un perfil se llama a invalidate(serial);
+#   - peek() devuelve lo que haya sin tocar adb (para la GUI en el hilo de Tk).
+
+SECTIONS = ("props", "packages", "screen")
+DEFAULT_TTL = {"props": 6 * 3600, "packages": 10 * 60, "screen": 6 * 3600}
+VALIDATE_INTERVAL = 30
+
+_PROP_RE = re.compile(r"^\[(.*?)\]: \[(.*)\]$")
+_PKG_RE = re.compile(r"^package:(.*)=(\S+?)(?: versionCode:(\d+))?$")
+_SIZE_RE = re.compile(r"(Physical|Override) size: (\d+x\d+)")
+_DENSITY_RE = re.compile(r"(Physical|Override) density: (\d+)")
+
+
+def parse_getprop(text):
+    props = {}
+    for line in text.splitlines():
+        m = _PROP_RE.match(line.strip())
+        if m:
+            props[m.group(1)] = m.group(2)
+    return props
+
+
+def parse_packages(text):
+    """{paquete: {"path": apk, "version": versionCode}} de `pm list packages -f --show-versioncode`."""
+    pkgs = {}
+    for line in text.splitlines():
+        m = _PKG_RE.match(line.strip())
+        if m:
+            pkgs[m.group(2)] = {"path": m.group(1), "version": int(m.group(3)) if m.group(3) else None}
+    return pkgs
+
+
+def parse_screen(size_text, density_text):
+    """{"size": "WxH", "density": dpi}; manda el valor Override si lo hay."""
+    sizes = dict(m.groups() for m in _SIZE_RE.finditer(size_text))
+    dens = dict(m.groups() for m in _DENSITY_RE.finditer(density_text))
+    size = sizes.get("Override") or sizes.get("Physical")
+    density = dens.get("Override") or dens.get("Physical")
+    return {"size": size, "density": int(density) if density else None}
+
+
+class DeviceCache:
+    def __init__(self, path, ttl=None, adb="adb"):
+        self.path = str(path)
+        self.ttl = dict(DEFAULT_TTL, **(ttl or {}))
+        self.adb = adb
+        self._entries = {}
+        self._checked = {}     # serial -> último time.monotonic() en que se comprobó el boot_id
+        self._lock = threading.Lock()
+        self.load()
+
+    # --- persistencia ---
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._entries = {k: v for k, v in data.items() if isinstance(v, dict)}
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def save(self):
+        with self._lock:
+            data = json.loads(json.dumps(self._entries))
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=4)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    # --- adb ---
+    def _shell(self, cmd, serial):
+        rc, out, err = adb_session.run_shell(cmd, serial or None, self.adb, timeout=adb_session.DEFAULT_TIMEOUT)
+        if rc != 0:
+            raise adb_session.AdbSessionError((err or out).strip() or f"'{cmd}' rc={rc}")
+        return out
+
+    def _fetch(self, section, serial):
+        if section == "props":
+            return parse_getprop(self._shell("getprop", serial))
+        if section == "packages":
+            return parse_packages(self._shell("pm list packages -f --show-versioncode", serial))
+        return parse_screen(self._shell("wm size", serial), self._shell("wm density", serial))
+
+    # --- validez ---
+    def invalidate(self, serial=None):
+        """Olvida todo lo de un dispositivo (reconexión, reinicio...)."""
+        key = serial or ""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._checked.pop(key, None)
+        self.save()
+
+    def validate(self, serial=None, force=False):
+        """Compara el boot_id con el guardado; si el dispositivo ha reiniciado se
+        descarta su entrada. Devuelve True si la entrada sigue valiendo."""
+        key = serial or ""
+        now = time.monotonic()
+        if not force and now - self._checked.get(key, -VALIDATE_INTERVAL) < VALIDATE_INTERVAL:
+            return True
+        boot_id = self._shell("cat /proc/sys/kernel/random/boot_id", serial).strip()
+        with self._lock:
+            self._checked[key] = now
+            entry = self._entries.get(key)
+            if entry is not None and entry.get("boot_id") == boot_id:
+                return True
+            self._entries[key] = {"boot_id": boot_id, "ts": {}}
+        return entry is None
+
+    # --- consulta ---
+    def peek(self, serial=None, section=None):
+        """Lo que haya en caché, sin llamar a adb (None si no hay nada)."""
+        with self._lock:
+            entry = self._entries.get(serial or "")
+            if entry is None:
+                return None
+            return entry.get(section) if section else dict(entry)
+
+    def get(self, section, serial=None, refresh=False):
+        """Sección cacheada; si falta, ha caducado o refresh=True se vuelve a leer solo esa."""
+        if section not in SECTIONS:
+            raise ValueError(f"Sección desconocida: {section}")
+        key = serial or ""
+        self.validate(serial)
+        with self._lock:
+            entry = self._entries.setdefault(key, {"ts": {}})
+            ts = entry.setdefault("ts", {}).get(section, 0)
+            if not refresh and section in entry and time.time() - ts < self.ttl[section]:
+                return entry[section]
+        value = self._fetch(section, serial)
+        with self._lock:
+            entry = self._entries.setdefault(key, {"ts": {}})
+            entry[section] = value
+            entry.setdefault("ts", {})[section] = time.time()
+        self.save()
+        return value
+
+    def props(self, serial=None, refresh=False):
+        return self.get("props", serial, refresh)
+
+    def packages(self, serial=None, refresh=False):
+        return self.get("packages", serial, refresh)
+
+    def screen(self, serial=None, refresh=False):
+        return self.get("screen", serial, refresh)
+
+    def refresh_packages(self, serial=None):
+        """Vuelve a leer la lista de paquetes y devuelve (añadidos, quitados, actualizados)."""
+        old = self.peek(serial, "packages") or {}
+        new = self.packages(serial, refresh=True)
+        added = sorted(set(new) - set(old))
+        removed = sorted(set(old) - set(new))
+        updated = sorted(p for p in set(new) & set(old) if new[p].get("version") != old[p].get("version"))
+        return added, removed, updated
+
+    def forget_package(self, package, serial=None):
+        """Quita un paquete de la caché (tras desinstalarlo) sin releer la lista."""
+        with self._lock:
+            pkgs = (self._entries.get(serial or "") or {}).get("packages")
+            if pkgs is not None:
+                pkgs.pop(package, None)
+        self.save()
+
+    def summary(self, serial=None):
+        """Resumen legible (modelo, Android, pantalla, nº de paquetes) solo con lo cacheado."""
+        entry = self.peek(serial)
+        if not entry:
+            return ""
+        props = entry.get("props") or {}
+        screen = entry.get("screen") or {}
+        lines = []
+        if props:
+            lines.append(f"Modelo: {props.get('ro.product.manufacturer', '')} {props.get('ro.product.model', '')}".rstrip())
+            lines.append(f"Android: {props.get('ro.build.version.release', '?')} (SDK {props.get('ro.build.version.sdk', '?')})")
+        if screen:
+            lines.append(f"Pantalla: {screen.get('size') or '?'} @ {screen.get('density') or '?'} dpi")
+        if entry.get("packages") is not None:
+            lines.append(f"Paquetes: {len(entry['packages'])}")
+        return "\n".join(lines)
@@ -0,0 +1,236 @@
+import threading
+import time
+
+import adb_protocol
+import adb_session
+
+# ----------------------
+# Monitor de conexiones
+# ----------------------
+# Un hilo escucha host:track-devices (el servidor adb avisa de cada cambio, sin
+# sondear); si no se puede, se cae a pedir `host:devices` cada POLL_INTERVAL s.
+# Otro hilo, cada TICK:
+#   - mide la latencia de los dispositivos online con un `true` por una sesión
+#     persistente propia del monitor (ida y vuelta real, sin arrancar procesos, y
+#     sin esperar tras los comandos del usuario en la sesión compartida), cada
+#     PING_INTERVAL s;
+#   - reconecta en segundo plano los que se quieren conectados y no están online
+#     (offline, desaparecidos...), con espera exponencial entre intentos. Tras
+#     RESOLVE_AFTER fallos seguidos se vuelve a resolver la IP (puede haber cambiado).
+# Estados: "online", "offline", "unauthorized", "disconnected" (y los que dé adb tal cual).
+
+POLL_INTERVAL = 5
+PING_INTERVAL = 10
+PING_TIMEOUT = 3
+TICK = 1.0
+BACKOFF_BASE = 2
+BACKOFF_MAX = 60
+RESOLVE_AFTER = 3
+
+_STATE_NAMES = {"device": "online"}
+
+
+class _Target:
+    __slots__ = ("name", "serial", "state", "latency", "wanted", "failures", "next_try", "next_ping")
+
+    def __init__(self, name, serial):
+        self.name = name
+        self.serial = serial
+        self.state = "disconnected"
+        self.latency = None     # ms
+        self.wanted = False     # reconectar si se cae
+        self.failures = 0
+        self.next_try = 0.0
+        self.next_ping = 0.0
+
+
+class DeviceMonitor:
+    def __init__(self, on_change=None, resolve=None, adb="adb"):
+        """on_change(nombre, estado, latencia_ms) al cambiar algo (desde un hilo del monitor).
+        resolve(nombre) -> serial nuevo, para cuando la IP guardada deja de valer."""
+        self.on_change = on_change
+        self.resolve = resolve
+        self.adb = adb
+        self._targets = {}       # nombre -> _Target
+        self._states = {}        # serial -> estado según el servidor adb
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._tracker = None
+        self._threads = []
+        self._ping_sessions = {}     # serial -> ShellSession (solo la usa el hilo de ticks)
+
+    # --- perfiles vigilados ---
+    def set_targets(self, serials):
+        """{nombre: serial o None}. Conserva el estado de los que ya se vigilaban."""
+        with self._lock:
+            old = self._targets
+            self._targets = {}
+            for name, serial in serials.items():
+                t = old.get(name)
+                if t is None or t.serial != serial:
+                    t = _Target(name, serial)
+                    t.state = self._state_of(serial)
+                self._targets[name] = t
+
+    def track(self, name, serial):
+        """Añade o actualiza un perfil (p.ej. cuando se acaba de resolver su IP)."""
+        with self._lock:
+            t = self._targets.get(name)
+            if t is None:
+                t = self._targets[name] = _Target(name, serial)
+            elif t.serial != serial:
+                t.serial, t.latency = serial, None
+            t.state = self._state_of(serial)
+
+    def want(self, name, wanted=True):
+        """Marca un perfil para mantenerlo conectado (connect) o dejarlo estar (disconnect)."""
+        with self._lock:
+            t = self._targets.get(name)
+            if t:
+                t.wanted = wanted
+                t.failures, t.next_try = 0, 0.0
+
+    def unwant_all(self):
+        with self._lock:
+            for t in self._targets.values():
+                t.wanted = False
+
+    def status(self, name):
+        """(estado, latencia_ms) de un perfil."""
+        with self._lock:
+            t = self._targets.get(name)
+            return (t.state, t.latency) if t else ("disconnected", None)
+
+    def is_down(self, serial):
+        """True si el serial es de un perfil que se quiere conectado y ahora no está online:
+        los comandos pueden fallar al momento en vez de esperar el timeout de adb."""
+        with self._lock:
+            return any(t.serial == serial and t.wanted and t.state != "online" for t in self._targets.values())
+
+    def _state_of(self, serial):
+        if not serial:
+            return "disconnected"
+        raw = self._states.get(serial)
+        return _STATE_NAMES.get(raw, raw) if raw else "disconnected"
+
+    def _notify(self, changed):
+        if self.on_change:
+            for t in changed:
+                self.on_change(t.name, t.state, t.latency)
+
+    def _apply_states(self, states):
+        changed = []
+        with self._lock:
+            self._states = states
+            for t in self._targets.values():
+                state = self._state_of(t.serial)
+                if state != t.state:
+                    t.state = state
+                    if state == "online":
+                        t.wanted = True   # lo que llega a estar online se mantiene
+                        t.failures, t.next_try, t.next_ping = 0, 0.0, 0.0
+                    else:
+                        t.latency = None
+                    changed.append(t)
+        self._notify(changed)
+
+    # --- hilos ---
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        for fn, name in ((self._track_loop, "device-track"), (self._tick_loop, "device-health")):
+            th = threading.Thread(target=fn, name=name, daemon=True)
+            th.start()
+            self._threads.append(th)
+
+    def stop(self):
+        self._stop.set()
+        sock = self._tracker
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._threads = []
+
+    def _track_loop(self):
+        client = adb_protocol.get_client()
+        delay = 1
+        while not self._stop.is_set():
+            try:
+                self._tracker = client.track_devices()
+                delay = 1
+                while not self._stop.is_set():
+                    self._apply_states(client.read_devices_update(self._tracker))
+            except Exception:
+                # servidor caído o sin track-devices: sondeo hasta que vuelva
+                try:
+                    self._apply_states({s: st for s, st, _ in client.devices()})
+                except Exception:
+                    pass
+                self._stop.wait(min(POLL_INTERVAL, delay))
+                delay = min(POLL_INTERVAL, delay * 2)
+            finally:
+                if self._tracker is not None:
+                    self._tracker.close()
+                    self._tracker = None
+
+    def _tick_loop(self):
+        while not self._stop.wait(TICK):
+            now = time.monotonic()
+            with self._lock:
+                targets = list(self._targets.values())
+            self._prune_ping_sessions({t.serial for t in targets if t.state == "online"})
+            for t in targets:
+                if self._stop.is_set():
+                    break
+                try:
+                    if t.state == "online" and now >= t.next_ping:
+                        self._ping(t)
+                    elif t.state != "online" and t.wanted and t.serial and now >= t.next_try:
+                        self._reconnect(t)
+                except Exception:
+                    pass
+        self._prune_ping_sessions(())
+
+    def _prune_ping_sessions(self, keep):
+        for serial in [s for s in self._ping_sessions if s not in keep]:
+            self._ping_sessions.pop(serial).close()
+
+    def _ping(self, t):
+        t.next_ping = time.monotonic() + PING_INTERVAL
+        session = self._ping_sessions.get(t.serial)
+        if session is None:
+            session = self._ping_sessions[t.serial] = adb_session.ShellSession(t.serial, self.adb)
+        t0 = time.perf_counter()
+        try:
+            rc, _, _ = session.run("true", timeout=PING_TIMEOUT)
+        except adb_session.AdbSessionError:
+            rc = -1
+        latency = (time.perf_counter() - t0) * 1000 if rc == 0 else None
+        with self._lock:
+            t.latency = latency
+        self._notify([t])
+
+    def _reconnect(self, t):
+        client = adb_protocol.get_client()
+        if t.failures >= RESOLVE_AFTER and self.resolve:
+            serial = self.resolve(t.name)
+            if serial and serial != t.serial:
+                with self._lock:
+                    t.serial = serial
+        try:
+            if t.state == "offline":
+                client.disconnect(t.serial)   # transporte colgado: hay que tirarlo antes
+            msg = client.connect(t.serial)
+        except (OSError, adb_protocol.AdbProtocolError) as e:
+            msg = str(e)
+        ok = "connected to" in msg and "cannot" not in msg and "failed" not in msg
+        with self._lock:
+            if ok:
+                t.failures = 0
+            else:
+                t.failures += 1
+            t.next_try = time.monotonic() + min(BACKOFF_MAX, BACKOFF_BASE ** t.failures)
+        # el cambio de estado llega por track-devices
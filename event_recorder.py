@@ -0,0 +1,258 @@
+import json
+import os
+import re
+import shlex
+import socket
+import struct
+import subprocess
+import threading
+import time
+
+import adb_protocol
+import adb_session
+import fanout
+
+# ----------------------
+# Grabación y reproducción de eventos táctiles/teclas (getevent -> sendevent)
+# ----------------------
+# Grabar: `getevent -t` en streaming (socket exec: del servidor adb o, si no hay,
+# adb exec-out). Se usa la salida numérica y no la de -l: sendevent y el kernel
+# necesitan los números, y las etiquetas no tienen vuelta atrás fiable. Cada evento
+# se guarda como [t_us, nodo, tipo, código, valor] con t relativo al primero, y
+# aparte el nombre de cada nodo (/dev/input/eventN) para reproducir en otros
+# dispositivos aunque la numeración cambie.
+#
+# Reproducir (modo "binary"): una conexión exec:`cat > /dev/input/eventN` por nodo y
+# se escribe cada trama (eventos hasta el SYN_REPORT) como struct input_event a su
+# hora, medida con perf_counter en el PC: un único proceso en el dispositivo y nada
+# que arrancar por evento. Modo "sendevent": un solo script de shell con sendevent y
+# sleep, para cuando no hay servidor adb al que abrir sockets.
+
+EXT = ".events"
+EV_SYN, SYN_REPORT = 0, 0
+STARTUP_DELAY = 0.3   # s de margen para arrancar todos los dispositivos a la vez
+
+_LINE_RE = re.compile(r"^\[\s*(\d+)\.(\d+)\]\s+(/dev/input/event\d+):\s+([0-9a-f]{4})\s+([0-9a-f]{4})\s+([0-9a-f]{8})\s*$")
+
+
+def parse_getevent_line(line):
+    """(t_us, nodo, tipo, código, valor) de una línea de `getevent -t`, o None."""
+    m = _LINE_RE.match(line.strip())
+    if not m:
+        return None
+    sec, frac, node, typ, code, value = m.groups()
+    t_us = int(sec) * 1_000_000 + int(frac.ljust(6, "0")[:6])
+    v = int(value, 16)
+    if v & 0x80000000:
+        v -= 1 << 32   # p.ej. ABS_MT_TRACKING_ID = -1
+    return t_us, node, int(typ, 16), int(code, 16), v
+
+
+def input_devices(serial=None, adb="adb"):
+    """{"/dev/input/eventN": nombre} a partir de /proc/bus/input/devices."""
+    _, out, _ = adb_session.run_shell("cat /proc/bus/input/devices", serial, adb,
+                                     timeout=adb_session.DEFAULT_TIMEOUT)
+    devices, name = {}, None
+    for line in out.splitlines():
+        if line.startswith("N: Name="):
+            name = line.split("=", 1)[1].strip().strip('"')
+        elif line.startswith("H: Handlers=") and name is not None:
+            for h in line.split("=", 1)[1].split():
+                if h.startswith("event"):
+                    devices[f"/dev/input/{h}"] = name
+    return devices
+
+
+# --- grabación ---
+class Recording:
+    def __init__(self, events=None, devices=None, serial=None):
+        self.events = events or []     # [[t_us, nodo, tipo, código, valor], ...]
+        self.devices = devices or {}   # nodo -> nombre
+        self.serial = serial
+
+    @property
+    def duration(self):
+        return self.events[-1][0] / 1_000_000 if self.events else 0.0
+
+    def save(self, path):
+        data = {"version": 1, "serial": self.serial, "devices": self.devices, "events": self.events}
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("events", []), data.get("devices", {}), data.get("serial"))
+
+    def frames(self):
+        """Agrupa los eventos en tramas [(t_us, nodo, [(tipo, código, valor), ...])] que
+        terminan en SYN_REPORT: lo que el kernel entrega de golpe."""
+        frames, current = [], {}
+        for t, node, typ, code, value in self.events:
+            start, evs = current.setdefault(node, (t, []))
+            evs.append((typ, code, value))
+            if typ == EV_SYN and code == SYN_REPORT:
+                frames.append((start, node, evs))
+                del current[node]
+        for node, (start, evs) in current.items():
+            frames.append((start, node, evs))
+        frames.sort(key=lambda f: f[0])
+        return frames
+
+
+class EventRecorder:
+    def __init__(self, serial=None, adb="adb"):
+        self.serial = serial
+        self.adb = adb
+        self.recording = Recording(serial=serial)
+        self.error = None
+        self._close = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _open(self):
+        try:
+            sock = adb_protocol.get_client().open_service("exec:getevent -t", self.serial)
+            sock.settimeout(None)
+            stream = sock.makefile("rb")
+
+            def close():
+                # close() no despierta un recv bloqueado ni suelta el fd mientras
+                # el makefile siga abierto: shutdown corta la conexión de verdad
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                stream.close()
+                sock.close()
+            return stream, close
+        except ConnectionRefusedError:
+            argv = [self.adb] + (["-s", self.serial] if self.serial else []) + ["exec-out", "getevent -t"]
+            proc = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            return proc.stdout, proc.kill
+
+    def start(self):
+        self.recording.devices = input_devices(self.serial, self.adb)
+        stream, self._close = self._open()
+        self._thread = threading.Thread(target=self._loop, args=(stream,), daemon=True)
+        self._thread.start()
+
+    def _loop(self, stream):
+        base = None
+        events = self.recording.events
+        try:
+            for raw in stream:
+                if self._stop.is_set():
+                    break
+                ev = parse_getevent_line(raw.decode("ascii", "replace"))
+                if ev is None:
+                    continue   # cabeceras "add device ..." / "name: ..."
+                if base is None:
+                    base = ev[0]
+                events.append([ev[0] - base, *ev[1:]])
+        except Exception as e:
+            if not self._stop.is_set():
+                self.error = e
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self, timeout=2):
+        """Cierra el flujo (getevent muere con la conexión) y, con el hilo lector ya
+        terminado, devuelve una copia de la grabación."""
+        self._stop.set()
+        if self._close:
+            try:
+                self._close()
+            except OSError:
+                pass
+        if self._thread:
+            self._thread.join(timeout)
+        rec = self.recording
+        return Recording(list(rec.events), dict(rec.devices), rec.serial)
+
+
+# --- reproducción ---
+def event_size(serial=None, adb="adb"):
+    """Tamaño de struct input_event: 24 bytes en 64 bits, 16 en 32 bits."""
+    _, out, _ = adb_session.run_shell("getprop ro.product.cpu.abi", serial, adb, timeout=adb_session.DEFAULT_TIMEOUT)
+    return 24 if "64" in out else 16
+
+
+def map_nodes(recording, serial=None, adb="adb"):
+    """nodo grabado -> nodo en el dispositivo destino, emparejando por nombre."""
+    target = input_devices(serial, adb)
+    by_name = {name: node for node, name in target.items()}
+    return {node: by_name.get(name, node) for node, name in recording.devices.items()}
+
+
+def _pack(evs, size):
+    fmt = "<qqHHi" if size == 24 else "<llHHi"
+    return b"".join(struct.pack(fmt, 0, 0, typ, code, value) for typ, code, value in evs)
+
+
+def build_sendevent_script(recording, speed=1.0, nodes=None):
+    """Un script de shell: sendevent por evento y sleep entre tramas."""
+    nodes = nodes or {}
+    parts, last = [], 0
+    for t, node, evs in recording.frames():
+        delay = (t - last) / 1_000_000 / speed
+        if delay >= 0.001:
+            parts.append(f"sleep {delay:.3f}")
+        last = t
+        dev = shlex.quote(nodes.get(node, node))
+        parts += [f"sendevent {dev} {typ} {code} {value}" for typ, code, value in evs]
+    return "\n".join(parts)
+
+
+def replay(recording, serial=None, adb="adb", speed=1.0, mode="binary", start_at=None, cancel=None):
+    """Reproduce la grabación en un dispositivo. start_at (perf_counter) permite arrancar
+    varios dispositivos a la vez. Devuelve el desfase máximo en ms respecto a la grabación."""
+    speed = max(0.01, float(speed))
+    nodes = map_nodes(recording, serial, adb)
+    if mode == "sendevent":
+        script = build_sendevent_script(recording, speed, nodes)
+        if start_at is not None:
+            time.sleep(max(0.0, start_at - time.perf_counter()))
+        timeout = adb_session.DEFAULT_TIMEOUT + recording.duration / speed
+        rc, _, err = adb_session.run_shell(script, serial, adb, timeout=timeout)
+        if rc != 0:
+            raise RuntimeError(err.strip() or f"sendevent rc={rc}")
+        return None
+
+    size = event_size(serial, adb)
+    client = adb_protocol.get_client()
+    socks = {}
+    try:
+        for node in {nodes.get(n, n) for _, n, _ in recording.frames()}:
+            socks[node] = client.open_service(f"exec:cat > {shlex.quote(node)}", serial)
+        frames = [(t / 1_000_000 / speed, socks[nodes.get(n, n)], _pack(evs, size))
+                  for t, n, evs in recording.frames()]
+        t0 = start_at if start_at is not None else time.perf_counter()
+        worst = 0.0
+        for offset, sock, data in frames:
+            wait = t0 + offset - time.perf_counter()
+            if wait > 0 and cancel is not None:
+                if cancel.wait(wait):
+                    break
+            elif wait > 0:
+                time.sleep(wait)
+            elif cancel is not None and cancel.is_set():
+                break
+            sock.sendall(data)
+            worst = max(worst, time.perf_counter() - t0 - offset)
+        return worst * 1000
+    finally:
+        for sock in socks.values():
+            sock.close()
+
+
+def replay_many(recording, serials, adb="adb", speed=1.0, mode="binary", cancel=None, on_result=None):
+    """La misma grabación en varios dispositivos a la vez, con arranque común."""
+    start_at = time.perf_counter() + STARTUP_DELAY + 0.05 * len(serials)
+    return fanout.run_fanout(
+        serials, lambda s: replay(recording, s, adb, speed, mode, start_at, cancel),
+        max_workers=max(1, len(serials)), on_result=on_result)
@@ -0,0 +1,71 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# ----------------------
+# Fan-out: la misma acción en N dispositivos a la vez
+# ----------------------
+# Pool de hilos acotado; cada resultado lleva su tiempo para poder sacar
+# un resumen con los más lentos y los que fallaron.
+
+DEFAULT_WORKERS = 8
+
+
+class FanoutResult:
+    __slots__ = ("target", "ok", "value", "error", "elapsed")
+
+    def __init__(self, target, ok, value=None, error=None, elapsed=0.0):
+        self.target = target
+        self.ok = ok
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
+
+
+def _is_ok(value):
+    # convención de exec_adb: 0 = bien, otro int = código de error; None = sin código
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return value == 0
+    return True
+
+
+def run_fanout(targets, fn, max_workers=DEFAULT_WORKERS, on_result=None):
+    """Ejecuta fn(target) para cada target en paralelo (máx. max_workers a la vez).
+    on_result(FanoutResult) se llama según van terminando. Devuelve la lista de resultados
+    en el orden de `targets`."""
+    targets = list(targets)
+    if not targets:
+        return []
+
+    def timed(target):
+        t0 = time.perf_counter()
+        try:
+            value = fn(target)
+            return FanoutResult(target, _is_ok(value), value=value, elapsed=time.perf_counter() - t0)
+        except Exception as e:
+            return FanoutResult(target, False, error=e, elapsed=time.perf_counter() - t0)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(targets)))) as pool:
+        futures = {pool.submit(timed, t): i for i, t in enumerate(targets)}
+        for fut in as_completed(futures):
+            res = fut.result()
+            results[futures[fut]] = res
+            if on_result:
+                on_result(res)
+    return [results[i] for i in range(len(targets))]
+
+
+def summarize(results, slowest=3):
+    """Texto de resumen: totales, fallidos y los más lentos."""
+    if not results:
+        return "Sin dispositivos"
+    failed = [r for r in results if not r.ok]
+    total = max(r.elapsed for r in results)
+    lines = [f"{len(results) - len(failed)}/{len(results)} OK en {total:.2f} s"]
+    if failed:
+        lines.append("Fallidos: " + ", ".join(str(r.target) for r in failed))
+    ranked = sorted(results, key=lambda r: r.elapsed, reverse=True)[:slowest]
+    lines.append("Más lentos: " + ", ".join(f"{r.target} ({r.elapsed:.2f} s)" for r in ranked))
+    return "\n".join(lines)
@@ -0,0 +1,213 @@
+import hashlib
+import os
+import posixpath
+import shlex
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import adb_protocol
+import adb_session
+
+# ----------------------
+# Sincronización de carpetas PC <-> dispositivo
+# ----------------------
+# Se listan los dos lados (en el dispositivo con un solo `find ... -exec stat`),
+# se comparan por tamaño + mtime (o por md5, calculado en el propio dispositivo
+# con md5sum) y solo se transfieren los ficheros distintos, repartidos entre
+# varias conexiones sync: en paralelo.
+# El push manda el mtime local en el DONE y el pull lo aplica con os.utime, así
+# que tras una sincronización los dos lados quedan "iguales" para la siguiente.
+# No se borra nada en el destino.
+
+DEFAULT_WORKERS = 4
+COMPARE_MODES = ("mtime", "hash")
+HASH_BATCH = 200            # ficheros por llamada a md5sum
+PROGRESS_INTERVAL = 1.0     # s entre avisos de progreso
+LIST_TIMEOUT = 120
+_NO_DIR_RC = 44             # rc del listado remoto si la carpeta no existe
+
+
+class FileSyncError(Exception):
+    pass
+
+
+class SyncResult:
+    __slots__ = ("direction", "total", "copied", "skipped", "bytes", "failed", "elapsed")
+
+    def __init__(self, direction):
+        self.direction = direction
+        self.total = 0
+        self.copied = 0
+        self.skipped = 0
+        self.bytes = 0
+        self.failed = []     # [(ruta relativa, error)]
+        self.elapsed = 0.0
+
+    def throughput(self):
+        """MB/s agregados de toda la transferencia."""
+        return self.bytes / (1024 * 1024) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self):
+        return (f"sync {self.direction}: {self.copied}/{self.total} copiados, {self.skipped} sin cambios, "
+                f"{len(self.failed)} errores — {self.bytes / (1024 * 1024):.1f} MB en {self.elapsed:.1f} s "
+                f"({self.throughput():.1f} MB/s)")
+
+
+# --- listados ---
+def list_local(root):
+    """{ruta relativa (posix): (tamaño, mtime entero)} de todos los ficheros bajo root."""
+    out = {}
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(dirpath, name)
+            st = os.stat(path)
+            rel = os.path.relpath(path, root).replace(os.sep, "/")
+            out[rel] = (st.st_size, int(st.st_mtime))
+    return out
+
+
+def list_remote(root, serial=None, adb="adb"):
+    """Igual que list_local pero en el dispositivo; {} si la carpeta no existe.
+    Cualquier otro fallo lanza FileSyncError: un listado vacío o a medias haría
+    copiar otra vez todo lo que falta en él."""
+    q = shlex.quote(root)
+    rc, out, err = adb_session.run_shell(
+        f"if [ -d {q} ]; then cd {q} && find . -type f -exec stat -c '%s %Y %n' {{}} +; "
+        f"else (exit {_NO_DIR_RC}); fi",
+        serial, adb, timeout=LIST_TIMEOUT)
+    if rc == _NO_DIR_RC:
+        return {}
+    if rc != 0:
+        raise FileSyncError(f"No se pudo listar {root} en el dispositivo: {err.strip() or f'rc={rc}'}")
+    files = {}
+    for line in out.splitlines():
+        parts = line.split(" ", 2)
+        if len(parts) == 3 and parts[0].isdigit() and parts[1].isdigit():
+            rel = parts[2][2:] if parts[2].startswith("./") else parts[2]
+            files[rel] = (int(parts[0]), int(parts[1]))
+    return files
+
+
+# --- hashes ---
+def local_md5(path):
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(adb_protocol.SYNC_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def remote_md5(root, rels, serial=None, adb="adb"):
+    """{ruta relativa: md5} calculados en el dispositivo, por lotes de HASH_BATCH."""
+    hashes = {}
+    for i in range(0, len(rels), HASH_BATCH):
+        batch = rels[i:i + HASH_BATCH]
+        cmd = f"cd {shlex.quote(root)} && md5sum " + " ".join(shlex.quote(r) for r in batch)
+        _, out, _ = adb_session.run_shell(cmd, serial, adb, timeout=LIST_TIMEOUT)
+        for line in out.splitlines():
+            digest, _, rel = line.partition("  ")
+            if rel:
+                hashes[rel[2:] if rel.startswith("./") else rel] = digest.strip()
+    return hashes
+
+
+# --- plan ---
+def plan(src, dst, local_root, remote_root, serial=None, adb="adb", compare="mtime"):
+    """Lista de rutas relativas a copiar de src a dst ({rel: (tamaño, mtime)} cada uno)."""
+    pending = [rel for rel, (size, mtime) in src.items()
+               if rel not in dst or dst[rel][0] != size or (compare == "mtime" and dst[rel][1] != mtime)]
+    if compare != "hash":
+        return sorted(pending)
+    # mismo tamaño: decide el contenido
+    same_size = [rel for rel in src if rel in dst and dst[rel][0] == src[rel][0]]
+    remote = remote_md5(remote_root, same_size, serial, adb) if same_size else {}
+    for rel in same_size:
+        if remote.get(rel) != local_md5(os.path.join(local_root, *rel.split("/"))):
+            pending.append(rel)
+    return sorted(pending)
+
+
+# --- transferencia ---
+def _adb_cli(adb, serial, args):
+    argv = [adb] + (["-s", serial] if serial else []) + args
+    res = subprocess.run(argv, capture_output=True, text=True, encoding="utf-8", errors="replace")
+    if res.returncode != 0:
+        raise RuntimeError((res.stderr or res.stdout).strip() or f"adb {args[0]} rc={res.returncode}")
+
+
+def _push_one(local, remote, serial, adb):
+    try:
+        return adb_protocol.get_client().push(local, remote, serial)
+    except ConnectionRefusedError:
+        _adb_cli(adb, serial, ["push", local, remote])
+        return os.path.getsize(local)
+
+
+def _pull_one(remote, local, mtime, serial, adb):
+    os.makedirs(os.path.dirname(local), exist_ok=True)
+    try:
+        n = adb_protocol.get_client().pull(remote, local, serial)
+    except ConnectionRefusedError:
+        _adb_cli(adb, serial, ["pull", remote, local])
+        n = os.path.getsize(local)
+    os.utime(local, (mtime, mtime))
+    return n
+
+
+def _run(result, rels, transfer, workers, on_progress):
+    lock = threading.Lock()
+    t0 = time.perf_counter()
+    last = [t0]
+
+    def one(rel):
+        n = transfer(rel)
+        with lock:
+            result.copied += 1
+            result.bytes += n
+            now = time.perf_counter()
+            if on_progress and now - last[0] >= PROGRESS_INTERVAL:
+                last[0] = now
+                on_progress(result.copied, len(rels), result.bytes, now - t0)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(rels) or 1))) as pool:
+        futures = {pool.submit(one, rel): rel for rel in rels}
+        for fut in as_completed(futures):
+            if fut.exception() is not None:
+                result.failed.append((futures[fut], fut.exception()))
+    result.elapsed = time.perf_counter() - t0
+    if on_progress and rels:
+        on_progress(result.copied, len(rels), result.bytes, result.elapsed)
+    return result
+
+
+def sync_push(local_root, remote_root, serial=None, adb="adb", compare="mtime",
+              workers=DEFAULT_WORKERS, on_progress=None):
+    """Copia al dispositivo los ficheros de local_root que falten o hayan cambiado.
+    on_progress(copiados, a_copiar, bytes, segundos) se llama como mucho cada PROGRESS_INTERVAL."""
+    remote_root = remote_root.rstrip("/") or "/"
+    src = list_local(local_root)
+    rels = plan(src, list_remote(remote_root, serial, adb), local_root, remote_root, serial, adb, compare)
+    result = SyncResult("push")
+    result.total, result.skipped = len(src), len(src) - len(rels)
+
+    def transfer(rel):
+        return _push_one(os.path.join(local_root, *rel.split("/")), posixpath.join(remote_root, rel), serial, adb)
+    return _run(result, rels, transfer, workers, on_progress)
+
+
+def sync_pull(remote_root, local_root, serial=None, adb="adb", compare="mtime",
+              workers=DEFAULT_WORKERS, on_progress=None):
+    """Copia al PC los ficheros de remote_root que falten o hayan cambiado en local_root."""
+    remote_root = remote_root.rstrip("/") or "/"
+    src = list_remote(remote_root, serial, adb)
+    dst = list_local(local_root) if os.path.isdir(local_root) else {}
+    rels = plan(src, dst, local_root, remote_root, serial, adb, compare)
+    result = SyncResult("pull")
+    result.total, result.skipped = len(src), len(src) - len(rels)
+
+    def transfer(rel):
+        return _pull_one(posixpath.join(remote_root, rel), os.path.join(local_root, *rel.split("/")),
+                         src[rel][1], serial, adb)
+    return _run(result, rels, transfer, workers, on_progress)
@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+
+import lan_discovery
+
+# ----------------------
+# Caché persistente MAC -> IP con TTL
+# ----------------------
+# Evita barrer la subred entera cada vez que se conecta/desconecta un perfil sin IP fija.
+#   - entrada fresca           -> se devuelve tal cual
+#   - entrada caducada         -> revalidación barata: un sondeo a la IP guardada y
+#                                 comprobar en la tabla ARP que la MAC sigue siendo esa
+#   - fallo de revalidación    -> barrido completo (y se cachean todas las MAC vistas)
+# Un hilo en segundo plano revalida antes de que caduquen SOLO las MAC vigiladas (las
+# de los perfiles, ver set_watched), todas con un sondeo y una lectura de la tabla ARP.
+# Las que fallan esperan cada vez más (hasta MAX_BACKOFF) antes del siguiente intento;
+# las MAC vistas en un barrido que no son de ningún perfil se olvidan al caducar.
+
+DEFAULT_TTL = 15 * 60
+REFRESH_AHEAD = 0.8  # revalidar en segundo plano al 80% del TTL
+MAX_BACKOFF = 60 * 60
+
+
+class IpCache:
+    def __init__(self, path, ttl=DEFAULT_TTL):
+        self.path = str(path)
+        self.ttl = ttl
+        self._entries = {}
+        self._watched = set()
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.load()
+
+    # --- persistencia ---
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._entries = {lan_discovery.normalize_mac(k): v for k, v in data.items()
+                             if isinstance(v, dict) and v.get("ip")}
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def save(self):
+        with self._lock:
+            data = dict(self._entries)
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=4)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    # --- consulta ---
+    def get(self, mac, allow_stale=False):
+        """IP cacheada si existe y no ha caducado (o aunque haya caducado con allow_stale)."""
+        with self._lock:
+            entry = self._entries.get(lan_discovery.normalize_mac(mac))
+        if not entry:
+            return None
+        if allow_stale or time.time() - entry["ts"] < self.ttl:
+            return entry["ip"]
+        return None
+
+    def put(self, mac, ip, save=True):
+        with self._lock:
+            self._entries[lan_discovery.normalize_mac(mac)] = {"ip": ip, "ts": time.time()}
+        if save:
+            self.save()
+
+    def set_watched(self, macs):
+        """MAC que se revalidan en segundo plano (las de los perfiles)."""
+        watched = {lan_discovery.normalize_mac(m) for m in macs if m}
+        with self._lock:
+            self._watched = watched
+
+    def _failed(self, mac, now=None):
+        """Otra revalidación fallida: la siguiente se aplaza el doble (hasta MAX_BACKOFF)."""
+        now = now or time.time()
+        with self._lock:
+            entry = self._entries.get(mac)
+            if entry is None:
+                return
+            entry["fails"] = entry.get("fails", 0) + 1
+            base = self.ttl * (1 - REFRESH_AHEAD) / 2
+            entry["retry_at"] = now + min(MAX_BACKOFF, base * 2 ** entry["fails"])
+
+    def invalidate(self, mac):
+        with self._lock:
+            self._entries.pop(lan_discovery.normalize_mac(mac), None)
+        self.save()
+
+    def revalidate(self, mac):
+        """Un sondeo a la IP cacheada + comprobar la MAC en la tabla de vecinos."""
+        mac = lan_discovery.normalize_mac(mac)
+        ip = self.get(mac, allow_stale=True)
+        if not ip:
+            return False
+        lan_discovery.probe_hosts([ip])
+        if lan_discovery.read_neighbors().get(mac) == ip:
+            self.put(mac, ip)
+            return True
+        self._failed(mac)
+        return False
+
+    def resolve(self, mac):
+        """IP para la MAC usando la caché; barrido completo solo si no hay más remedio."""
+        mac = lan_discovery.normalize_mac(mac)
+        if not mac:
+            return None
+        ip = self.get(mac)
+        if ip:
+            return ip
+        if self.revalidate(mac):
+            return self.get(mac)
+        # tabla de vecinos sin sondear (gratis) y, si no, barrido de la subred
+        with self._scan_lock:
+            ip = lan_discovery.read_neighbors().get(mac)
+            if ip:
+                self.put(mac, ip)
+                return ip
+            found = lan_discovery.scan_subnet()
+            for m, addr in found.items():
+                self.put(m, addr, save=False)
+            self.save()
+            return found.get(mac)
+
+    # --- refresco en segundo plano ---
+    def refresh_due(self):
+        """Revalida las entradas vigiladas que han pasado REFRESH_AHEAD de su TTL (y no
+        están esperando tras fallar); olvida las no vigiladas ya caducadas."""
+        now = time.time()
+        with self._lock:
+            expired = [m for m, e in self._entries.items()
+                       if m not in self._watched and now - e["ts"] >= self.ttl]
+            for m in expired:
+                del self._entries[m]
+            due = [(m, e["ip"]) for m, e in self._entries.items()
+                   if m in self._watched and now - e["ts"] >= self.ttl * REFRESH_AHEAD
+                   and now >= e.get("retry_at", 0)]
+        if due and not self._stop.is_set():
+            try:
+                lan_discovery.probe_hosts([ip for _, ip in due])
+                neighbors = lan_discovery.read_neighbors()
+            except Exception:
+                neighbors = {}
+            for mac, ip in due:
+                if neighbors.get(mac) == ip:
+                    self.put(mac, ip, save=False)
+                else:
+                    self._failed(mac, now)
+        if expired or due:
+            self.save()
+
+    def start_background_refresh(self, interval=None):
+        if self._thread and self._thread.is_alive():
+            return
+        interval = interval or max(5, self.ttl * (1 - REFRESH_AHEAD) / 2)
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval):
+                self.refresh_due()
+
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
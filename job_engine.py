@@ -0,0 +1,232 @@
+import asyncio
+import contextlib
+import itertools
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ----------------------
+# Motor de trabajos asíncrono
+# ----------------------
+# Un único hilo con un event loop de asyncio:
+#   - los procesos hijos largos (logcat, getprop, .bat...) se crean y se leen desde
+#     este loop, línea a línea, sin acumular toda la salida;
+#   - las funciones bloqueantes (exec_adb, diálogos ya resueltos...) van a un pool de
+#     hilos acotado en vez de un hilo nuevo por clic;
+#   - cada dispositivo tiene un límite de trabajos simultáneos;
+#   - los resultados vuelven a Tk por UNA cola que se vacía con root.after.
+
+DEFAULT_WORKERS = 16
+DEFAULT_PER_DEVICE = 2
+POLL_MS = 50
+STREAM_BATCH = 200  # líneas por entrega al callback de salida
+STREAM_FLUSH = 0.05  # s máximos que una línea espera a completar lote
+
+_log = logging.getLogger(__name__)
+
+
+class Job:
+    """Handle de un trabajo: se puede cancelar y consultar."""
+
+    def __init__(self, job_id, name, device):
+        self.id = job_id
+        self.name = name
+        self.device = device
+        self.cancel_event = threading.Event()
+        self.future = None  # concurrent.futures.Future del loop
+        self.proc = None    # asyncio.subprocess.Process si es un proceso
+        self._task = None   # asyncio.Task del runner, en cuanto arranca
+        self._loop = None
+
+    def cancel(self):
+        self.cancel_event.set()
+        task = self._task
+        if task is not None:
+            # se cancela la tarea en su loop: el Future del job no acaba hasta que el
+            # trabajo termina de verdad (el hilo de uno bloqueante no se puede cortar)
+            self._loop.call_soon_threadsafe(task.cancel)
+        elif self.future is not None:
+            self.future.cancel()   # aún no ha empezado
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+
+class JobEngine:
+    def __init__(self, max_workers=DEFAULT_WORKERS, per_device=DEFAULT_PER_DEVICE):
+        self.per_device = per_device
+        self.results = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._loop = asyncio.new_event_loop()
+        self._sems = {}
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.on_error = None   # on_error(nombre, excepción) si falla un callback en drain()
+        self._thread = threading.Thread(target=self._run_loop, name="job-loop", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def _sem(self, device):
+        # solo se llama desde el hilo del loop; sin dispositivo no hay límite propio
+        if device is None:
+            return contextlib.nullcontext()
+        sem = self._sems.get(device)
+        if sem is None:
+            sem = self._sems[device] = asyncio.Semaphore(self.per_device)
+        return sem
+
+    def _new_job(self, name, device):
+        job = Job(next(self._ids), name, device)
+        job._loop = self._loop
+        with self._lock:
+            self._jobs[job.id] = job
+        return job
+
+    def _finish(self, job, fut, on_done):
+        with self._lock:
+            self._jobs.pop(job.id, None)
+        if on_done is None or fut.cancelled():
+            return
+        exc = fut.exception()
+        self.post(on_done, None if exc else fut.result(), exc)
+
+    def _schedule(self, job, coro, on_done):
+        job.future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        job.future.add_done_callback(lambda f: self._finish(job, f, on_done))
+        return job
+
+    # --- API ---
+    def post(self, fn, *args):
+        """Encola fn(*args) para ejecutarse en el hilo de Tk (ver poll_tk)."""
+        self.results.put((fn, args))
+
+    def submit(self, fn, *args, device=None, name=None, on_done=None, pass_cancel=False, **kwargs):
+        """Ejecuta fn(*args, **kwargs) (bloqueante) en el pool, respetando el límite
+        por dispositivo. on_done(resultado, excepción) se llama en el hilo de Tk.
+        Con pass_cancel=True fn recibe además cancel=<threading.Event del job>, para
+        que los trabajos largos (macros...) puedan pararse a mitad."""
+        job = self._new_job(name or getattr(fn, "__name__", "job"), device)
+        if pass_cancel:
+            kwargs["cancel"] = job.cancel_event
+
+        async def runner():
+            job._task = asyncio.current_task()
+            async with self._sem(device):
+                if job.cancelled:
+                    raise asyncio.CancelledError()
+                fut = self._loop.run_in_executor(self._executor, lambda: fn(*args, **kwargs))
+                try:
+                    return await asyncio.shield(fut)
+                except asyncio.CancelledError:
+                    # el hilo sigue hasta que fn vuelva (con pass_cancel mira cancel_event):
+                    # su hueco en el límite del dispositivo no se suelta hasta entonces
+                    while not fut.done():
+                        with contextlib.suppress(asyncio.CancelledError):
+                            await asyncio.wait([fut])
+                    raise
+
+        return self._schedule(job, runner(), on_done)
+
+    def submit_process(self, argv, device=None, name=None, on_output=None, on_done=None, env=None):
+        """Lanza un proceso desde el loop y entrega su salida por lotes de líneas:
+        on_output(lineas, es_stderr) en el hilo de Tk. on_done(returncode, excepción).
+        Cancelar el job, o una línea más larga que el límite del stream, mata el proceso
+        (en el segundo caso el job acaba con la excepción)."""
+        job = self._new_job(name or " ".join(argv[:3]), device)
+
+        async def pump(stream, is_err):
+            batch = []
+            while True:
+                try:
+                    # con líneas pendientes no se espera más de STREAM_FLUSH para entregarlas
+                    line = await asyncio.wait_for(stream.readline(), STREAM_FLUSH if batch else None)
+                except asyncio.TimeoutError:
+                    line = None
+                if line == b"":
+                    break
+                if line is not None:
+                    batch.append(line.decode("utf-8", "replace").rstrip("\r\n"))
+                if batch and (line is None or len(batch) >= STREAM_BATCH):
+                    if on_output:
+                        self.post(on_output, batch, is_err)
+                    batch = []
+            if batch and on_output:
+                self.post(on_output, batch, is_err)
+
+        async def runner():
+            job._task = asyncio.current_task()
+            async with self._sem(device):
+                if job.cancelled:
+                    raise asyncio.CancelledError()
+                proc = await asyncio.create_subprocess_exec(
+                    *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, env=env)
+                job.proc = proc
+                pumps = [asyncio.ensure_future(pump(proc.stdout, False)),
+                         asyncio.ensure_future(pump(proc.stderr, True))]
+                try:
+                    await asyncio.gather(*pumps)
+                    return await proc.wait()
+                except (asyncio.CancelledError, asyncio.LimitOverrunError, ValueError):
+                    # cancelado, o readline() con una línea mayor que el límite del stream
+                    for p in pumps:
+                        p.cancel()
+                    if proc.returncode is None:
+                        proc.kill()
+                        await proc.wait()
+                    raise
+
+        return self._schedule(job, runner(), on_done)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel_all(self, device=None):
+        n = 0
+        for job in self.jobs():
+            if device is None or job.device == device:
+                job.cancel()
+                n += 1
+        return n
+
+    def drain(self, max_items=500):
+        """Ejecuta callbacks pendientes (llamar desde el hilo de Tk)."""
+        for _ in range(max_items):
+            try:
+                fn, args = self.results.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                fn(*args)
+            except Exception as e:
+                name = getattr(fn, "__name__", repr(fn))
+                _log.exception("Error en el callback %s", name)
+                if self.on_error is not None:
+                    try:
+                        self.on_error(name, e)
+                    except Exception:
+                        _log.exception("Error en on_error")
+
+    def poll_tk(self, root, interval=POLL_MS):
+        """Programa el vaciado periódico de la cola de resultados en Tk."""
+        def tick():
+            self.drain()
+            root.after(interval, tick)
+        root.after(interval, tick)
+
+    def shutdown(self):
+        self.cancel_all()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,134 @@
+import asyncio
+import ipaddress
+import os
+import re
+import socket
+import subprocess
+import sys
+
+# ----------------------
+# Descubrimiento LAN: MAC -> IP de toda la subred en una pasada
+# ----------------------
+# 1) Se lanzan conexiones TCP cortas (puerto adb 5555) a todas las IPs de la subred
+#    con asyncio y un límite de concurrencia. Da igual si conectan o son rechazadas:
+#    lo que interesa es que el kernel resuelva ARP y rellene la tabla de vecinos.
+# 2) Se lee la tabla de vecinos directamente (/proc/net/arp en Linux; en Windows y
+#    macOS una sola llamada a `arp -a`, no una por host).
+
+DEFAULT_PORT = 5555
+DEFAULT_LIMIT = 128
+DEFAULT_TIMEOUT = 0.3
+
+_IPV4_RE = re.compile(r"\b(\d{1,3}(?:\.\d{1,3}){3})\b")
+_MAC_RE = re.compile(r"\b([0-9a-fA-F]{1,2}(?:[:-][0-9a-fA-F]{1,2}){5})\b")
+
+
+def normalize_mac(mac):
+    """'38-54-39-6A-DA-97', '3854.396a.da97', '38:54:39:6a:da:97' -> '38:54:39:6a:da:97'."""
+    if not mac:
+        return ""
+    parts = re.split(r"[:\-]", mac.strip().lower())
+    if len(parts) == 6:
+        return ":".join(p.zfill(2) for p in parts)
+    digits = re.sub(r"[^0-9a-f]", "", mac.lower())
+    if len(digits) == 12:
+        return ":".join(digits[i:i + 2] for i in range(0, 12, 2))
+    return mac.strip().lower()
+
+
+def local_ipv4():
+    """IPv4 local usada para salir a la red (no envía paquetes: UDP connect)."""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("8.8.8.8", 80))
+            return s.getsockname()[0]
+    except OSError:
+        return None
+
+
+def local_subnet(prefix=24):
+    ip = local_ipv4()
+    if not ip:
+        return None
+    return ipaddress.ip_network(f"{ip}/{prefix}", strict=False)
+
+
+# ----------------------
+# Tabla de vecinos
+# ----------------------
+def read_neighbors():
+    """Devuelve {mac: ip} de la tabla ARP/vecinos del sistema."""
+    table = {}
+    if os.path.exists("/proc/net/arp"):
+        try:
+            with open("/proc/net/arp", "r", encoding="ascii", errors="ignore") as f:
+                next(f, None)  # cabecera
+                for line in f:
+                    cols = line.split()
+                    # IP  HWtype  Flags  HWaddress  Mask  Device
+                    if len(cols) >= 4 and cols[2] != "0x0" and cols[3] != "00:00:00:00:00:00":
+                        table[normalize_mac(cols[3])] = cols[0]
+            return table
+        except OSError:
+            pass
+    try:
+        args = ["arp", "-a"] if sys.platform.startswith("win") else ["arp", "-an"]
+        out = subprocess.run(args, capture_output=True, text=True, timeout=5).stdout
+    except Exception:
+        return table
+    for line in out.splitlines():
+        ip_m, mac_m = _IPV4_RE.search(line), _MAC_RE.search(line)
+        if ip_m and mac_m:
+            mac = normalize_mac(mac_m.group(1))
+            if mac not in ("ff:ff:ff:ff:ff:ff", "00:00:00:00:00:00"):
+                table[mac] = ip_m.group(1)
+    return table
+
+
+# ----------------------
+# Sondeo concurrente
+# ----------------------
+async def _probe(ip, port, timeout, sem):
+    async with sem:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+            writer.close()
+            return True
+        except (OSError, asyncio.TimeoutError):
+            return False
+
+
+async def _sweep(hosts, port, limit, timeout):
+    sem = asyncio.Semaphore(limit)
+    results = await asyncio.gather(*(_probe(str(h), port, timeout, sem) for h in hosts))
+    return {str(h) for h, ok in zip(hosts, results) if ok}
+
+
+def probe_hosts(hosts, port=DEFAULT_PORT, limit=DEFAULT_LIMIT, timeout=DEFAULT_TIMEOUT):
+    """Sondea las IPs dadas. Devuelve el conjunto de IPs con el puerto abierto."""
+    return asyncio.run(_sweep(list(hosts), port, limit, timeout))
+
+
+def scan_subnet(network=None, port=DEFAULT_PORT, limit=DEFAULT_LIMIT, timeout=DEFAULT_TIMEOUT):
+    """Sondea la subred (por defecto la /24 local) y devuelve {mac: ip} de toda ella."""
+    if network is None:
+        network = local_subnet()
+    elif not isinstance(network, ipaddress.IPv4Network):
+        network = ipaddress.ip_network(network, strict=False)
+    if network is not None:
+        probe_hosts(network.hosts(), port, limit, timeout)
+    neighbors = read_neighbors()
+    if network is None:
+        return neighbors
+    return {mac: ip for mac, ip in neighbors.items() if ipaddress.ip_address(ip) in network}
+
+
+def find_ip(mac, network=None, **kwargs):
+    """IP para la MAC: primero la tabla de vecinos (gratis), si no, barrido de la subred."""
+    mac = normalize_mac(mac)
+    if not mac:
+        return None
+    ip = read_neighbors().get(mac)
+    if ip:
+        return ip
+    return scan_subnet(network, **kwargs).get(mac)
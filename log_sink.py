@@ -0,0 +1,121 @@
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from collections import deque
+
+# ----------------------
+# Sumidero de log por lotes para la consola
+# ----------------------
+# gui_log puede llamarse desde cualquier hilo y a mucha frecuencia (fan-out, logcat...).
+# En vez de un root.after + insert + see por mensaje:
+#   - emit() solo mete el mensaje en una cola (deque acotada, segura entre hilos);
+#   - flush() corre en el hilo de Tk cada FRAME_MS, agrupa los mensajes consecutivos
+#     del mismo nivel en un único insert y hace un solo see(END);
+#   - el widget se recorta a max_lines líneas (se borran las más antiguas);
+#   - opcionalmente se copia todo a un fichero rotativo.
+
+FRAME_MS = 50
+DEFAULT_MAX_LINES = 5000
+MAX_PENDING = 20000           # mensajes en cola como máximo (sin consola todavía, etc.)
+MAX_PER_FLUSH = 2000          # mensajes por frame, para no congelar Tk
+LOG_FILE_BYTES = 1024 * 1024
+LOG_FILE_BACKUPS = 3
+
+
+class LogSink:
+    def __init__(self, max_lines=DEFAULT_MAX_LINES, log_file=None):
+        self.max_lines = max_lines
+        self._pending = deque(maxlen=MAX_PENDING)
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self.widget = None
+        self.prepare_tag = None
+        self._file_handler = None
+        self._running = False
+        if log_file:
+            self.set_log_file(log_file)
+
+    # --- entrada (cualquier hilo) ---
+    def emit(self, msg, level="info"):
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append((str(msg), level, time.time()))
+
+    # --- fichero ---
+    def set_log_file(self, path):
+        if self._file_handler:
+            self._file_handler.close()
+            self._file_handler = None
+        if not path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=LOG_FILE_BYTES, backupCount=LOG_FILE_BACKUPS, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._file_handler = handler
+
+    def _write_file(self, batch):
+        lines = []
+        for msg, level, ts in batch:
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+            lines.append(f"{stamp} [{level}] {msg}")
+        record = logging.LogRecord("adb_gui", logging.INFO, "", 0, "\n".join(lines), None, None)
+        try:
+            self._file_handler.emit(record)
+        except Exception:
+            pass
+
+    # --- salida (hilo de Tk) ---
+    def attach(self, root, widget, prepare_tag=None, interval=FRAME_MS):
+        """Engancha el widget Text y arranca el vaciado periódico."""
+        self.widget = widget
+        self.prepare_tag = prepare_tag
+        if self._running:
+            return
+        self._running = True
+
+        def tick():
+            self.flush()
+            root.after(interval, tick)
+        root.after(interval, tick)
+
+    def _take(self, limit):
+        with self._lock:
+            n = min(limit, len(self._pending))
+            return [self._pending.popleft() for _ in range(n)]
+
+    def flush(self):
+        batch = self._take(MAX_PER_FLUSH)
+        if not batch:
+            return 0
+        if self._file_handler:
+            self._write_file(batch)
+        w = self.widget
+        if w is None or not w.winfo_exists():
+            return len(batch)
+
+        # agrupar mensajes consecutivos del mismo nivel en un solo insert
+        args = []
+        run_level, run_text = None, []
+        for msg, level, _ in batch:
+            if level != run_level and run_text:
+                args += ["".join(run_text), run_level]
+                run_text = []
+            run_level = level
+            run_text.append(msg + "\n")
+        if run_text:
+            args += ["".join(run_text), run_level]
+        if self.prepare_tag:
+            for tag in set(args[1::2]):
+                self.prepare_tag(tag)
+        w.insert("end", *args)
+
+        # recortar por arriba
+        lines = int(w.index("end-1c").split(".")[0])
+        if lines > self.max_lines:
+            w.delete("1.0", f"{lines - self.max_lines + 1}.0")
+        w.see("end")
+        return len(batch)
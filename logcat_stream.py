@@ -0,0 +1,129 @@
+import re
+from collections import deque
+
+# ----------------------
+# Logcat en vivo: parser threadtime, buffer circular y filtro incremental
+# ----------------------
+# Formato `logcat -v threadtime`:
+#   10-18 12:34:56.789  1234  1250 I ActivityManager: Start proc ...
+# Las entradas se guardan en un deque de tamaño fijo. La vista filtrada se mantiene
+# aparte: cada línea nueva solo se prueba contra el filtro actual (no se reescanea el
+# histórico), y si el filtro nuevo es más estricto que el anterior se filtra sobre
+# la vista ya filtrada en lugar de sobre todo el buffer.
+
+LEVELS = "VDIWEF"
+DEFAULT_CAPACITY = 50_000
+
+_THREADTIME_RE = re.compile(
+    r"^(\d\d-\d\d\s+\d\d:\d\d:\d\d\.\d+)\s+(\d+)\s+(\d+)\s+([VDIWEFA])\s+(.*?)\s*:\s(.*)$"
+)
+
+
+class LogEntry:
+    __slots__ = ("time", "pid", "tid", "level", "tag", "msg", "raw")
+
+    def __init__(self, time, pid, tid, level, tag, msg, raw):
+        self.time = time
+        self.pid = pid
+        self.tid = tid
+        self.level = level
+        self.tag = tag
+        self.msg = msg
+        self.raw = raw
+
+
+def parse_line(line):
+    """LogEntry de una línea threadtime; las líneas que no encajan (cabeceras
+    '--------- beginning of main', etc.) se guardan como nivel 'I' sin tag."""
+    m = _THREADTIME_RE.match(line)
+    if not m:
+        return LogEntry("", 0, 0, "I", "", line, line)
+    level = m.group(4)
+    return LogEntry(m.group(1), int(m.group(2)), int(m.group(3)),
+                    "F" if level == "A" else level, m.group(5), m.group(6), line)
+
+
+class LogFilter:
+    """Filtro por tag (subcadena), nivel mínimo, PID y regex sobre la línea."""
+
+    def __init__(self, tag="", level="V", pid=None, regex=""):
+        self.tag = tag or ""
+        self.level = level if level in LEVELS else "V"
+        self.pid = pid
+        self.regex = regex or ""
+        self._min = LEVELS.index(self.level)
+        self._re = re.compile(self.regex, re.IGNORECASE) if self.regex else None
+
+    def match(self, e):
+        if LEVELS.index(e.level) < self._min:
+            return False
+        if self.pid is not None and e.pid != self.pid:
+            return False
+        if self.tag and self.tag.lower() not in e.tag.lower():
+            return False
+        if self._re is not None and not self._re.search(e.raw):
+            return False
+        return True
+
+    def narrows(self, old):
+        """True si todo lo que pasa este filtro pasaba también `old` (entonces basta
+        con filtrar la vista de `old`)."""
+        if old is None:
+            return False
+        if self._min < old._min:
+            return False
+        if old.pid is not None and self.pid != old.pid:
+            return False
+        if old.tag and old.tag.lower() not in self.tag.lower():
+            return False
+        # regex: solo se puede asegurar si no cambia
+        return old.regex in ("", self.regex)
+
+    def is_empty(self):
+        return self._min == 0 and self.pid is None and not self.tag and self._re is None
+
+
+class LogBuffer:
+    """Buffer circular + vista filtrada."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.entries = deque(maxlen=capacity)
+        self.view = deque(maxlen=capacity)
+        self.filter = LogFilter()
+        self.dropped = 0  # entradas expulsadas del buffer por estar lleno
+
+    def append_lines(self, lines):
+        """Añade líneas crudas; devuelve cuántas entraron en la vista."""
+        added = 0
+        entries, view, flt = self.entries, self.view, self.filter
+        for line in lines:
+            if len(entries) == entries.maxlen:
+                old = entries[0]
+                self.dropped += 1
+                if view and view[0] is old:
+                    view.popleft()
+            e = parse_line(line)
+            entries.append(e)
+            if flt.match(e):
+                view.append(e)
+                added += 1
+        return added
+
+    def set_filter(self, new):
+        src = self.view if new.narrows(self.filter) else self.entries
+        self.filter = new
+        if new.is_empty():
+            self.view = deque(self.entries, maxlen=self.entries.maxlen)
+        else:
+            self.view = deque((e for e in src if new.match(e)), maxlen=self.entries.maxlen)
+
+    def clear(self):
+        self.entries.clear()
+        self.view.clear()
+        self.dropped = 0
+
+    def window(self, start, count):
+        """Entradas visibles [start, start+count) de la vista filtrada."""
+        view = self.view
+        end = min(len(view), start + count)
+        return [view[i] for i in range(max(0, start), end)]
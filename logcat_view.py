@@ -0,0 +1,144 @@
+import tkinter as tk
+from tkinter import ttk, font as tkfont
+
+from logcat_stream import LogBuffer, LogFilter, LEVELS
+
+# ----------------------
+# Vista de logcat virtualizada
+# ----------------------
+# El Text solo contiene las filas visibles: al hacer scroll o llegar líneas nuevas se
+# reescriben esas N filas a partir de un índice en la vista filtrada. Los repintados
+# se agrupan (como mucho uno cada RENDER_MS).
+
+RENDER_MS = 100
+LEVEL_COLORS = {"V": "gray", "D": "#3a7bd5", "I": "green", "W": "#c98a00", "E": "red", "F": "magenta"}
+
+
+class LogcatView(ttk.Frame):
+    def __init__(self, parent, on_start=None, on_stop=None, capacity=None):
+        super().__init__(parent, padding=8)
+        self.buffer = LogBuffer(capacity) if capacity else LogBuffer()
+        self.on_start = on_start
+        self.on_stop = on_stop
+        self.offset = 0        # índice de la primera fila visible en la vista filtrada
+        self.follow = True     # pegado al final
+        self._render_pending = False
+        self._rows = 30
+
+        # --- barra de filtros ---
+        bar = ttk.Frame(self)
+        bar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 6))
+        self.tag_var = tk.StringVar()
+        self.level_var = tk.StringVar(value="V")
+        self.pid_var = tk.StringVar()
+        self.regex_var = tk.StringVar()
+        ttk.Label(bar, text="Tag:").pack(side=tk.LEFT)
+        ttk.Entry(bar, textvariable=self.tag_var, width=16).pack(side=tk.LEFT, padx=(2, 8))
+        ttk.Label(bar, text="Nivel:").pack(side=tk.LEFT)
+        ttk.Combobox(bar, textvariable=self.level_var, values=list(LEVELS), width=3, state="readonly").pack(side=tk.LEFT, padx=(2, 8))
+        ttk.Label(bar, text="PID:").pack(side=tk.LEFT)
+        ttk.Entry(bar, textvariable=self.pid_var, width=7).pack(side=tk.LEFT, padx=(2, 8))
+        ttk.Label(bar, text="Regex:").pack(side=tk.LEFT)
+        ttk.Entry(bar, textvariable=self.regex_var, width=24).pack(side=tk.LEFT, padx=(2, 8))
+        ttk.Button(bar, text="Iniciar", command=self._start).pack(side=tk.LEFT, padx=2)
+        ttk.Button(bar, text="Parar", command=self._stop).pack(side=tk.LEFT, padx=2)
+        ttk.Button(bar, text="Limpiar", command=self.clear).pack(side=tk.LEFT, padx=2)
+        self.status = ttk.Label(bar, text="")
+        self.status.pack(side=tk.RIGHT)
+        for var in (self.tag_var, self.level_var, self.pid_var, self.regex_var):
+            var.trace_add("write", lambda *a: self._apply_filter())
+
+        # --- filas visibles ---
+        self.text = tk.Text(self, wrap=tk.NONE, height=self._rows, state=tk.DISABLED)
+        self.text.grid(row=1, column=0, sticky="nsew")
+        self.scroll = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scroll)
+        self.scroll.grid(row=1, column=1, sticky="ns")
+        for lvl, color in LEVEL_COLORS.items():
+            self.text.tag_config(lvl, foreground=color)
+        self.text.bind("<Configure>", self._on_resize)
+        self.text.bind("<MouseWheel>", lambda e: self._scroll_rows(-1 if e.delta > 0 else 1) or "break")
+        self.text.bind("<Button-4>", lambda e: self._scroll_rows(-3) or "break")
+        self.text.bind("<Button-5>", lambda e: self._scroll_rows(3) or "break")
+        self.rowconfigure(1, weight=1)
+        self.columnconfigure(0, weight=1)
+
+    # --- entrada de datos (hilo de Tk) ---
+    def feed(self, lines, is_err=False):
+        if self.buffer.append_lines(lines):
+            self._schedule_render()
+
+    def clear(self):
+        self.buffer.clear()
+        self.offset = 0
+        self.follow = True
+        self._schedule_render()
+
+    def _start(self):
+        if self.on_start:
+            self.on_start()
+
+    def _stop(self):
+        if self.on_stop:
+            self.on_stop()
+
+    # --- filtro ---
+    def _apply_filter(self):
+        pid = self.pid_var.get().strip()
+        try:
+            flt = LogFilter(self.tag_var.get().strip(), self.level_var.get(),
+                            int(pid) if pid.isdigit() else None, self.regex_var.get())
+        except Exception:
+            return  # regex a medio escribir
+        self.buffer.set_filter(flt)
+        self.follow = True
+        self._schedule_render()
+
+    # --- scroll ---
+    def _max_offset(self):
+        return max(0, len(self.buffer.view) - self._rows)
+
+    def _scroll_rows(self, delta):
+        self.offset = min(self._max_offset(), max(0, self.offset + delta))
+        self.follow = self.offset >= self._max_offset()
+        self._render()
+
+    def _on_scroll(self, *args):
+        if args[0] == "moveto":
+            total = len(self.buffer.view)
+            self.offset = min(self._max_offset(), max(0, int(float(args[1]) * total)))
+            self.follow = self.offset >= self._max_offset()
+            self._render()
+        elif args[0] == "scroll":
+            step = self._rows if args[2] == "pages" else 1
+            self._scroll_rows(int(args[1]) * step)
+
+    def _on_resize(self, event):
+        line_h = tkfont.Font(font=self.text["font"]).metrics("linespace") or 1
+        rows = max(1, event.height // line_h)
+        if rows != self._rows:
+            self._rows = rows
+            self._schedule_render()
+
+    # --- pintado ---
+    def _schedule_render(self):
+        if not self._render_pending:
+            self._render_pending = True
+            self.after(RENDER_MS, self._render)
+
+    def _render(self):
+        self._render_pending = False
+        total = len(self.buffer.view)
+        if self.follow:
+            self.offset = self._max_offset()
+        rows = self.buffer.window(self.offset, self._rows)
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        for e in rows:
+            self.text.insert(tk.END, e.raw + "\n", e.level)
+        self.text.config(state=tk.DISABLED)
+        if total:
+            self.scroll.set(self.offset / total, min(1.0, (self.offset + len(rows)) / total))
+        else:
+            self.scroll.set(0, 1)
+        self.status.config(text=f"{total}/{len(self.buffer.entries)} líneas"
+                                + (f" ({self.buffer.dropped} descartadas)" if self.buffer.dropped else ""))
@@ -0,0 +1,469 @@
+import random
+import re
+import shlex
+import threading
+
+import adb_commands
+import adb_input
+import adb_session
+import text_input
+import ui_tree
+
+# ----------------------
+# Macros: sustituto nativo de los .bat
+# ----------------------
+# Un .macro es texto, una instrucción por línea (los bloques se cierran con `end`):
+#
+#   # comentario
+#   set X 500                   variable; se usa como ${X}
+#   set R random 0 1080         entero aleatorio en [0, 1080)
+#   device 192.168.1.5:5555     cambia el dispositivo destino (`device` solo = el del run)
+#   echo Abriendo vídeo...
+#   tap ${X} 1000
+#   tap text=Aceptar            por id/texto/desc de la UI (ver ui_tree), sin coordenadas
+#   swipe 100 800 100 200 [ms]
+#   key 24 24 25
+#   text hola mundo             (largo o no ASCII: por ADBKeyboard/Clipper, ver text_input)
+#   sleep 1.5                   segundos (o `sleep 500ms`)
+#   shell settings put system user_rotation 1
+#   adb push foto.png /sdcard/  cualquier comando adb
+#   repeat [N] ... end          sin N: hasta cancelar
+#   for B from 0 to 255 step 20 ... end   (ambos extremos incluidos, como for /L)
+#   for P in com.a com.b ... end
+#
+# Todo va por el camino rápido (sesión shell persistente / servidor adb, ver
+# adb_commands.exec_adb); los tap/swipe/key/text seguidos se agrupan en una sola
+# invocación (adb_input), que se envía antes de cualquier otra instrucción o pausa, al
+# final de cada vuelta de un bucle y cada MAX_PENDING eventos. Cancelar
+# (threading.Event) envía lo pendiente y corta en la siguiente instrucción o pausa.
+
+MACRO_EXT = ".macro"
+INPUT_CMDS = ("tap", "swipe", "key", "text")
+SIMPLE_CMDS = INPUT_CMDS + ("set", "device", "echo", "sleep", "shell", "adb")
+MAX_PENDING = 200   # eventos de entrada agrupados como mucho en una invocación
+
+_VAR_RE = re.compile(r"\$\{(\w+)\}")
+
+
+class MacroError(Exception):
+    pass
+
+
+class MacroCancelled(Exception):
+    pass
+
+
+# --- parser ---
+class Stmt:
+    __slots__ = ("line", "cmd", "arg", "body", "count", "var", "values")
+
+    def __init__(self, line, cmd, arg="", body=None):
+        self.line = line
+        self.cmd = cmd
+        self.arg = arg
+        self.body = body
+        self.count = None
+        self.var = None
+        self.values = None
+
+
+def parse(text):
+    """Lista de Stmt; lanza MacroError con el número de línea si algo no cuadra."""
+    root = []
+    stack = [(None, root)]
+    for n, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        cmd, _, arg = line.partition(" ")
+        cmd, arg = cmd.lower(), arg.strip()
+        if cmd == "end":
+            if len(stack) == 1:
+                raise MacroError(f"línea {n}: 'end' sin bloque abierto")
+            stack.pop()
+            continue
+        if cmd == "repeat":
+            st = Stmt(n, cmd, arg, [])
+            if arg and not arg.isdigit() and not _VAR_RE.fullmatch(arg):
+                raise MacroError(f"línea {n}: repeat espera un número: {arg!r}")
+            st.count = arg or None
+        elif cmd == "for":
+            st = Stmt(n, cmd, arg, [])
+            m = re.fullmatch(r"(\w+)\s+from\s+(\S+)\s+to\s+(\S+)(?:\s+step\s+(\S+))?", arg)
+            if m:
+                st.var, st.values = m.group(1), ("range", m.group(2), m.group(3), m.group(4) or "1")
+            else:
+                m = re.fullmatch(r"(\w+)\s+in\s+(.+)", arg)
+                if not m:
+                    raise MacroError(f"línea {n}: se esperaba 'for VAR from A to B [step S]' o 'for VAR in ...'")
+                st.var, st.values = m.group(1), ("list", m.group(2))
+        elif cmd in SIMPLE_CMDS:
+            st = Stmt(n, cmd, arg)
+        else:
+            raise MacroError(f"línea {n}: instrucción desconocida: {cmd}")
+        stack[-1][1].append(st)
+        if st.body is not None:
+            stack.append((st, st.body))
+    if len(stack) > 1:
+        raise MacroError(f"línea {stack[-1][0].line}: bloque '{stack[-1][0].cmd}' sin 'end'")
+    return root
+
+
+def load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return parse(f.read())
+
+
+def _seconds(value):
+    value = value.strip().lower()
+    if value.endswith("ms"):
+        return float(value[:-2]) / 1000
+    return float(value.rstrip("s"))
+
+
+# --- ejecución ---
+class MacroRunner:
+    def __init__(self, program, serial=None, adb="adb", cancel=None, on_output=None, variables=None):
+        self.program = program
+        self.default_serial = serial
+        self.serial = serial
+        self.adb = adb
+        self.cancel = cancel or threading.Event()
+        self.on_output = on_output   # on_output(linea, nivel) según se produce
+        self.vars = dict(variables or {})
+        self.failed = 0
+        self.commands = 0
+        self._events = []
+
+    def _out(self, text, level="info"):
+        if self.on_output and text:
+            for line in str(text).rstrip().splitlines():
+                self.on_output(line, level)
+
+    def _expand(self, text, line):
+        def sub(m):
+            if m.group(1) not in self.vars:
+                raise MacroError(f"línea {line}: variable sin definir: {m.group(1)}")
+            return str(self.vars[m.group(1)])
+        return _VAR_RE.sub(sub, text)
+
+    def _check(self):
+        if self.cancel.is_set():
+            self._flush_input()   # lo ya ejecutado de la macro llega al dispositivo
+            raise MacroCancelled()
+
+    def _report(self, result):
+        rc, out, err = result
+        self.commands += 1
+        if rc != 0:
+            self.failed += 1
+        self._out(out)
+        self._out(err, "error")
+
+    def _queue(self, *events):
+        self._events += events
+        if len(self._events) >= MAX_PENDING:
+            self._flush_input()
+
+    def _flush_input(self):
+        if self._events:
+            events, self._events = self._events, []
+            self._report(adb_input.run_events(events, self.serial, self.adb))
+
+    def _tap_element(self, selector):
+        self._flush_input()
+        self.commands += 1
+        try:
+            ui_tree.tap_element(selector, self.serial, self.adb)
+        except (ui_tree.UiError, adb_session.AdbSessionError) as e:
+            self.failed += 1
+            self._out(f"tap {selector}: {e}", "error")
+
+    def _sleep(self, secs):
+        self._flush_input()
+        if self.cancel.wait(max(0.0, secs)):
+            raise MacroCancelled()
+
+    def _exec(self, st):
+        arg = self._expand(st.arg, st.line)
+        cmd = st.cmd
+        try:
+            if cmd == "tap":
+                parts = shlex.split(arg)
+                if len(parts) == 2 and all(p.lstrip("-").isdigit() for p in parts):
+                    self._queue(("tap", int(parts[0]), int(parts[1])))
+                else:
+                    self._tap_element(" ".join(parts))
+            elif cmd == "swipe":
+                self._queue(("swipe", *map(int, shlex.split(arg))))
+            elif cmd == "key":
+                self._queue(*(("key", int(k)) for k in arg.split()))
+            elif cmd == "text":
+                if arg.isascii() and len(arg) < text_input.FAST_THRESHOLD:
+                    self._queue(("text", arg))
+                else:
+                    self._flush_input()
+                    self.commands += 1
+                    try:
+                        self._out(str(text_input.send_text(arg, self.serial, self.adb, cancel=self.cancel)))
+                    except text_input.TextInputError as e:
+                        self.failed += 1
+                        self._out(str(e), "error")
+            elif cmd == "sleep":
+                self._sleep(_seconds(arg))
+            elif cmd == "set":
+                name, _, value = arg.partition(" ")
+                parts = value.split()
+                if len(parts) == 3 and parts[0] == "random":
+                    value = random.randrange(int(parts[1]), int(parts[2]))
+                self.vars[name] = value
+            else:
+                self._flush_input()
+                if cmd == "echo":
+                    self._out(arg)
+                elif cmd == "device":
+                    self.serial = arg or self.default_serial
+                elif cmd == "shell":
+                    self._report(adb_commands.exec_adb(["shell", arg], self.serial, self.adb))
+                elif cmd == "adb":
+                    self._report(adb_commands.exec_adb(shlex.split(arg), self.serial, self.adb))
+        except (ValueError, TypeError) as e:
+            raise MacroError(f"línea {st.line}: argumentos no válidos para {cmd}: {arg!r} ({e})")
+
+    def _block(self, stmts):
+        for st in stmts:
+            self._check()
+            if st.cmd == "repeat":
+                count = int(self._expand(st.count, st.line)) if st.count else None
+                i = 0
+                while count is None or i < count:
+                    self._check()
+                    self._block(st.body)
+                    self._flush_input()
+                    i += 1
+            elif st.cmd == "for":
+                for value in self._values(st):
+                    self._check()
+                    self.vars[st.var] = value
+                    self._block(st.body)
+                    self._flush_input()
+            else:
+                self._exec(st)
+
+    def _values(self, st):
+        kind = st.values[0]
+        if kind == "list":
+            return shlex.split(self._expand(st.values[1], st.line))
+        a, b, step = (int(self._expand(v, st.line)) for v in st.values[1:])
+        if step == 0:
+            raise MacroError(f"línea {st.line}: step 0")
+        return range(a, b + (1 if step > 0 else -1), step)
+
+    def run(self):
+        """Ejecuta la macro. Devuelve 0 si todo fue bien, 1 si falló algún comando
+        y -1 si se canceló. Los errores de la macro en sí salen como MacroError."""
+        try:
+            self._block(self.program)
+            self._flush_input()
+        except MacroCancelled:
+            self._out("macro cancelada", "error")
+            return -1
+        return 1 if self.failed else 0
+
+
+def run_macro(path_or_program, serial=None, adb="adb", cancel=None, on_output=None, variables=None):
+    program = load(path_or_program) if isinstance(path_or_program, str) else path_or_program
+    return MacroRunner(program, serial, adb, cancel, on_output, variables).run()
+
+
+# ----------------------
+# Importador de .bat
+# ----------------------
+# Cubre lo que usan los scripts de antique_bats: echo, set, set /a ... !random! %% N,
+# timeout /t, adb ..., for /L, comentarios (también `::`/`& rem` al final de la línea)
+# y los `:ETIQUETA ... goto ETIQUETA` hacia atrás que son un bucle sin más: goto sin
+# condición, fuera de bloques ( ), y sin etiquetas, exit ni otros goto por medio.
+# Lo que no sabe traducir (otros goto/call, %var:~1%, %~1, if...) lo deja comentado
+# como `# [bat] ...` y lo devuelve en la lista de avisos: no se intenta adivinar.
+
+_BAT_VAR_RE = re.compile(r"%%(\w)|%(\w+)%|!(\w+)!")
+_FOR_L_RE = re.compile(r"for\s+/L\s+%%(\w)\s+in\s+\(\s*(-?\d+)\s*,\s*(-?\d+)\s*,\s*(-?\d+)\s*\)\s+do\s*(.*)$", re.I)
+_SET_RANDOM_RE = re.compile(r"set\s+/a\s+\"?(\w+)\s*=\s*!random!\s*%%\s*(\d+)\"?$", re.I)
+_SET_RE = re.compile(r"set\s+\"?(\w+)=(.*?)\"?$", re.I)
+_TIMEOUT_RE = re.compile(r"timeout\s+/t\s+(\d+)", re.I)
+_GOTO_RE = re.compile(r"\s*goto\s+:?(\S+)\s*$", re.I)
+_JUMP_RE = re.compile(r"\b(?:goto|call)\s+:(\S+)|^\s*goto\s+(\S+)", re.I)
+_TAIL_COMMENT_RE = re.compile(r"\s+::(.*)$|\s*&\s*rem\b(.*)$", re.I)
+# %var:~1%, !var:~0,20!, %var:a=b%, %~1, %1: sin equivalente en las macros
+_BAT_UNSUPPORTED_RE = re.compile(r"[%!]\w+:[^%!]*[%!]|%~?\d|%~\w")
+
+
+def _bat_vars(text):
+    def sub(m):
+        name = m.group(1) or m.group(2) or m.group(3)
+        return "${" + name + "}" if name.lower() != "random" else m.group(0)
+    return _BAT_VAR_RE.sub(sub, text)
+
+
+def _bat_split(args):
+    """Argumentos al estilo de cmd.exe: separados por espacios, comillas dobles y las
+    barras invertidas tal cual (rutas de Windows)."""
+    return [p[1:-1] if len(p) >= 2 and p[0] == p[-1] == '"' else p
+            for p in shlex.split(args, posix=False)]
+
+
+def _bat_adb(args):
+    """`adb ...` del .bat -> instrucción de macro."""
+    parts = _bat_split(args)
+    if len(parts) >= 3 and parts[0] == "shell" and parts[1] == "input":
+        kind, rest = parts[2], parts[3:]
+        if kind == "tap" and len(rest) == 2:
+            return "tap " + " ".join(rest)
+        if kind == "swipe" and len(rest) in (4, 5):
+            return "swipe " + " ".join(rest)
+        if kind == "keyevent" and rest:
+            return "key " + " ".join(rest)
+        if kind == "text" and rest:
+            return "text " + " ".join(rest).replace("%s", " ")
+    if parts and parts[0] == "shell" and len(parts) > 1:
+        return "shell " + args.split(None, 1)[1]
+    # la macro parte `adb ...` con reglas POSIX: se citan los argumentos para que
+    # C:\ADB\foto.png llegue entero
+    return "adb " + " ".join(p if _VAR_RE.fullmatch(p) else shlex.quote(p) for p in parts)
+
+
+def _strip_tail_comment(s):
+    """(instrucción, comentario) de una línea con `:: ...` o `& rem ...` al final."""
+    m = _TAIL_COMMENT_RE.search(s)
+    if not m:
+        return s, ""
+    return s[:m.start()].rstrip(), (m.group(1) or m.group(2) or "").strip()
+
+
+def import_bat(text):
+    """Traduce un .bat a macro. Devuelve (texto_macro, avisos)."""
+    lines = [l.rstrip() for l in text.splitlines()]
+    labels = {}
+    for i, l in enumerate(lines):
+        s = l.strip()
+        if s.startswith(":") and not s.startswith("::"):
+            labels.setdefault(s[1:].strip().lower(), i)
+    # bloques ( ) abiertos en cada línea (para no tomar un goto dentro de un if/for por un bucle)
+    nesting, level = [], 0
+    for l in lines:
+        s = l.strip()
+        nesting.append(level)
+        level = max(0, level + s.endswith("(") - s.startswith(")"))
+    # goto hacia atrás sencillo -> bucle: la etiqueta abre 'repeat', el goto lo cierra
+    loop_open, loop_close = set(), set()
+    for i, l in enumerate(lines):
+        m = _GOTO_RE.match(l)
+        start = labels.get(m.group(1).lower()) if m else None
+        if start is None or start >= i or nesting[i] or nesting[start]:
+            continue
+        between = [b.strip().lower() for b in lines[start + 1:i]]
+        if any(b.startswith((":", "exit", "goto", "call")) and not b.startswith("::") for b in between):
+            continue
+        if start in loop_open or any(a < start < b or a < i < b for a, b in zip(sorted(loop_open), sorted(loop_close))):
+            continue
+        loop_open.add(start)
+        loop_close.add(i)
+    jump_targets = {(m.group(1) or m.group(2)).lower() for l in lines for m in [_JUMP_RE.search(l)] if m}
+
+    out, warnings = [], []
+    depth = 0
+    blocks = []   # "for" (se traduce) o "bat" (bloque que no se sabe traducir: todo comentado)
+
+    def emit(stmt):
+        out.append("    " * depth + stmt)
+
+    def unsupported(i, s):
+        emit(f"# [bat] {s}")
+        warnings.append(f"línea {i + 1}: {s}")
+
+    for i, raw in enumerate(lines):
+        s = raw.strip()
+        if i in loop_open:
+            emit("repeat")
+            depth += 1
+            continue
+        if i in loop_close:
+            depth -= 1
+            emit("end")
+            continue
+        low = s.lower()
+        if not s or low in ("@echo off", "echo off") or low.startswith("setlocal"):
+            continue
+        if s.startswith("::") or low.startswith("rem ") or low == "rem":
+            emit("# " + (s[2:] if s.startswith("::") else s[3:]).strip())
+            continue
+        if s.startswith(":"):
+            if s[1:].strip().lower() in jump_targets:
+                unsupported(i, s)   # destino de un goto/call que no es un bucle simple
+            continue
+        s, comment = _strip_tail_comment(s)
+        if comment:
+            emit("# " + comment)
+        if s == ")" and blocks:
+            if blocks.pop() == "for":
+                depth -= 1
+                emit("end")
+            else:
+                emit("# [bat] )")
+            continue
+        if "bat" in blocks:
+            emit(f"# [bat] {s}")
+            if s.endswith("("):
+                blocks.append("bat")
+            continue
+        m = _FOR_L_RE.match(s)
+        if m:
+            var, a, step, b, rest = m.groups()
+            emit(f"for {var} from {a} to {b} step {step}")
+            depth += 1
+            rest = rest.strip()
+            if rest == "(":
+                blocks.append("for")
+                continue
+            stmt = _bat_stmt(rest)
+            if stmt is None:
+                unsupported(i, rest)
+            elif stmt:
+                emit(stmt)
+            depth -= 1
+            emit("end")
+            continue
+        stmt = _bat_stmt(s)
+        if stmt is None:
+            unsupported(i, s)
+            if s.endswith("("):
+                blocks.append("bat")
+        elif stmt:
+            emit(stmt)
+    return "\n".join(out) + "\n", warnings
+
+
+def _bat_stmt(s):
+    """Una línea simple del .bat -> instrucción, '' si se ignora, None si no se sabe traducir."""
+    s = re.sub(r"\s*>\s*nul\s*$", "", s, flags=re.I).strip()
+    low = s.lower()
+    if _BAT_UNSUPPORTED_RE.search(s):
+        return None
+    m = _TIMEOUT_RE.match(s)
+    if m:
+        return f"sleep {m.group(1)}"
+    if low.startswith("echo.") or low == "echo":
+        return ""
+    if low.startswith("echo "):
+        return "echo " + _bat_vars(s[5:])
+    m = _SET_RANDOM_RE.match(s)
+    if m:
+        return f"set {m.group(1)} random 0 {m.group(2)}"
+    if low.startswith("set /a"):
+        return None
+    m = _SET_RE.match(s)
+    if m:
+        return f"set {m.group(1)} {_bat_vars(m.group(2))}"
+    if low.startswith("adb "):
+        return _bat_adb(_bat_vars(s[4:].strip()))
+    return None
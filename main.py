@@ -1,6 +1,28 @@
 import os, sys, json, re, subprocess, threading, time, socket, shutil, tkinter as tk
 from tkinter import ttk, simpledialog, messagebox, filedialog, colorchooser
 from pathlib import Path  
+import adb_commands
+import adb_input
+import adb_screen
+import ip_cache
+import fanout
+import apk_installer
+import job_engine
+from logcat_view import LogcatView
+from telemetry_view import TelemetryView
+import log_sink
+import scrcpy_manager
+import screen_recorder
+import file_sync
+import device_cache
+import macro_engine
+import event_recorder
+import device_monitor
+import app_launcher
+import text_input
+import telemetry
+import ui_tree
+import profile_store
 
 BASE_DIR = Path(__file__).parent.resolve()
 tools_dir = BASE_DIR / "tools" / "platform-tools"
@@ -10,11 +32,43 @@ os.environ["PATH"] = str(tools_dir) + os.pathsep + os.environ.get("PATH", "")
 # Config / Globals
 # ----------------------
 PROJECT_ROOT = BASE_DIR
-PERFILES_FILE = PROJECT_ROOT / "devices.json"
-perfiles = {}
-
-_scrcpy_proc = None
-_screenrec_proc = None
+PERFILES_FILE = PROJECT_ROOT / "devices.json"   # formato antiguo: se importa a profiles.db la primera vez
+PROFILES_DB = PROJECT_ROOT / "profiles.db"
+IP_CACHE_FILE = PROJECT_ROOT / "ip_cache.json"
+perfiles = {}        # profile_store.ProfileStore tras load_profiles()
+mac_ip_cache = ip_cache.IpCache(IP_CACHE_FILE)
+DEVICE_CACHE_FILE = PROJECT_ROOT / "device_cache.json"
+device_info = device_cache.DeviceCache(DEVICE_CACHE_FILE)
+# arranque de apps con am start -W: actividades resueltas + historial de tiempos (launch_history.jsonl)
+launcher = adb_commands.get_launcher()
+launcher.adb = "adb"   # misma sesión persistente que exec_adb
+
+_screen_recorder = None
+_batch_job = None
+_event_recorder = None
+profile_names = []   # nombres en el orden del listbox (el texto lleva además el estado)
+profile_rows = {}    # nombre -> fila del listbox
+_logcat_job = None
+TELEMETRY_DIR = PROJECT_ROOT / "telemetry"
+samplers = {}        # serial -> telemetry.TelemetrySampler (cada uno con su hilo y su adb shell)
+
+# Un solo hilo de asyncio para todos los trabajos (ver job_engine)
+jobs = job_engine.JobEngine()
+jobs.on_error = lambda name, e: gui_log(f"Error en {name}: {e}", level="error")
+
+# scrcpy: un proceso por dispositivo (ver scrcpy_manager)
+scrcpy = scrcpy_manager.ScrcpyManager()
+
+# Estado de conexión de los perfiles: track-devices + ping + reconexión (ver device_monitor)
+def _on_health_change(name, state, latency):
+    jobs.post(update_profile_row, name)
+
+
+health = device_monitor.DeviceMonitor(on_change=_on_health_change, resolve=lambda name: profile_serial(name))
+
+# Consola: todos los mensajes pasan por aquí y se pintan por lotes (ver log_sink)
+LOG_FILE = BASE_DIR / "logs" / "adb_gui.log"
+console_log = log_sink.LogSink()
 
 # ----------------------
 # Configuración persistente
@@ -39,7 +93,7 @@ def save_config():
         with open(CONFIG_FILE, "w", encoding="utf-8") as f:
             json.dump(config, f, indent=4)
     except Exception as e:
-        gui_log("Error guardando config:", e)
+        gui_log(f"Error guardando config: {e}", level="error")
 
 def apply_theme(root):
     theme = config.get("theme", "light")
@@ -145,145 +199,61 @@ THEMES = {
 
 def load_profiles():
     global perfiles
-    if os.path.exists(PERFILES_FILE):
-        try:
-            with open(PERFILES_FILE, "r", encoding="utf-8") as f:
-                perfiles = json.load(f)
-        except Exception:
-            perfiles = {}
-    else:
-        perfiles = {}
+    try:
+        perfiles = adb_commands.load_profiles(PROFILES_DB, PERFILES_FILE)
+    except profile_store.ProfileStoreError as e:
+        gui_log(f"Error abriendo perfiles: {e} (se usan perfiles en memoria)", level="error")
+        perfiles = profile_store.ProfileStore(":memory:")
 
 
-def save_profiles():
+def save_profile(name, data):
+    """Guarda un perfil (una transacción en profiles.db). False si no se pudo."""
     try:
-        with open(PERFILES_FILE, "w", encoding="utf-8") as f:
-            json.dump(perfiles, f, indent=4, ensure_ascii=False)
-    except Exception as e:
-        gui_log(f"Error guardando perfiles: {e}", level="error")
+        perfiles[name] = data
+        return True
+    except profile_store.ProfileStoreError as e:
+        gui_log(str(e), level="error")
+        return False
 
 
-def _get_local_ipv4_and_prefix():
-    """Intentar obtener la IPv4 local y asumir /24 si no se puede calcular máscara."""
+def export_profiles():
+    path = filedialog.asksaveasfilename(defaultextension=".json", initialfile="devices.json",
+                                        filetypes=[("JSON", "*.json")], title="Exportar perfiles")
+    if not path:
+        return
     try:
-        # Método sencillo: crear socket y leer la IP local usada para salir a Internet
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.settimeout(0.5)
-        s.connect(("8.8.8.8", 80))
-        ip = s.getsockname()[0]
-        s.close()
-        return ip, 24
-    except Exception:
-        return None, 24
+        gui_log(f"{perfiles.export_json(path)} perfiles exportados a {path}")
+    except OSError as e:
+        gui_log(f"Error exportando perfiles: {e}", level="error")
 
-def _run_angryip_scan(range_start, range_end, export_file):
-    """Intentar llamar a Angry IP Scanner desde CLI con feeder+exporter.
-    Se prueban nombres habituales del ejecutable."""
-    executables = ["ipscan", "ipscan.exe", "angryip", "angryip.exe"]
-    for exe in executables:
-        try:
-            # -f:range <start> <end>  -o <file>
-            cmd = [exe, f"-f:range", range_start, range_end, "-o", export_file]
-            # No esperamos salida compleja, solo ejecutamos (puede abrir GUI en algunas versiones).
-            proc = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            # si no hay error grave asumimos que escribió el archivo
-            if proc.returncode == 0 or os.path.exists(export_file):
-                return True
-        except Exception:
-            continue
-    return False
-
-def _ping_sweep_cold(range_base):
-    """Hacer un ping sweep en Windows para poblar la ARP cache.
-       Se hace en hilos para no tardar demasiado."""
-    threads = []
-    def p(ip):
-        try:
-            # Windows: ping -n 1 -w 200 (200 ms timeout)
-            subprocess.run(["ping", "-n", "1", "-w", "200", ip], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        except Exception:
-            pass
 
-    for i in range(1, 255):
-        ip = f"{range_base}.{i}"
-        t = threading.Thread(target=p, args=(ip,), daemon=True)
-        t.start()
-        threads.append(t)
-        # evitar crear 254 hilos instantáneos; ligero throttling
-        if len(threads) % 50 == 0:
-            time.sleep(0.05)
+def import_profiles():
+    path = filedialog.askopenfilename(filetypes=[("JSON", "*.json")], title="Importar perfiles")
+    if not path:
+        return
+    try:
+        n = perfiles.import_json(path)
+    except (OSError, ValueError, profile_store.ProfileStoreError) as e:
+        gui_log(f"Error importando perfiles: {e}", level="error")
+        return
+    refresh_profiles_list()
+    gui_log(f"{n} perfiles importados de {path}")
 
-    # esperar un poco a que terminen (no bloqueante excesivo)
-    for t in threads:
-        t.join(timeout=0.2)
 
 def find_ip_from_mac(mac):
-    """Intento robusto: si la red oculta IPs, primero intento escanear (Angry IP Scanner o ping sweep),
-    luego parseo arp -a y devuelvo la IP si coincide la MAC."""
+    """Busca la IP de una MAC: caché con TTL (ip_cache.json), tabla de vecinos y,
+    si no está, barrido asíncrono de la /24 local (ver lan_discovery)."""
     if not mac:
         return None
-
-    # Normalizar MAC a minúsculas con guiones (Windows suele mostrar con guiones)
-    mac_norm = mac.lower().replace(":", "-").replace(".", "-").replace(" ", "-")
-
-    # 1) Intentar escanear con Angry IP Scanner si está instalado
-    local_ip, prefix = _get_local_ipv4_and_prefix()
-    if local_ip:
-        # asumir /24 (192.168.x.1 - 192.168.x.254)
-        parts = local_ip.split(".")
-        if len(parts) >= 3:
-            base = ".".join(parts[0:3])
-            range_start = f"{base}.1"
-            range_end = f"{base}.254"
-            export_tmp = os.path.join(PROJECT_ROOT, "angry_scan_result.txt")
-            try:
-                ok = _run_angryip_scan(range_start, range_end, export_tmp)
-                if ok and os.path.exists(export_tmp):
-                    # opcional: podrías parsear el export_tmp y devolver IP directamente si contiene MACs
-                    try:
-                        with open(export_tmp, "r", encoding="utf-8", errors="ignore") as f:
-                            data = f.read().lower()
-                            mac_search = mac_norm.replace("-", "-")
-                            if mac_search in data:
-                                # buscar ip en la misma línea
-                                for line in data.splitlines():
-                                    if mac_search in line:
-                                        # asumir que la IP es la primera columna
-                                        parts = line.split()
-                                        if parts:
-                                            return parts[0]
-                    except Exception:
-                        pass
-            except Exception:
-                pass
-
-            # 2) Si no hay Angry IP Scanner o no arrojó resultados, hacer ping sweep para poblar ARP
-            _ping_sweep_cold(base)
-
-    # 3) Finalmente parsear arp -a (Windows)
     try:
-        out = subprocess.getoutput("arp -a")
+        return mac_ip_cache.resolve(mac)
     except Exception as e:
-        gui_log(f"No se pudo ejecutar arp -a: {e}", level="error")
+        gui_log(f"Error buscando IP para {mac}: {e}", level="error")
         return None
 
-    for line in out.splitlines():
-        low = line.lower()
-        # normalizar separadores en la línea para comparar
-        if mac_norm in low or mac.lower().replace("-", ":") in low:
-            parts = line.split()
-            if parts:
-                # formato esperable en Windows: IP  MAC  tipo
-                ip_candidate = parts[0]
-                # validar que parece IP
-                if re.match(r"^\d{1,3}(\.\d{1,3}){3}$", ip_candidate):
-                    return ip_candidate
-
-    return None
-
-def add_profile(name, mac, port=5555, ip=None, notes=None, color=None):
-    perfiles[name] = {"mac": mac, "port": port, "ip": ip, "notes": notes, "color": color}
-    save_profiles()
+def add_profile(name, mac, port=5555, ip=None, notes=None, color=None, tags=None):
+    if not save_profile(name, {"mac": mac, "port": port, "ip": ip, "notes": notes, "color": color, "tags": tags}):
+        return
     refresh_profiles_list()
     gui_log(f"Perfil guardado: {name}")
 
@@ -300,8 +270,16 @@ def edit_profile(name):
     new_ip = simpledialog.askstring("Editar perfil", "IP fija (opcional):", initialvalue=perfil.get("ip", ""))
     new_notes = simpledialog.askstring("Editar perfil", "Notas:", initialvalue=perfil.get("notes", ""))
     new_color = simpledialog.askstring("Editar perfil", "Color (ej: #ff0000):", initialvalue=perfil.get("color", ""))
-    perfiles[name] = {"mac": new_mac, "port": new_port, "ip": new_ip, "notes": new_notes, "color": new_color}
-    save_profiles()
+    new_tags = simpledialog.askstring("Editar perfil", "Etiquetas (separadas por comas):",
+                                      initialvalue=", ".join(perfil.get("tags") or ()))
+    scrcpy_opts = dict(perfil.get("scrcpy") or {})
+    new_preset = simpledialog.askstring("Editar perfil", "Preset scrcpy (" + ", ".join(scrcpy_manager.PRESETS) + "):",
+                                        initialvalue=scrcpy_opts.get("preset", scrcpy_manager.DEFAULT_PRESET))
+    if new_preset in scrcpy_manager.PRESETS:
+        scrcpy_opts["preset"] = new_preset
+    if not save_profile(name, {"mac": new_mac, "port": new_port, "ip": new_ip, "notes": new_notes, "color": new_color,
+                               "tags": perfil.get("tags") if new_tags is None else new_tags, "scrcpy": scrcpy_opts}):
+        return
     refresh_profiles_list()
     gui_log(f"Perfil '{name}' editado")
 
@@ -311,8 +289,11 @@ def delete_profile(name):
         gui_log(f"Perfil '{name}' no existe", level="error")
         return
     if messagebox.askyesno("Borrar perfil", f"¿Seguro que quieres borrar el perfil '{name}'?"):
-        perfiles.pop(name)
-        save_profiles()
+        try:
+            del perfiles[name]
+        except profile_store.ProfileStoreError as e:
+            gui_log(str(e), level="error")
+            return
         refresh_profiles_list()
         gui_log(f"Perfil '{name}' borrado")
 
@@ -322,14 +303,25 @@ def connect_profile(name):
         gui_log(f"Perfil '{name}' no existe", level="error")
         return
     perfil = perfiles[name]
-    ip = perfil.get("ip")
-    if not ip:
-        ip = find_ip_from_mac(perfil.get("mac", ""))
-    if not ip:
-        gui_log(f"No se encontró IP para {perfil.get('mac')}", level="error")
-        return
-    port = perfil.get("port", 5555)
-    run_in_thread(lambda: exec_adb(["connect", f"{ip}:{port}"]))
+
+    def worker():
+        # la resolución por MAC puede barrer la red: nunca en el hilo de Tk
+        ip = perfil.get("ip")
+        if not ip:
+            ip = find_ip_from_mac(perfil.get("mac", ""))
+        if not ip:
+            gui_log(f"No se encontró IP para {perfil.get('mac')}", level="error")
+            return
+        port = perfil.get("port", 5555)
+        device_info.invalidate(f"{ip}:{port}")
+        launcher.invalidate(f"{ip}:{port}")
+        text_input.forget(f"{ip}:{port}")
+        ui_tree.get_cache("adb").invalidate(f"{ip}:{port}")
+        health.track(name, f"{ip}:{port}")
+        health.want(name)
+        return exec_adb(["connect", f"{ip}:{port}"])
+
+    run_in_thread(worker, device=None)
 
 def disconnect_profile(name):
     """Desconecta el perfil (adb disconnect ip:port)."""
@@ -337,73 +329,81 @@ def disconnect_profile(name):
         gui_log(f"Perfil '{name}' no existe", level="error")
         return
     perfil = perfiles[name]
-    ip = perfil.get("ip")
-    if not ip:
-        ip = find_ip_from_mac(perfil.get("mac", ""))
-    if not ip:
-        gui_log(f"No se encontró IP para {perfil.get('mac')}", level="error")
-        return
-    port = perfil.get("port", 5555)
-    run_in_thread(lambda: exec_adb(["disconnect", f"{ip}:{port}"]))
-    gui_log(f"Desconectando {name} ({ip}:{port})", level="info")
+
+    def worker():
+        ip = perfil.get("ip")
+        if not ip:
+            ip = find_ip_from_mac(perfil.get("mac", ""))
+        if not ip:
+            gui_log(f"No se encontró IP para {perfil.get('mac')}", level="error")
+            return
+        port = perfil.get("port", 5555)
+        gui_log(f"Desconectando {name} ({ip}:{port})", level="info")
+        health.want(name, False)
+        device_info.invalidate(f"{ip}:{port}")
+        return exec_adb(["disconnect", f"{ip}:{port}"])
+
+    run_in_thread(worker, device=None)
+
+def profile_serial(name):
+    """Serial adb (ip:puerto) de un perfil, resolviendo la IP por MAC si hace falta."""
+    return adb_commands.profile_serial(perfiles.get(name), find_ip_from_mac)
+
+
+def cached_profile_serial(name):
+    """Como profile_serial pero sin tocar la red (IP fija o la última cacheada), para el hilo de Tk."""
+    perfil = perfiles.get(name) or {}
+    ip = perfil.get("ip") or mac_ip_cache.get(perfil.get("mac", ""), allow_stale=True)
+    return f"{ip}:{perfil.get('port', 5555)}" if ip else None
 
 # ----------------------
 # Exec helpers & logging
 # ----------------------
 
 def gui_log(msg, level="info"):
-    """Inserta msg en la consola GUI de forma segura desde hilos.
-    level: 'info' | 'error' | 'cmd'
+    """Encola msg para la consola GUI; seguro desde cualquier hilo, también antes de
+    que exista la ventana (se pinta al arrancar). level: 'info' | 'error' | 'cmd'
     """
-    if 'root' in globals() and isinstance(root, tk.Tk):
-        try:
-            root.after(0, lambda: _append_log(msg, level))
-        except Exception:
-            gui_log(msg)
-    else:
-        gui_log(msg)
+    console_log.emit(msg, level)
 
-def _append_log(msg, level="info"):
-    if not getattr(text_log, "winfo_exists", lambda: True)():
-        gui_log(msg)
+def _prepare_log_tag(tag):
+    """Configura el color del tag la primera vez que se usa."""
+    if tag in text_log.tag_names():
         return
-
     theme = config.get("theme", "light")
-    tag = level
-
-    # Solo configurar el tag si no existe todavía
-    if tag not in text_log.tag_names():
-        if theme == "light":
-            if tag == "info":
-                text_log.tag_config(tag, foreground="green")
-            elif tag == "error":
-                text_log.tag_config(tag, foreground="red")
-            else:
-                text_log.tag_config(tag, foreground="blue")
-        else:  # dark
-            if tag == "info":
-                text_log.tag_config(tag, foreground="lime")
-            elif tag == "error":
-                text_log.tag_config(tag, foreground="red")
-            else:
-                text_log.tag_config(tag, foreground="cyan")
-
-    text_log.insert(tk.END, msg + "\n", tag)
-    text_log.see(tk.END)
+    if theme == "light":
+        if tag == "info":
+            text_log.tag_config(tag, foreground="green")
+        elif tag == "error":
+            text_log.tag_config(tag, foreground="red")
+        else:
+            text_log.tag_config(tag, foreground="blue")
+    else:  # dark
+        if tag == "info":
+            text_log.tag_config(tag, foreground="lime")
+        elif tag == "error":
+            text_log.tag_config(tag, foreground="red")
+        else:
+            text_log.tag_config(tag, foreground="cyan")
 
-def exec_adb(args):
-    """Ejecuta adb <args...> y vuelca stdout/stderr en la consola. Puede llamarse desde hilo."""
+def exec_adb(args, serial=None):
+    """Ejecuta adb [-s serial] <args...> y vuelca stdout/stderr en la consola. Puede llamarse desde hilo."""
     if isinstance(args, str):
         args = args.split()
-    cmd = ["adb"] + args
+    cmd = ["adb"] + (["-s", serial] if serial else []) + args
     gui_log(f">> {' '.join(cmd)}", level="cmd")
+    if serial and health.is_down(serial):
+        # transporte caído: fallar ya (el monitor lo está reconectando) en vez de esperar a adb
+        gui_log(f"{serial} no está online (reconectando en segundo plano)", level="error")
+        return 1
     try:
-        proc = subprocess.run(cmd, capture_output=True, text=True)
-        if proc.stdout:
-            gui_log(proc.stdout.strip(), level="info")
-        if proc.stderr:
-            gui_log(proc.stderr.strip(), level="error")
-        return proc.returncode
+        # mismo camino que la CLI (sesión persistente / servidor adb / ejecutable)
+        rc, out, err = adb_commands.exec_adb(args, serial, "adb")
+        if out:
+            gui_log(out.strip(), level="info")
+        if err:
+            gui_log(err.strip(), level="error")
+        return rc
     except Exception as e:
         gui_log(f"Error ejecutando adb: {e}", level="error")
         return -1
@@ -426,43 +426,134 @@ def exec_cmd(cmd_list):
         return -1
 
 
-def run_in_thread(fn, *args, **kwargs):
-    t = threading.Thread(target=fn, args=args, kwargs=kwargs, daemon=True)
-    t.start()
-    return t
+DEFAULT_DEVICE = ""   # clave del límite por dispositivo para el de por defecto (adb sin -s)
+
+
+def run_in_thread(fn, *args, device=DEFAULT_DEVICE, **kwargs):
+    """Encola fn en el motor de trabajos (pool acotado, no un hilo por clic), contando
+    para el límite de trabajos simultáneos de `device` (serial; por defecto, el
+    dispositivo por defecto de adb). device=None: sin límite por dispositivo, para
+    trabajos que no son de uno (connect, fan-out que reparte él mismo...).
+    Devuelve el Job (cancelable)."""
+    return jobs.submit(fn, *args, device=device, **kwargs)
+
+
+def _log_lines(lines, is_err):
+    gui_log("\n".join(lines), level="error" if is_err else "info")
+
+
+def stream_adb(args, serial=None):
+    """adb <args> como proceso del motor: la salida se vuelca por lotes según llega,
+    sin acumularla entera en memoria. Devuelve el Job."""
+    cmd = ["adb"] + (["-s", serial] if serial else []) + args
+    gui_log(f">> {' '.join(cmd)}", level="cmd")
+
+    def done(rc, exc):
+        if exc is not None:
+            gui_log(f"Error ejecutando adb: {exc}", level="error")
+        elif rc:
+            gui_log(f"adb terminó con código {rc}", level="error")
+
+    return jobs.submit_process(cmd, device=serial, on_output=_log_lines, on_done=done)
+
+
+def cancel_jobs():
+    n = jobs.cancel_all()
+    gui_log(f"⏹ {n} trabajo(s) cancelado(s)", level="info")
+
+
+def run_fanout(label, fn, serials):
+    """Ejecuta fn(serial) en todos los serials a la vez (pool acotado) y loguea
+    el tiempo de cada dispositivo y un resumen final. Llamar desde hilo."""
+    workers = config.get("fanout_workers", fanout.DEFAULT_WORKERS)
+    gui_log(f"▶️ Fan-out '{label}' en {len(serials)} dispositivos ({workers} a la vez)", level="cmd")
+
+    def report(res):
+        if res.ok:
+            gui_log(f"[{res.target}] ✔ {label} ({res.elapsed * 1000:.0f} ms)", level="info")
+        else:
+            why = res.error if res.error is not None else f"rc={res.value}"
+            gui_log(f"[{res.target}] ✘ {label} ({res.elapsed * 1000:.0f} ms): {why}", level="error")
+
+    results = fanout.run_fanout(serials, fn, max_workers=workers, on_result=report)
+    summary = fanout.summarize(results)
+    gui_log(f"Fan-out '{label}': {summary}", level="info" if all(r.ok for r in results) else "error")
+    return results
 
 # ----------------------
 # Funciones avanzadas
 # ----------------------
 
-def start_scrcpy():
-    global _scrcpy_proc
-    if _scrcpy_proc and getattr(_scrcpy_proc, 'poll', lambda: None)() is None:
-        gui_log("scrcpy ya está en ejecución", level="error")
-        return
+def _scrcpy_line(serial, line):
+    # las líneas de --print-fps se guardan en las estadísticas, no en la consola
+    if line and not scrcpy_manager.is_fps_line(line):
+        gui_log(f"[scrcpy {serial or 'default'}] {line}", level="error" if "ERROR" in line else "info")
+
+
+def _start_scrcpy_for(serial, options=None):
+    """Arranca scrcpy para un dispositivo y espera (en el motor) al primer frame
+    para registrar el tiempo de arranque."""
     try:
-        _scrcpy_proc = subprocess.Popen(["scrcpy"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        gui_log("scrcpy iniciado", level="info")
-        # lanzar hilo que lea stderr y stdout si se desea (opcional)
+        sess = scrcpy.start(serial, options, on_line=_scrcpy_line)
     except Exception as e:
         gui_log(f"No se pudo iniciar scrcpy: {e}", level="error")
+        return -1
+    gui_log(">> " + " ".join(sess.args), level="cmd")
+    deadline = time.monotonic() + 20
+    while sess.running() and sess.startup_time is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    if sess.startup_time is not None:
+        w, h = sess.resolution
+        gui_log(f"scrcpy {serial or 'default'}: primer frame {w}x{h} en {sess.startup_time * 1000:.0f} ms", level="info")
+    elif not sess.running():
+        gui_log(f"scrcpy {serial or 'default'} terminó al arrancar (código {sess.proc.returncode})", level="error")
+    return 0
+
+
+def start_scrcpy():
+    """scrcpy en cada perfil seleccionado (con su preset) o en el dispositivo por defecto."""
+    names = get_selected_profiles()
+    if not names:
+        run_in_thread(_start_scrcpy_for, None)
+        return
+
+    def worker(name):
+        serial = profile_serial(name)
+        if not serial:
+            gui_log(f"No se encontró IP para el perfil '{name}'", level="error")
+            return -1
+        return _start_scrcpy_for(serial, perfiles.get(name, {}).get("scrcpy"))
+
+    for name in names:
+        run_in_thread(worker, name, device=cached_profile_serial(name) or name)
 
 
 def stop_scrcpy():
-    global _scrcpy_proc
-    if not _scrcpy_proc:
+    sessions = scrcpy.stop_all()
+    if not sessions:
         gui_log("scrcpy no está en ejecución", level="error")
         return
+    for sess in sessions:
+        st = sess.stats()
+        startup = f"{st['startup_time'] * 1000:.0f} ms" if st["startup_time"] is not None else "?"
+        gui_log(f"scrcpy {st['serial'] or 'default'} detenido — arranque {startup}, "
+                f"últimos fps {st['fps'] if st['fps'] is not None else '?'}, frames descartados {st['frames_skipped']}", level="info")
+
+
+def take_screenshot(serial=None):
+    """Captura por exec-out (sin /sdcard ni pull) y la guarda en screenshot.png
+    (screenshot_<serial>.png si se indica dispositivo)."""
+    fname = f"screenshot_{serial.replace(':', '_')}.png" if serial else "screenshot.png"
+    path = os.path.join(PROJECT_ROOT, fname)
+    gui_log(">> adb " + (f"-s {serial} " if serial else "") + "exec-out screencap -p", level="cmd")
     try:
-        _scrcpy_proc.terminate()
-        _scrcpy_proc.wait(timeout=5)
-    except Exception:
-        try:
-            _scrcpy_proc.kill()
-        except Exception:
-            pass
-    _scrcpy_proc = None
-    gui_log("scrcpy detenido", level="info")
+        t0 = time.perf_counter()
+        frame = adb_screen.screenshot_to_file(path, serial)
+        gui_log(f"📸 Captura {frame.width}x{frame.height} guardada en {path} ({(time.perf_counter() - t0) * 1000:.0f} ms)", level="info")
+        return 0
+    except Exception as e:
+        gui_log(f"Error capturando pantalla: {e}", level="error")
+        return -1
 
 
 def install_apk():
@@ -472,11 +563,109 @@ def install_apk():
     run_in_thread(lambda: exec_adb(["install", "-r", apk]))
 
 
-def uninstall_app():
-    pkg = simpledialog.askstring("Uninstall", "Nombre del paquete (p.ej. com.example.app):")
-    if not pkg:
+def uninstall_app(serial=None):
+    """Selector de paquetes: lee la lista de device_info (adb solo si no está o ha caducado)."""
+    win = tk.Toplevel(root)
+    win.title("Desinstalar app")
+    win.transient(root)
+    filter_var = tk.StringVar()
+    ttk.Entry(win, textvariable=filter_var, width=40).grid(row=0, column=0, padx=8, pady=(8, 4), sticky="ew")
+    lb = tk.Listbox(win, height=18, width=50, exportselection=False)
+    lb.grid(row=1, column=0, padx=8, sticky="nsew")
+    sb = ttk.Scrollbar(win, orient=tk.VERTICAL, command=lb.yview)
+    sb.grid(row=1, column=1, sticky="ns")
+    lb.config(yscrollcommand=sb.set)
+    status = ttk.Label(win, text="Cargando paquetes…")
+    status.grid(row=2, column=0, padx=8, sticky="w")
+    win.rowconfigure(1, weight=1)
+    win.columnconfigure(0, weight=1)
+    pkgs = {}
+
+    def fill(*_):
+        needle = filter_var.get().strip().lower()
+        lb.delete(0, tk.END)
+        names = sorted(p for p in pkgs if needle in p.lower())
+        for p in names:
+            lb.insert(tk.END, p)
+        status.config(text=f"{len(names)}/{len(pkgs)} paquetes")
+
+    def loaded(result):
+        if not win.winfo_exists():
+            return
+        pkgs.clear()
+        pkgs.update(result or {})
+        fill()
+
+    def load(refresh=False):
+        status.config(text="Cargando paquetes…")
+
+        def worker():
+            try:
+                if refresh:
+                    added, removed, updated = device_info.refresh_packages(serial)
+                    gui_log(f"Paquetes: {len(added)} nuevos, {len(removed)} quitados, {len(updated)} actualizados", level="info")
+                jobs.post(loaded, device_info.packages(serial))
+            except Exception as e:
+                gui_log(f"No se pudo leer la lista de paquetes: {e}", level="error")
+        run_in_thread(worker, device=serial or DEFAULT_DEVICE)
+
+    def go():
+        sel = lb.curselection()
+        if not sel:
+            return
+        pkg = lb.get(sel[0])
+        if not messagebox.askyesno("Uninstall", f"¿Desinstalar {pkg}?", parent=win):
+            return
+
+        def removed():
+            pkgs.pop(pkg, None)
+            if win.winfo_exists():
+                fill()
+
+        def worker():
+            if exec_adb(["uninstall", pkg], serial) == 0:
+                device_info.forget_package(pkg, serial)
+                jobs.post(removed)
+        run_in_thread(worker, device=serial or DEFAULT_DEVICE)
+
+    filter_var.trace_add("write", fill)
+    btns = ttk.Frame(win)
+    btns.grid(row=3, column=0, columnspan=2, pady=8)
+    ttk.Button(btns, text="Desinstalar", command=go).pack(side=tk.LEFT, padx=4)
+    ttk.Button(btns, text="Refrescar", command=lambda: load(refresh=True)).pack(side=tk.LEFT, padx=4)
+    load()
+
+
+def install_apk_fanout(serials):
+    """Instalación masiva: el APK se lee una vez y se envía a todos en paralelo,
+    saltando los dispositivos que ya tienen ese versionCode."""
+    apk = filedialog.askopenfilename(title="Selecciona APK", filetypes=[("APK files", "*.apk")])
+    if not apk:
         return
-    run_in_thread(lambda: exec_adb(["uninstall", pkg]))
+    workers = config.get("install_workers", apk_installer.DEFAULT_WORKERS)
+    label = f"install {os.path.basename(apk)}"
+
+    def report(res):
+        if not res.ok:
+            gui_log(f"[{res.target}] ✘ {label}: {res.error}", level="error")
+        elif res.value["status"] == "skipped":
+            gui_log(f"[{res.target}] = misma versión ya instalada, se salta", level="info")
+        else:
+            v = res.value
+            speed = f", envío a {v['mbps']:.1f} MB/s" if v["mbps"] is not None else ""
+            gui_log(f"[{res.target}] ✔ {v['bytes'] / (1024 * 1024):.1f} MB instalados en {v['seconds']:.1f} s{speed}", level="info")
+
+    def worker():
+        gui_log(f"▶️ {label} en {len(serials)} dispositivos ({workers} a la vez)", level="cmd")
+        try:
+            info, results = apk_installer.install_many(apk, serials, max_workers=workers, on_result=report)
+        except Exception as e:
+            gui_log(f"Error leyendo APK: {e}", level="error")
+            return
+        gui_log(f"APK {info.package or '?'} v{info.version_code or '?'} sha256={info.sha256[:12]}…", level="info")
+        gui_log(f"Fan-out '{label}': {fanout.summarize(results)}", level="info" if all(r.ok for r in results) else "error")
+
+    run_in_thread(worker, device=None)
 
 
 def reboot_device():
@@ -484,53 +673,283 @@ def reboot_device():
 
 
 def adb_devices():
-    run_in_thread(lambda: exec_adb(["devices", "-l"]))
+    run_in_thread(lambda: exec_adb(["devices", "-l"]), device=None)
 
 
 def adb_disconnect_all():
-    run_in_thread(lambda: exec_adb(["disconnect"]))
+    health.unwant_all()
+    run_in_thread(lambda: exec_adb(["disconnect"]), device=None)
 
 
 def dump_logcat():
-    run_in_thread(lambda: exec_adb(["logcat", "-d"]))
+    """Volcado único de logcat a la pestaña Logcat (no a la consola)."""
+    notebook.select(tab_logcat)
+    gui_log(">> adb logcat -d -v threadtime", level="cmd")
+    jobs.submit_process(["adb", "logcat", "-d", "-v", "threadtime"], name="logcat -d", on_output=logcat_view.feed)
+
+
+def start_live_logcat():
+    global _logcat_job
+    if _logcat_job and not _logcat_job.done():
+        gui_log("logcat en vivo ya está en ejecución", level="error")
+        return
+    gui_log(">> adb logcat -v threadtime", level="cmd")
+
+    def done(rc, exc):
+        if exc is not None:
+            gui_log(f"logcat terminó con error: {exc}", level="error")
+        else:
+            gui_log(f"logcat terminó (código {rc})", level="info")
+
+    _logcat_job = jobs.submit_process(["adb", "logcat", "-v", "threadtime"], name="logcat", on_output=logcat_view.feed, on_done=done)
+
+
+def stop_live_logcat():
+    global _logcat_job
+    if _logcat_job:
+        _logcat_job.cancel()
+        _logcat_job = None
+        gui_log("logcat en vivo detenido", level="info")
+
+
+def start_telemetry(package=None):
+    """Muestrea el perfil seleccionado (o el dispositivo por defecto) y lo muestra en la pestaña.
+    Si la pestaña mostraba otro dispositivo, su muestreador se detiene."""
+    name = get_selected_profile()
+    serial = cached_profile_serial(name) if name else None
+    current = telemetry_view.sampler
+    if current is not None and current.serial != serial:
+        stop_telemetry()
+    sampler = samplers.get(serial)
+    if sampler is None or not sampler.running():
+        sampler = telemetry.TelemetrySampler(serial, package=package, log_dir=TELEMETRY_DIR)
+        samplers[serial] = sampler
+        sampler.start()
+        gui_log(f"Telemetría de {name or serial or 'dispositivo por defecto'} → {sampler.log_path}", level="info")
+    telemetry_view.attach(sampler)
+
+
+def stop_telemetry():
+    sampler = telemetry_view.sampler
+    if sampler is None:
+        return
+    samplers.pop(sampler.serial, None)
+    telemetry_view.attach(None)
+    run_in_thread(sampler.stop, device=None)
+    gui_log(f"Telemetría de {sampler.serial or 'dispositivo por defecto'} detenida ({sampler.buffer.count} muestras)", level="info")
+
+
+def stop_all_telemetry():
+    """Al cerrar: para todos los muestreadores, cierra sus shells y vuelca lo pendiente al CSV."""
+    while samplers:
+        _, sampler = samplers.popitem()
+        sampler.stop()
+
+
+def log_device_info(serial=None):
+    """Resumen del dispositivo desde device_info (getprop/pantalla/paquetes cacheados)."""
+    for section in device_cache.SECTIONS:
+        device_info.get(section, serial)
+    gui_log(f"[{serial or 'por defecto'}]\n" + device_info.summary(serial), level="info")
+    return 0
 
 
 def get_device_info():
-    run_in_thread(lambda: exec_adb(["shell", "getprop"]))
+    run_in_thread(log_device_info)
+
+
+def launch_app(package, serial=None, cold=False):
+    """Abre la app con am start -W (ver app_launcher) y loguea el tiempo de arranque."""
+    gui_log(">> adb " + (f"-s {serial} " if serial else "") + f"shell am start -W {package}", level="cmd")
+    if serial and health.is_down(serial):
+        gui_log(f"{serial} no está online (reconectando en segundo plano)", level="error")
+        return 1
+    try:
+        entry = launcher.launch(package, serial, cold)
+    except Exception as e:
+        gui_log(f"Error abriendo {package}: {e}", level="error")
+        return 1
+    gui_log(f"🚀 [{serial or 'por defecto'}] {app_launcher.describe(entry)}", level="info")
+    return 0
+
+
+def send_text_to_device(text, serial=None):
+    """Escribe el texto en el campo con foco (ver text_input) y loguea método y car/s."""
+    gui_log(">> adb " + (f"-s {serial} " if serial else "") + f"text ({len(text)} caracteres)", level="cmd")
+    try:
+        result = text_input.send_text(text, serial)
+    except Exception as e:
+        gui_log(f"Error enviando texto: {e}", level="error")
+        return 1
+    gui_log(f"⌨️ [{serial or 'por defecto'}] {result}", level="info")
+    rates = text_input.throughput(serial)
+    if len(rates) > 1:
+        gui_log("Car/s medidos: " + ", ".join(f"{m} {cps:.0f}" for m, cps in sorted(rates.items())), level="info")
+    return 0
 
-# screenrecord helper: inicia recording en dispositivo
+
+def crazy_taps(serial=None):
+    """8 taps en el centro de la pantalla (tamaño cacheado en device_info)."""
+    try:
+        w, h = map(int, (device_info.screen(serial).get("size") or "1080x2400").split("x"))
+    except Exception as e:
+        gui_log(f"Error leyendo el tamaño de pantalla: {e}", level="error")
+        return -1
+    return exec_adb(["shell", adb_input.script_for([("tap", w // 2, h // 2)] * 8, serial)], serial)
+
+
+def tap_element_on_device(selector, serial=None):
+    """Tap en un elemento por selector (ver ui_tree): jerarquía cacheada por ventana."""
+    gui_log(">> adb " + (f"-s {serial} " if serial else "") + f"tap {selector}", level="cmd")
+    try:
+        t0 = time.perf_counter()
+        node = ui_tree.tap_element(selector, serial)
+        gui_log(f"👆 {node!r} → {node.center[0]},{node.center[1]} ({(time.perf_counter() - t0) * 1000:.0f} ms)", level="info")
+        return 0
+    except Exception as e:
+        gui_log(f"Error tocando '{selector}': {e}", level="error")
+        return 1
+
+
+def tap_element():
+    selector = simpledialog.askstring("Tap en elemento", "Selector (id=..., text=..., desc=..., o el texto tal cual):")
+    if selector:
+        run_in_thread(tap_element_on_device, selector.strip())
+
+
+def send_text():
+    text = simpledialog.askstring("Enviar texto", "Texto para el campo con foco:")
+    if text:
+        run_in_thread(send_text_to_device, text)
+
+
+def show_launch_times():
+    """Resumen de tiempos de arranque por app y tipo (cold/warm/hot) y exportación del historial."""
+    stats = launcher.stats()
+    if not stats:
+        gui_log("Sin arranques registrados todavía", level="info")
+        return
+    lines = [f"{pkg} {state}: n={st['n']} p50={st['p50_ms']:.0f} ms media={st['mean_ms']:.0f} ms última={st['last_ms']} ms"
+             for (pkg, state), st in stats.items()]
+    gui_log("Tiempos de arranque (TotalTime):\n" + "\n".join(lines), level="info")
+    path = filedialog.asksaveasfilename(defaultextension=".csv", title="Exportar historial de arranques",
+                                        filetypes=[("CSV", "*.csv"), ("JSON", "*.json")])
+    if path:
+        try:
+            n = launcher.export(path)
+            gui_log(f"{n} arranques exportados a {path}", level="info")
+        except OSError as e:
+            gui_log(f"Error exportando: {e}", level="error")
+
+# screenrecord: vídeo H.264 en streaming directo al PC (ver screen_recorder)
 def start_screenrecord():
-    global _screenrec_proc
-    if _screenrec_proc and getattr(_screenrec_proc, 'poll', lambda: None)() is None:
+    global _screen_recorder
+    if _screen_recorder and _screen_recorder.running():
         gui_log("screenrecord ya en ejecución", level="error")
         return
+    local = filedialog.asksaveasfilename(defaultextension=".h264", filetypes=[("H.264", "*.h264"), ("Todos", "*.*")], title="Guardar grabación como")
+    if not local:
+        return
+
+    def on_segment(n, nbytes, secs):
+        gui_log(f"screenrecord: segmento {n} — {nbytes / (1024 * 1024):.1f} MB en {secs:.0f} s", level="info")
+
     try:
-        # ejecuta adb shell screenrecord en un proceso separado
-        _screenrec_proc = subprocess.Popen(["adb", "shell", "screenrecord", "/sdcard/record.mp4"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        gui_log("screenrecord iniciado en dispositivo (/sdcard/record.mp4)", level="info")
+        _screen_recorder = screen_recorder.ScreenRecorder(local, on_segment=on_segment)
+        _screen_recorder.start()
+        gui_log(f"screenrecord iniciado → {local} (segmentos de {screen_recorder.SEGMENT_SECONDS} s encadenados)", level="info")
     except Exception as e:
         gui_log(f"No se pudo iniciar screenrecord: {e}", level="error")
 
 
-def stop_screenrecord_and_pull():
-    global _screenrec_proc
-    if not _screenrec_proc:
+def stop_screenrecord():
+    global _screen_recorder
+    if not _screen_recorder:
         gui_log("No hay screenrecord en ejecución", level="error")
         return
-    try:
-        _screenrec_proc.terminate()
-        _screenrec_proc.wait(timeout=5)
-    except Exception:
-        try:
-            _screenrec_proc.kill()
-        except Exception:
-            pass
-    _screenrec_proc = None
-    local = filedialog.asksaveasfilename(defaultextension=".mp4", filetypes=[("MP4 files", "*.mp4")], title="Guardar grabación como")
-    if not local:
-        gui_log("Cancelado pull de grabación", level="error")
+    rec, _screen_recorder = _screen_recorder, None
+
+    def stop():
+        total = rec.stop()
+        if rec.error:
+            gui_log(f"screenrecord terminó con error: {rec.error}", level="error")
+        gui_log(f"screenrecord detenido: {total / (1024 * 1024):.1f} MB en {rec.segments} segmento(s) → {rec.path}", level="info")
+
+    run_in_thread(stop)
+
+
+# grabación de eventos (getevent) y reproducción fiel en el tiempo (ver event_recorder)
+def start_input_recording():
+    global _event_recorder
+    if _event_recorder and _event_recorder.running():
+        gui_log("Ya se está grabando la entrada", level="error")
         return
-    run_in_thread(lambda: exec_adb(["pull", "/sdcard/record.mp4", local]))
+    rec = _event_recorder = event_recorder.EventRecorder()
+
+    def worker():
+        rec.start()
+        gui_log("Grabando toques y teclas del dispositivo… («Stop input recording» para terminar)", level="info")
+    run_in_thread(worker)
+
+
+def stop_input_recording():
+    global _event_recorder
+    if not _event_recorder:
+        gui_log("No hay grabación de entrada en curso", level="error")
+        return
+    rec, _event_recorder = _event_recorder, None
+
+    def done(recording, exc):
+        # en el hilo de Tk, con el lector ya parado
+        if exc is not None:
+            gui_log(f"No se pudo detener la grabación: {exc}", level="error")
+            return
+        if rec.error:
+            gui_log(f"La grabación terminó con error: {rec.error}", level="error")
+        if not recording.events:
+            gui_log("Grabación vacía: no se registró ningún evento", level="error")
+            return
+        gui_log(f"Grabados {len(recording.events)} eventos en {recording.duration:.1f} s", level="info")
+        path = filedialog.asksaveasfilename(defaultextension=event_recorder.EXT, initialdir=PROJECT_ROOT,
+                                            filetypes=[("Eventos", f"*{event_recorder.EXT}")], title="Guardar grabación")
+        if path:
+            try:
+                recording.save(path)
+                gui_log(f"Grabación guardada en {path}", level="info")
+            except OSError as e:
+                gui_log(f"No se pudo guardar la grabación: {e}", level="error")
+
+    # stop() espera al hilo lector: fuera del hilo de Tk
+    run_in_thread(rec.stop, device=None, on_done=done)
+
+
+def replay_input():
+    """Reproduce una grabación en los perfiles seleccionados (todos a la vez) o en el dispositivo por defecto."""
+    path = filedialog.askopenfilename(initialdir=PROJECT_ROOT, filetypes=[("Eventos", f"*{event_recorder.EXT}")],
+                                      title="Reproducir grabación")
+    if not path:
+        return
+    speed = simpledialog.askfloat("Reproducir", "Velocidad (1 = original, 2 = el doble de rápido):",
+                                  initialvalue=1.0, minvalue=0.05, maxvalue=20)
+    if not speed:
+        return
+    names = get_selected_profiles()
+
+    def worker(cancel=None):
+        recording = event_recorder.Recording.load(path)
+        serials = [s for s in (profile_serial(n) for n in names) if s] or [None]
+        gui_log(f"▶️ Reproduciendo {os.path.basename(path)} ({recording.duration:.1f} s, x{speed:g}) en "
+                f"{len(serials)} dispositivo(s)", level="cmd")
+
+        def report(res):
+            who = res.target or "por defecto"
+            if res.ok:
+                gui_log(f"[{who}] reproducción terminada (desfase máx. {res.value or 0:.1f} ms)", level="info")
+            else:
+                gui_log(f"[{who}] error reproduciendo: {res.error}", level="error")
+        event_recorder.replay_many(recording, serials, speed=speed, cancel=cancel, on_result=report)
+
+    jobs.submit(worker, name="replay", pass_cancel=True)   # replay_many reparte por dispositivo
 
 
 def pull_file():
@@ -553,6 +972,49 @@ def push_file():
     run_in_thread(lambda: exec_adb(["push", local, remote]))
 
 
+def _sync_dialog(title, remote_prompt):
+    local = filedialog.askdirectory(title=title)
+    if not local:
+        return None
+    remote = simpledialog.askstring(title, remote_prompt)
+    if not remote:
+        return None
+    compare = "hash" if messagebox.askyesno(title, "¿Comparar por contenido (md5)?\nMás lento, pero no depende de las fechas.") else "mtime"
+    return local, remote, compare
+
+
+def _sync_progress(done, total, nbytes, elapsed):
+    mbps = nbytes / (1024 * 1024) / elapsed if elapsed > 0 else 0
+    gui_log(f"sync: {done}/{total} ficheros, {nbytes / (1024 * 1024):.1f} MB ({mbps:.1f} MB/s)", level="info")
+
+
+def _sync_report(sync, *args, **kwargs):
+    try:
+        res = sync(*args, on_progress=_sync_progress, **kwargs)
+    except file_sync.FileSyncError as e:
+        gui_log(f"sync abortado: {e}", level="error")
+        return
+    gui_log(res.summary(), level="error" if res.failed else "info")
+    for rel, err in res.failed[:10]:
+        gui_log(f"  {rel}: {err}", level="error")
+
+
+def sync_push_dir():
+    picked = _sync_dialog("Sync push", "Carpeta destino en dispositivo (p.ej. /sdcard/assets):")
+    if picked:
+        local, remote, compare = picked
+        gui_log(f"sync push {local} → {remote} (comparando por {compare})", level="cmd")
+        run_in_thread(_sync_report, file_sync.sync_push, local, remote, compare=compare)
+
+
+def sync_pull_dir():
+    picked = _sync_dialog("Sync pull", "Carpeta origen en dispositivo (p.ej. /sdcard/DCIM):")
+    if picked:
+        local, remote, compare = picked
+        gui_log(f"sync pull {remote} → {local} (comparando por {compare})", level="cmd")
+        run_in_thread(_sync_report, file_sync.sync_pull, remote, local, compare=compare)
+
+
 def open_shell_window():
     try:
         if sys.platform.startswith("win"):
@@ -596,9 +1058,13 @@ notebook.pack(fill=tk.BOTH, expand=True, padx=8, pady=8)
 tab_perfiles = ttk.Frame(notebook)
 tab_comandos = ttk.Frame(notebook)
 tab_batch = ttk.Frame(notebook)
+tab_logcat = ttk.Frame(notebook)
+tab_telemetria = ttk.Frame(notebook)
 notebook.add(tab_perfiles, text="Perfiles")
 notebook.add(tab_comandos, text="Comandos")
 notebook.add(tab_batch, text="Batch")
+notebook.add(tab_logcat, text="Logcat")
+notebook.add(tab_telemetria, text="Telemetría")
 
 # ----------------------
 # Pestaña Perfiles
@@ -616,23 +1082,36 @@ tab_perfiles.columnconfigure(0, weight=3)  # lista ocupa más
 tab_perfiles.columnconfigure(1, weight=1)  # panel derecho ocupa menos
 
 # -----------------
-# LEFT: listbox con scrollbar (grid responsive)
+# LEFT: búsqueda + listbox con scrollbar (grid responsive)
 # -----------------
+search_frame = ttk.Frame(per_left)
+search_frame.grid(row=0, column=0, sticky="ew", pady=(0, 6))
+ttk.Label(search_frame, text="Buscar:").pack(side=tk.LEFT)
+profile_search_var = tk.StringVar()
+profile_search_entry = ttk.Entry(search_frame, textvariable=profile_search_var)
+profile_search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(4, 8))
+profile_count_label = ttk.Label(search_frame, text="")
+profile_count_label.pack(side=tk.RIGHT)
+# texto, tag:lab, mac:aa:bb, ip:192.168.1. (ver profile_store); filtra en cada tecla
+profile_search_var.trace_add("write", lambda *a: apply_profile_filter())
+
 list_frame = ttk.Frame(per_left)
-list_frame.grid(row=0, column=0, sticky="nsew")
+list_frame.grid(row=1, column=0, sticky="nsew")
 
-profile_listbox = tk.Listbox(list_frame, activestyle="dotbox")
+profile_listbox = tk.Listbox(list_frame, activestyle="dotbox", selectmode=tk.EXTENDED, exportselection=False)
 profile_listbox.grid(row=0, column=0, sticky="nsew")
 
 profile_scroll = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=profile_listbox.yview)
 profile_scroll.grid(row=0, column=1, sticky="ns")
 
 profile_listbox.config(yscrollcommand=profile_scroll.set)
+# actualizar detalle cuando cambie la selección
+profile_listbox.bind('<<ListboxSelect>>', lambda e: show_profile_details())
 
 # Expansión interna del list_frame / per_left
 list_frame.rowconfigure(0, weight=1)
 list_frame.columnconfigure(0, weight=1)
-per_left.rowconfigure(0, weight=1)
+per_left.rowconfigure(1, weight=1)
 per_left.columnconfigure(0, weight=1)
 
 # -----------------
@@ -656,9 +1135,10 @@ btn_connect = ttk.Button(button_frame, text="Conectar", command=lambda: connect_
 btn_disconnect = ttk.Button(button_frame, text="Desconectar", command=lambda: disconnect_profile(get_selected_profile()))
 btn_export = ttk.Button(button_frame, text="Exportar", command=lambda: export_profiles())
 btn_import = ttk.Button(button_frame, text="Importar", command=lambda: import_profiles())
+btn_fanout = ttk.Button(button_frame, text="Ejecutar en seleccionados", command=lambda: prompt_fanout())
 
 # Poner los botones en vertical dentro del button_frame
-for i, w in enumerate((btn_add, btn_edit, btn_delete, btn_connect, btn_disconnect, btn_export, btn_import)):
+for i, w in enumerate((btn_add, btn_edit, btn_delete, btn_connect, btn_disconnect, btn_export, btn_import, btn_fanout)):
     w.grid(row=i, column=0, sticky="ew", pady=6, padx=0)
 
 # Hacer que el detalle (texto) se expanda verticalmente y columnas del per_right
@@ -681,25 +1161,142 @@ def prompt_add_profile():
     port = simpledialog.askinteger("Nuevo perfil", "Puerto:", initialvalue=5555)
     ip = simpledialog.askstring("Nuevo perfil", "IP fija (opcional):")
     notes = simpledialog.askstring("Nuevo perfil", "Notas (opcional):")
-    add_profile(name, mac, port, ip, notes)
+    tags = simpledialog.askstring("Nuevo perfil", "Etiquetas (opcional, separadas por comas):")
+    add_profile(name, mac, port, ip, notes, tags=tags)
 
 
 def get_selected_profile():
     sel = profile_listbox.curselection()
     if not sel:
         return None
-    return profile_listbox.get(sel[0])
+    return profile_names[sel[0]]
+
+
+def get_selected_profiles():
+    return [profile_names[i] for i in profile_listbox.curselection()]
+
+
+def prompt_fanout():
+    """Diálogo: elegir acción (comando, APK o batch) y lanzarla en todos los perfiles seleccionados."""
+    names = get_selected_profiles()
+    if not names:
+        gui_log("Selecciona uno o más perfiles", level="error")
+        return
+    options = list(device_actions) + ["Install APK…"] + [f"Batch: {f}" for f in batch_combobox["values"]]
+    win = tk.Toplevel(root)
+    win.title(f"Ejecutar en {len(names)} perfiles")
+    win.transient(root)
+    ttk.Label(win, text="Acción:").grid(row=0, column=0, padx=8, pady=8, sticky="w")
+    action_var = tk.StringVar(value=options[0])
+    ttk.Combobox(win, textvariable=action_var, values=options, state="readonly", width=40).grid(row=0, column=1, padx=8, pady=8)
+    ttk.Label(win, text="En paralelo:").grid(row=1, column=0, padx=8, pady=8, sticky="w")
+    workers_var = tk.IntVar(value=config.get("fanout_workers", fanout.DEFAULT_WORKERS))
+    ttk.Spinbox(win, from_=1, to=64, textvariable=workers_var, width=6).grid(row=1, column=1, padx=8, pady=8, sticky="w")
+
+    def go():
+        action = action_var.get()
+        try:
+            config["fanout_workers"] = max(1, int(workers_var.get()))
+            save_config()
+        except (tk.TclError, ValueError):
+            pass
+        win.destroy()
+
+        def worker():
+            serials = []
+            for n in names:
+                s = profile_serial(n)
+                if s:
+                    serials.append(s)
+                else:
+                    gui_log(f"No se encontró IP para el perfil '{n}'", level="error")
+            if not serials:
+                return
+            if action == "Install APK…":
+                jobs.post(install_apk_fanout, serials)
+            elif action.startswith("Batch: "):
+                path = os.path.join(PROJECT_ROOT, action[len("Batch: "):])
+                run_fanout(action, lambda s: run_batch_file(path, s), serials)
+            else:
+                run_fanout(action, device_actions[action], serials)
+
+        run_in_thread(worker, device=None)
+
+    ttk.Button(win, text="Ejecutar", command=go).grid(row=2, column=0, columnspan=2, pady=8)
+
+
+STATE_COLORS = {"online": "#2e9e44", "offline": "#c98a00", "unauthorized": "#c98a00", "disconnected": "gray"}
+
+
+def _profile_label(name):
+    state, latency = health.status(name)
+    extra = f" · {latency:.0f} ms" if latency is not None else ""
+    return f"{name}    [{state}{extra}]"
+
+
+def update_profile_row(name):
+    """Repinta solo la fila del perfil (estado/latencia del monitor), conservando la selección."""
+    i = profile_rows.get(name)
+    if i is None:
+        return
+    selected = profile_listbox.selection_includes(i)
+    profile_listbox.delete(i)
+    profile_listbox.insert(i, _profile_label(name))
+    profile_listbox.itemconfig(i, foreground=STATE_COLORS.get(health.status(name)[0], "gray"))
+    if selected:
+        profile_listbox.selection_set(i)
+
+
+def _insert_profile_rows(i, names):
+    profile_listbox.insert(i, *(_profile_label(n) for n in names))
+    for k, name in enumerate(names, i):
+        profile_listbox.itemconfig(k, foreground=STATE_COLORS.get(health.status(name)[0], "gray"))
+
+
+def _sync_profile_rows(names):
+    """Lleva el listbox de profile_names a `names` borrando/insertando solo las filas que
+    cambian (las demás conservan selección y scroll). Las dos listas van en orden de alta
+    del almacén, así que basta un recorrido a la par."""
+    old, new_set, old_set = profile_names, set(names), set(profile_names)
+    i = j = row = 0
+    while i < len(old) or j < len(names):
+        if i < len(old) and j < len(names) and old[i] == names[j]:
+            i, j, row = i + 1, j + 1, row + 1
+        elif i < len(old) and old[i] not in new_set:
+            k = i
+            while k < len(old) and old[k] not in new_set:
+                k += 1
+            profile_listbox.delete(row, row + k - i - 1)
+            i = k
+        elif j < len(names) and names[j] not in old_set:
+            k = j
+            while k < len(names) and names[k] not in old_set:
+                k += 1
+            _insert_profile_rows(row, names[j:k])
+            row, j = row + k - j, k
+        else:
+            # orden distinto (no debería pasar): se repinta todo
+            profile_listbox.delete(0, tk.END)
+            _insert_profile_rows(0, names)
+            break
+    profile_names[:] = names
+    profile_rows.clear()
+    profile_rows.update((name, i) for i, name in enumerate(names))
+
+
+def apply_profile_filter():
+    names = perfiles.search(profile_search_var.get())
+    _sync_profile_rows(names)
+    total = len(perfiles)
+    profile_count_label.config(text=f"{len(names)} de {total}" if len(names) != total else f"{total} perfiles")
+    show_profile_details()
 
 
 def refresh_profiles_list():
-    profile_listbox.delete(0, tk.END)
-    for name in perfiles:
-        profile_listbox.insert(tk.END, name)
-    # actualizar detalle cuando cambie selection
-    try:
-        profile_listbox.bind('<<ListboxSelect>>', lambda e: show_profile_details())
-    except Exception:
-        pass
+    """Tras cambiar perfiles: el monitor vigila todos, el listbox solo los que pasan la búsqueda."""
+    health.set_targets({n: cached_profile_serial(n) for n in perfiles})
+    mac_ip_cache.set_watched(p.get("mac") for p in perfiles.values())
+    apply_profile_filter()
 
 
 def show_profile_details():
@@ -711,6 +1308,15 @@ def show_profile_details():
         return
     p = perfiles.get(name, {})
     txt = f"Nombre: {name}\nMAC: {p.get('mac')}\nIP: {p.get('ip')}\nPuerto: {p.get('port')}\nNotas: {p.get('notes', '')}\n"
+    if p.get("tags"):
+        txt += f"Etiquetas: {', '.join(p['tags'])}\n"
+    txt += f"scrcpy: {(p.get('scrcpy') or {}).get('preset', scrcpy_manager.DEFAULT_PRESET)}\n"
+    state, latency = health.status(name)
+    txt += f"Estado: {state}" + (f" ({latency:.0f} ms)" if latency is not None else "") + "\n"
+    serial = cached_profile_serial(name)
+    cached = device_info.summary(serial) if serial else ""
+    if cached:
+        txt += "\n" + cached + "\n"
     detail_text.config(state=tk.NORMAL)
     detail_text.delete(1.0, tk.END)
     detail_text.insert(tk.END, txt)
@@ -737,29 +1343,54 @@ cmds_outer.columnconfigure(0, weight=1)
 # -----------------
 # Definir comandos
 # -----------------
+# Acciones por dispositivo: fn(serial) -> rc. serial=None = dispositivo por defecto.
+# Son las que se pueden lanzar en varios perfiles a la vez (fan-out).
+device_actions = {
+    "Home": lambda s=None: exec_adb(["shell", "input", "keyevent", "3"], s),
+    "Power": lambda s=None: exec_adb(["shell", "input", "keyevent", "26"], s),
+    "Vol +": lambda s=None: exec_adb(["shell", "input", "keyevent", "24"], s),
+    "Vol -": lambda s=None: exec_adb(["shell", "input", "keyevent", "25"], s),
+    "Screenshot": lambda s=None: take_screenshot(s),
+    "Spotify": lambda s=None: launch_app("com.spotify.music", s),
+    "YouTube": lambda s=None: launch_app("com.google.android.youtube", s),
+    "Crazy taps": lambda s=None: crazy_taps(s),
+    "Reboot": lambda s=None: exec_adb(["reboot"], s),
+    "Get device info": lambda s=None: log_device_info(s),
+}
+
 commands = [
-    ("Home", lambda: run_in_thread(lambda: exec_adb(["shell", "input", "keyevent", "3"]))),
-    ("Power", lambda: run_in_thread(lambda: exec_adb(["shell", "input", "keyevent", "26"]))),
-    ("Vol +", lambda: run_in_thread(lambda: exec_adb(["shell", "input", "keyevent", "24"]))),
-    ("Vol -", lambda: run_in_thread(lambda: exec_adb(["shell", "input", "keyevent", "25"]))),
-    ("Screenshot", lambda: run_in_thread(lambda: exec_adb(["shell", "screencap", "-p", "/sdcard/screen.png"]) or exec_adb(["pull", "/sdcard/screen.png", os.path.join(PROJECT_ROOT, "screenshot.png")] ))),
-    ("Spotify", lambda: run_in_thread(lambda: exec_adb(["shell", "monkey", "-p", "com.spotify.music", "-c", "android.intent.category.LAUNCHER", "1"]))),
-    ("YouTube", lambda: run_in_thread(lambda: exec_adb(["shell", "monkey", "-p", "com.google.android.youtube", "-c", "android.intent.category.LAUNCHER", "1"]))),
-    ("Crazy taps", lambda: run_in_thread(lambda: [exec_adb(["shell", "input", "tap", "500", "1000"]) for _ in range(8)])),
-    ("ADB devices", lambda: run_in_thread(adb_devices)),
-    ("Disconnect all", lambda: run_in_thread(adb_disconnect_all)),
-    ("Reboot", lambda: run_in_thread(reboot_device)),
-    ("Install APK", lambda: run_in_thread(install_apk)),
-    ("Uninstall app", lambda: run_in_thread(uninstall_app)),
-    ("Start scrcpy", lambda: run_in_thread(start_scrcpy)),
+    ("Home", lambda: run_in_thread(device_actions["Home"])),
+    ("Power", lambda: run_in_thread(device_actions["Power"])),
+    ("Vol +", lambda: run_in_thread(device_actions["Vol +"])),
+    ("Vol -", lambda: run_in_thread(device_actions["Vol -"])),
+    ("Screenshot", lambda: run_in_thread(device_actions["Screenshot"])),
+    ("Spotify", lambda: run_in_thread(device_actions["Spotify"])),
+    ("YouTube", lambda: run_in_thread(device_actions["YouTube"])),
+    ("Crazy taps", lambda: run_in_thread(device_actions["Crazy taps"])),
+    # estas ya encolan su propio trabajo (o abren diálogos, que deben ir en el hilo de Tk)
+    ("ADB devices", adb_devices),
+    ("Disconnect all", adb_disconnect_all),
+    ("Reboot", reboot_device),
+    ("Install APK", install_apk),
+    ("Uninstall app", uninstall_app),
+    ("Start scrcpy", start_scrcpy),
     ("Stop scrcpy", lambda: run_in_thread(stop_scrcpy)),
-    ("Start screenrecord", lambda: run_in_thread(start_screenrecord)),
-    ("Stop screenrecord & pull", lambda: run_in_thread(stop_screenrecord_and_pull)),
-    ("Pull file", lambda: run_in_thread(pull_file)),
-    ("Push file", lambda: run_in_thread(push_file)),
-    ("Get device info", lambda: run_in_thread(get_device_info)),
-    ("Dump logcat (one-shot)", lambda: run_in_thread(dump_logcat)),
-    ("Open shell (new window)", lambda: run_in_thread(open_shell_window)),
+    ("Start screenrecord", start_screenrecord),
+    ("Stop screenrecord", stop_screenrecord),
+    ("Record input", start_input_recording),
+    ("Stop input recording", stop_input_recording),
+    ("Replay input…", replay_input),
+    ("Pull file", pull_file),
+    ("Push file", push_file),
+    ("Sync push dir", sync_push_dir),
+    ("Sync pull dir", sync_pull_dir),
+    ("Get device info", get_device_info),
+    ("Launch times…", show_launch_times),
+    ("Send text…", send_text),
+    ("Tap element…", tap_element),
+    ("Dump logcat (one-shot)", dump_logcat),
+    ("Open shell (new window)", open_shell_window),
+    ("Cancel jobs", cancel_jobs),
 ]
 
 # -----------------
@@ -807,9 +1438,33 @@ btn_refresh_batch.grid(row=0, column=1, padx=6)
 btn_run_batch = ttk.Button(batch_frame, text="Ejecutar", command=lambda: run_batch())
 btn_run_batch.grid(row=0, column=2, padx=6)
 
+btn_stop_batch = ttk.Button(batch_frame, text="Parar", command=lambda: stop_batch())
+btn_stop_batch.grid(row=0, column=3, padx=6)
+
+btn_import_bat = ttk.Button(batch_frame, text="Importar .bat…", command=lambda: import_bat_file())
+btn_import_bat.grid(row=0, column=4, padx=6)
+
 # Por si quieres ver ruta completa
-batch_note = ttk.Label(batch_frame, text="Busca .bat en la carpeta del proyecto (root)")
-batch_note.grid(row=1, column=0, columnspan=3, pady=(6,0), sticky="w")
+batch_note = ttk.Label(batch_frame, text="Busca .macro y .bat en la carpeta del proyecto (root)")
+batch_note.grid(row=1, column=0, columnspan=5, pady=(6,0), sticky="w")
+
+# ----------------------
+# Pestaña Logcat (en vivo, con filtros y buffer circular)
+# ----------------------
+
+logcat_view = LogcatView(tab_logcat, on_start=lambda: start_live_logcat(), on_stop=lambda: stop_live_logcat())
+logcat_view.grid(row=0, column=0, sticky="nsew")
+tab_logcat.rowconfigure(0, weight=1)
+tab_logcat.columnconfigure(0, weight=1)
+
+# ----------------------
+# Pestaña Telemetría (CPU, memoria, batería, temperatura, FPS; ver telemetry)
+# ----------------------
+
+telemetry_view = TelemetryView(tab_telemetria, on_start=lambda pkg: start_telemetry(pkg), on_stop=lambda: stop_telemetry())
+telemetry_view.grid(row=0, column=0, sticky="nsew")
+tab_telemetria.rowconfigure(0, weight=1)
+tab_telemetria.columnconfigure(0, weight=1)
 
 # ----------------------
 # Consola inferior (splitter) 
@@ -835,7 +1490,7 @@ status.pack(side=tk.BOTTOM, fill=tk.X)
 
 def refresh_batch_files():
     try:
-        files = [f for f in os.listdir(PROJECT_ROOT) if f.lower().endswith('.bat')]
+        files = sorted(f for f in os.listdir(PROJECT_ROOT) if f.lower().endswith(('.bat', macro_engine.MACRO_EXT)))
     except Exception:
         files = []
     batch_combobox['values'] = files
@@ -853,20 +1508,87 @@ def run_batch():
         gui_log("El batch seleccionado no existe", level="error")
         return
     gui_log(f"▶️ Ejecutando batch: {file}", level="cmd")
+    global _batch_job
+    if path.lower().endswith(macro_engine.MACRO_EXT):
+        _batch_job = submit_macro(path)
+    else:
+        _batch_job = submit_batch(path)
 
-    def worker():
-        # Ejecutar .bat con shell=True en Windows
-        try:
-            proc = subprocess.Popen(path, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            out, err = proc.communicate()
-            if out:
-                gui_log(out.strip(), level="info")
-            if err:
-                gui_log(err.strip(), level="error")
-        except Exception as e:
-            gui_log(f"Error ejecutando batch: {e}", level="error")
 
-    run_in_thread(worker)
+def stop_batch():
+    global _batch_job
+    if _batch_job and not _batch_job.done():
+        _batch_job.cancel()
+        gui_log("Batch/macro detenido", level="info")
+    _batch_job = None
+
+
+def import_bat_file():
+    """Convierte un .bat (p.ej. de antique_bats/) en .macro en la carpeta del proyecto."""
+    src = filedialog.askopenfilename(title="Selecciona .bat", initialdir=PROJECT_ROOT / "antique_bats",
+                                     filetypes=[("Batch", "*.bat"), ("Todos", "*.*")])
+    if not src:
+        return
+    try:
+        with open(src, "r", encoding="utf-8", errors="replace") as f:
+            text, warnings = macro_engine.import_bat(f.read())
+        macro_engine.parse(text)
+        dst = PROJECT_ROOT / (os.path.splitext(os.path.basename(src))[0] + macro_engine.MACRO_EXT)
+        if dst.exists() and not messagebox.askyesno("Importar", f"{dst.name} ya existe. ¿Reemplazar?"):
+            return
+        with open(dst, "w", encoding="utf-8") as f:
+            f.write(text)
+    except Exception as e:
+        gui_log(f"No se pudo importar {src}: {e}", level="error")
+        return
+    gui_log(f"Importado {os.path.basename(src)} → {dst.name}", level="info")
+    for w in warnings:
+        gui_log(f"  sin traducir (queda comentado): {w}", level="error")
+    refresh_batch_files()
+    batch_var.set(dst.name)
+
+
+def submit_batch(path, serial=None):
+    """Lanza un .bat como proceso del motor; la salida se vuelca línea a línea.
+    Con serial, los `adb` del script van a ese dispositivo vía ANDROID_SERIAL."""
+    env = dict(os.environ, ANDROID_SERIAL=serial) if serial else None
+    argv = ["cmd", "/c", path] if sys.platform.startswith("win") else ["sh", path]
+
+    def done(rc, exc):
+        if exc is not None:
+            gui_log(f"Error ejecutando batch: {exc}", level="error")
+
+    return jobs.submit_process(argv, device=serial, name=os.path.basename(path), on_output=_log_lines, on_done=done, env=env)
+
+
+def _run_macro(path, serial=None, cancel=None):
+    prefix = f"[{serial}] " if serial else ""
+    program = macro_engine.load(path)
+    return macro_engine.run_macro(program, serial, cancel=cancel,
+                                  on_output=lambda line, level: gui_log(prefix + line, level=level))
+
+
+def submit_macro(path, serial=None):
+    """Lanza una .macro en el motor (cancelable); la salida va a la consola según se produce."""
+    def done(rc, exc):
+        if exc is not None:
+            gui_log(f"Error en macro {os.path.basename(path)}: {exc}", level="error")
+        elif rc == 0:
+            gui_log(f"Macro {os.path.basename(path)} terminada", level="info")
+
+    return jobs.submit(_run_macro, path, serial, device=serial, name=os.path.basename(path),
+                       on_done=done, pass_cancel=True)
+
+
+def run_batch_file(path, serial=None):
+    """Versión bloqueante (para fan-out): espera al batch/macro y devuelve su código de salida."""
+    try:
+        if path.lower().endswith(macro_engine.MACRO_EXT):
+            return submit_macro(path, serial).result()
+        return submit_batch(path, serial).result()
+    except Exception as e:
+        gui_log(f"Error ejecutando batch: {e}", level="error")
+        return -1
 
 # ----------------------
 # Inicialización final
@@ -875,7 +1597,15 @@ load_profiles()
 refresh_profiles_list()
 refresh_batch_files()
 apply_theme(root)
+mac_ip_cache.start_background_refresh()
+health.start()
+jobs.poll_tk(root)
+console_log.max_lines = config.get("log_max_lines", log_sink.DEFAULT_MAX_LINES)
+if config.get("log_to_file", False):
+    console_log.set_log_file(LOG_FILE)
+console_log.attach(root, text_log, _prepare_log_tag)
 
 # Lanzar la app
 root.mainloop()
+stop_all_telemetry()
 
@@ -0,0 +1,270 @@
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+
+# ----------------------
+# Almacén de perfiles en SQLite (profiles.db)
+# ----------------------
+# devices.json se reescribía entero en cada alta/edición/baja y sin renombrado atómico:
+# un cierre a mitad de escritura lo dejaba truncado. Aquí cada cambio es una transacción
+# de una fila (journal WAL), con índices por nombre (clave primaria), MAC, IP y etiquetas.
+# La primera vez se importa devices.json si existe (el fichero se deja como copia);
+# Exportar/Importar siguen hablando JSON, escrito con .tmp + os.replace.
+#
+# Las lecturas van a una copia en memoria (dict en orden de alta), así que el almacén
+# se usa como el dict de antes (perfiles.get(nombre), `nombre in perfiles`) desde
+# cualquier hilo. search() filtra con:
+#   pixel            subcadena en nombre, MAC, IP, notas o etiquetas
+#   tag:lab          etiqueta que empieza por "lab"
+#   mac:aa:bb  ip:192.168.1.   prefijo de MAC / IP
+# (varios términos = todos). Si la consulta nueva solo es más estricta que la anterior
+# (más caracteres o más términos) se filtra sobre el resultado anterior.
+
+FIELDS = ("tag", "mac", "ip")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    name TEXT PRIMARY KEY,
+    mac  TEXT,
+    ip   TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS profiles_mac ON profiles(mac);
+CREATE INDEX IF NOT EXISTS profiles_ip ON profiles(ip);
+CREATE TABLE IF NOT EXISTS profile_tags (
+    tag  TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (tag, name)
+);
+CREATE INDEX IF NOT EXISTS profile_tags_name ON profile_tags(name);
+"""
+
+
+class ProfileStoreError(Exception):
+    pass
+
+
+def normalize_mac(mac):
+    return (mac or "").strip().lower().replace("-", ":")
+
+
+def normalize_tags(tags):
+    """Lista de etiquetas sin repetir, en minúsculas; acepta lista o "a, b, c"."""
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    out = []
+    for t in tags or ():
+        t = str(t).strip().lower()
+        if t and t not in out:
+            out.append(t)
+    return out
+
+
+# ----------------------
+# Consultas
+# ----------------------
+class ProfileQuery:
+    def __init__(self, text=""):
+        self.text = text or ""
+        self.terms = []         # [(campo o "", valor)]
+        for token in self.text.lower().split():
+            field, sep, value = token.partition(":")
+            if sep and field in FIELDS:
+                if value:
+                    self.terms.append((field, normalize_mac(value) if field == "mac" else value))
+            else:
+                self.terms.append(("", token))
+
+    def is_empty(self):
+        return not self.terms
+
+    def match(self, hay, profile):
+        for field, value in self.terms:
+            if field == "tag":
+                if not any(t.startswith(value) for t in profile.get("tags") or ()):
+                    return False
+            elif field == "mac":
+                if not normalize_mac(profile.get("mac")).startswith(value):
+                    return False
+            elif field == "ip":
+                if not (profile.get("ip") or "").startswith(value):
+                    return False
+            elif value not in hay:
+                return False
+        return True
+
+    def narrows(self, old):
+        """True si todo lo que pasa esta consulta pasaba también `old`."""
+        if old is None:
+            return False
+        for field, value in old.terms:
+            if not any(f == field and (value in v if not f else v.startswith(value))
+                       for f, v in self.terms):
+                return False
+        return True
+
+
+# ----------------------
+# Almacén
+# ----------------------
+class ProfileStore(MutableMapping):
+    def __init__(self, path, legacy_json=None):
+        self.path = str(path)
+        self._lock = threading.RLock()
+        try:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+        except sqlite3.Error as e:
+            raise ProfileStoreError(f"{self.path}: {e}") from e
+        self._profiles = {}
+        self._hay = {}          # nombre -> texto en minúsculas para search()
+        self._last = (None, None)   # (ProfileQuery, [nombres]) de la última búsqueda
+        for name, data in self._db.execute("SELECT name, data FROM profiles ORDER BY rowid"):
+            self._cache(name, json.loads(data))
+        if not self._profiles and legacy_json and os.path.exists(legacy_json):
+            try:
+                with open(legacy_json, "r", encoding="utf-8") as f:
+                    self.update_many(json.load(f))
+            except (OSError, ValueError):
+                pass
+
+    # --- copia en memoria ---
+    def _cache(self, name, profile):
+        self._profiles[name] = profile
+        self._hay[name] = "\n".join([name, normalize_mac(profile.get("mac")), profile.get("ip") or "",
+                                     profile.get("notes") or ""] + list(profile.get("tags") or ())).lower()
+        self._last = (None, None)
+
+    def _uncache(self, name):
+        self._profiles.pop(name, None)
+        self._hay.pop(name, None)
+        self._last = (None, None)
+
+    # --- escritura (una transacción por llamada) ---
+    @staticmethod
+    def _clean(profile):
+        profile = dict(profile or {})
+        profile["tags"] = normalize_tags(profile.get("tags"))
+        return profile
+
+    def _write(self, name, profile):
+        self._db.execute(
+            "INSERT INTO profiles (name, mac, ip, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET mac=excluded.mac, ip=excluded.ip, data=excluded.data",
+            (name, normalize_mac(profile.get("mac")) or None, profile.get("ip") or None,
+             json.dumps(profile, ensure_ascii=False)))
+        self._db.execute("DELETE FROM profile_tags WHERE name = ?", (name,))
+        self._db.executemany("INSERT INTO profile_tags (tag, name) VALUES (?, ?)",
+                             [(t, name) for t in profile["tags"]])
+
+    def __setitem__(self, name, profile):
+        self.update_many({name: profile})
+
+    def update_many(self, profiles):
+        """Alta/reemplazo de varios perfiles en una sola transacción (importar)."""
+        cleaned = {str(name): self._clean(p) for name, p in dict(profiles).items()}
+        with self._lock:
+            try:
+                with self._db:
+                    for name, profile in cleaned.items():
+                        self._write(name, profile)
+            except sqlite3.Error as e:
+                raise ProfileStoreError(f"Error guardando perfiles: {e}") from e
+            for name, profile in cleaned.items():
+                self._cache(name, profile)
+        return len(cleaned)
+
+    def __delitem__(self, name):
+        with self._lock:
+            if name not in self._profiles:
+                raise KeyError(name)
+            try:
+                with self._db:
+                    self._db.execute("DELETE FROM profile_tags WHERE name = ?", (name,))
+                    self._db.execute("DELETE FROM profiles WHERE name = ?", (name,))
+            except sqlite3.Error as e:
+                raise ProfileStoreError(f"Error borrando el perfil '{name}': {e}") from e
+            self._uncache(name)
+
+    # --- lectura ---
+    def __getitem__(self, name):
+        return self._profiles[name]
+
+    def __contains__(self, name):
+        return name in self._profiles
+
+    def __iter__(self):
+        return iter(list(self._profiles))
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def _names(self, sql, args):
+        with self._lock:
+            return [row[0] for row in self._db.execute(sql, args)]
+
+    def by_mac(self, mac):
+        return self._names("SELECT name FROM profiles WHERE mac = ? ORDER BY rowid", (normalize_mac(mac),))
+
+    def by_ip(self, ip):
+        return self._names("SELECT name FROM profiles WHERE ip = ? ORDER BY rowid", (ip,))
+
+    def by_tag(self, tag):
+        return self._names("SELECT p.name FROM profile_tags t JOIN profiles p ON p.name = t.name "
+                           "WHERE t.tag = ? ORDER BY p.rowid", (tag.strip().lower(),))
+
+    def tags(self):
+        return self._names("SELECT DISTINCT tag FROM profile_tags ORDER BY tag", ())
+
+    def search(self, text=""):
+        """Nombres que cumplen la consulta, en orden de alta."""
+        query = ProfileQuery(text)
+        with self._lock:
+            if query.is_empty():
+                return list(self._profiles)
+            old, found = self._last
+            src = found if found is not None and query.narrows(old) else self._profiles
+            profiles, hay = self._profiles, self._hay
+            found = [n for n in src if n in profiles and query.match(hay[n], profiles[n])]
+            self._last = (query, found)
+            return list(found)
+
+    # --- JSON ---
+    def export_json(self, path):
+        """Escribe todos los perfiles en el formato de devices.json. Devuelve cuántos."""
+        with self._lock:
+            data = dict(self._profiles)
+        tmp = str(path) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        os.replace(tmp, path)
+        return len(data)
+
+    def import_json(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ProfileStoreError(f"{path}: se esperaba un objeto {{nombre: perfil}}")
+        return self.update_many(data)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(path, legacy_json=None):
+    """Un ProfileStore por fichero y proceso."""
+    key = os.path.abspath(str(path))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ProfileStore(path, legacy_json)
+        return store
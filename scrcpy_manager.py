@@ -0,0 +1,151 @@
+import re
+import subprocess
+import threading
+import time
+
+# ----------------------
+# Sesiones scrcpy: un proceso por dispositivo
+# ----------------------
+# Cada sesión lee la salida de scrcpy en un hilo propio (si nadie lee los pipes,
+# un scrcpy hablador se bloquea al llenarse el buffer). De esa salida se sacan:
+#   - el tiempo de arranque (hasta que scrcpy crea la textura del primer frame)
+#   - los fps y frames descartados que imprime --print-fps
+
+PRESETS = {
+    "baja latencia": {"max_size": 1024, "bit_rate": "4M", "max_fps": 60, "codec": "h264", "no_audio": True},
+    "equilibrado": {"max_size": 1600, "bit_rate": "8M", "max_fps": 60, "codec": "h264", "no_audio": False},
+    "calidad": {"max_size": 0, "bit_rate": "16M", "max_fps": 0, "codec": "h265", "no_audio": False},
+    "ahorro": {"max_size": 800, "bit_rate": "2M", "max_fps": 30, "codec": "h264", "no_audio": True},
+}
+DEFAULT_PRESET = "equilibrado"
+
+_READY_RE = re.compile(r"Texture:\s*(\d+)x(\d+)")
+_FPS_RE = re.compile(r"(\d+) fps(?: \(\+(\d+) frames? skipped\))?")
+
+
+def is_fps_line(line):
+    return bool(_FPS_RE.search(line))
+
+
+def resolve_options(profile_opts=None):
+    """Opciones finales: preset (por nombre) + ajustes sueltos del perfil encima."""
+    profile_opts = dict(profile_opts or {})
+    opts = dict(PRESETS.get(profile_opts.pop("preset", DEFAULT_PRESET), PRESETS[DEFAULT_PRESET]))
+    opts.update({k: v for k, v in profile_opts.items() if v not in (None, "")})
+    return opts
+
+
+def build_args(serial=None, options=None, exe="scrcpy"):
+    opts = resolve_options(options)
+    args = [exe]
+    if serial:
+        args += ["--serial", serial]
+    if opts.get("max_size"):
+        args.append(f"--max-size={opts['max_size']}")
+    if opts.get("bit_rate"):
+        args.append(f"--video-bit-rate={opts['bit_rate']}")
+    if opts.get("max_fps"):
+        args.append(f"--max-fps={opts['max_fps']}")
+    if opts.get("codec"):
+        args.append(f"--video-codec={opts['codec']}")
+    if opts.get("no_audio"):
+        args.append("--no-audio")
+    args.append("--print-fps")
+    return args
+
+
+class ScrcpySession:
+    def __init__(self, serial, args, on_line=None):
+        self.serial = serial
+        self.args = args
+        self.on_line = on_line
+        self.proc = None
+        self.started_at = None
+        self.startup_time = None   # s hasta el primer frame
+        self.resolution = None
+        self.fps = None            # último valor de --print-fps
+        self.frames_skipped = 0    # acumulado
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self.proc = subprocess.Popen(self.args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                     text=True, encoding="utf-8", errors="replace", bufsize=1)
+        threading.Thread(target=self._pump, daemon=True).start()
+
+    def running(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def _pump(self):
+        try:
+            for line in self.proc.stdout:
+                line = line.rstrip()
+                self._parse(line)
+                if self.on_line:
+                    self.on_line(self.serial, line)
+        except Exception:
+            pass
+
+    def _parse(self, line):
+        if self.startup_time is None:
+            m = _READY_RE.search(line)
+            if m:
+                self.startup_time = time.perf_counter() - self.started_at
+                self.resolution = (int(m.group(1)), int(m.group(2)))
+                return
+        m = _FPS_RE.search(line)
+        if m:
+            self.fps = int(m.group(1))
+            self.frames_skipped += int(m.group(2) or 0)
+
+    def stop(self, timeout=5):
+        if not self.proc:
+            return
+        try:
+            self.proc.terminate()
+            self.proc.wait(timeout=timeout)
+        except Exception:
+            try:
+                self.proc.kill()
+            except Exception:
+                pass
+
+    def stats(self):
+        return {"serial": self.serial, "running": self.running(), "startup_time": self.startup_time,
+                "resolution": self.resolution, "fps": self.fps, "frames_skipped": self.frames_skipped}
+
+
+class ScrcpyManager:
+    def __init__(self, exe="scrcpy"):
+        self.exe = exe
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def start(self, serial=None, options=None, on_line=None):
+        """Arranca scrcpy para el dispositivo. Lanza RuntimeError si ya hay uno vivo."""
+        with self._lock:
+            sess = self.sessions.get(serial)
+            if sess and sess.running():
+                raise RuntimeError(f"scrcpy ya está en ejecución para {serial or 'el dispositivo por defecto'}")
+            sess = ScrcpySession(serial, build_args(serial, options, self.exe), on_line)
+            sess.start()
+            self.sessions[serial] = sess
+            return sess
+
+    def stop(self, serial=None):
+        with self._lock:
+            sess = self.sessions.pop(serial, None)
+        if sess:
+            sess.stop()
+        return sess
+
+    def stop_all(self):
+        with self._lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+        for sess in sessions:
+            sess.stop()
+        return sessions
+
+    def running(self):
+        with self._lock:
+            return [s for s in self.sessions.values() if s.running()]
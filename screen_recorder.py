@@ -0,0 +1,145 @@
+import socket
+import subprocess
+import threading
+import time
+
+import adb_protocol
+import adb_session
+
+# ----------------------
+# Grabación de pantalla en streaming al host
+# ----------------------
+# `screenrecord --output-format=h264 -` escribe el vídeo por stdout: se lee por
+# exec: (sin fichero en /sdcard ni pull final) y se va escribiendo en disco por
+# trozos. screenrecord corta a los 3 minutos, así que al terminar un segmento se
+# encadena el siguiente en el mismo fichero (un flujo H.264 crudo se puede
+# concatenar: cada segmento empieza con su SPS/PPS).
+# Para parar se manda SIGINT al screenrecord del dispositivo, que cierra el
+# flujo limpiamente; su PID se obtiene con `echo $$` antes de hacer exec.
+
+CHUNK = 64 * 1024
+SEGMENT_SECONDS = 180
+STOP_TIMEOUT = 5
+
+
+class ScreenRecorder:
+    def __init__(self, path, serial=None, adb="adb", bit_rate=None, size=None,
+                 segment_seconds=SEGMENT_SECONDS, on_segment=None):
+        self.path = path
+        self.serial = serial
+        self.adb = adb
+        self.bit_rate = bit_rate
+        self.size = size
+        self.segment_seconds = segment_seconds
+        self.on_segment = on_segment   # on_segment(numero, bytes, segundos)
+        self.bytes_written = 0
+        self.segments = 0
+        self.error = None
+        self._pid = None
+        self._stream = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.started_at = None
+
+    def _command(self):
+        cmd = ["screenrecord", "--output-format=h264", f"--time-limit={self.segment_seconds}"]
+        if self.bit_rate:
+            cmd.append(f"--bit-rate={self.bit_rate}")
+        if self.size:
+            cmd.append(f"--size={self.size}")
+        return "echo $$; exec " + " ".join(cmd) + " -"
+
+    # --- apertura del flujo (socket del servidor adb o, si no está, adb exec-out) ---
+    def _open(self):
+        try:
+            sock = adb_protocol.get_client().open_service(f"exec:{self._command()}", self.serial)
+            sock.settimeout(None)  # con la pantalla quieta puede no llegar nada en mucho rato
+
+            def close():
+                # close() desde otro hilo no despierta el recv bloqueado; shutdown sí
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                sock.close()
+            return sock, sock.recv, close
+        except ConnectionRefusedError:
+            argv = [self.adb] + (["-s", self.serial] if self.serial else []) + ["exec-out", self._command()]
+            proc = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            return proc, proc.stdout.read1, proc.kill
+
+    @staticmethod
+    def _read_pid(read):
+        """Lee la primera línea ('<pid>\\n'); devuelve (pid, bytes sobrantes)."""
+        buf = b""
+        while b"\n" not in buf:
+            chunk = read(256)
+            if not chunk:
+                return None, buf
+            buf += chunk
+        line, rest = buf.split(b"\n", 1)
+        line = line.strip()
+        return (int(line) if line.isdigit() else None), rest
+
+    # --- ciclo ---
+    def start(self):
+        self.started_at = time.monotonic()
+        with open(self.path, "wb"):
+            pass  # truncar
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        try:
+            with open(self.path, "ab", buffering=0) as out:
+                while not self._stop.is_set():
+                    seg_start, seg_bytes = time.monotonic(), 0
+                    _, read, close = self._open()
+                    self._stream = close
+                    try:
+                        self._pid, rest = self._read_pid(read)
+                        if self._stop.is_set():
+                            # stop() llegó antes de conocer el PID: no pudo mandar SIGINT
+                            self._interrupt(self._pid, STOP_TIMEOUT)
+                        if rest:
+                            out.write(rest)
+                            seg_bytes += len(rest)
+                        while True:
+                            chunk = read(CHUNK)
+                            if not chunk:
+                                break
+                            out.write(chunk)
+                            seg_bytes += len(chunk)
+                    finally:
+                        self._pid = None
+                        close()
+                    self.segments += 1
+                    self.bytes_written += seg_bytes
+                    if self.on_segment:
+                        self.on_segment(self.segments, seg_bytes, time.monotonic() - seg_start)
+                    if seg_bytes == 0:
+                        raise RuntimeError("screenrecord no devolvió datos")
+        except Exception as e:
+            if not self._stop.is_set():
+                self.error = e
+
+    def _interrupt(self, pid, timeout):
+        if pid:
+            try:
+                adb_session.run_shell(["kill", "-INT", str(pid)], self.serial, self.adb, timeout=timeout)
+            except adb_session.AdbSessionError:
+                pass
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        """SIGINT al screenrecord del dispositivo y espera a que cierre el flujo."""
+        self._stop.set()
+        self._interrupt(self._pid, timeout)
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive() and self._stream:
+                self._stream()  # no respondió a SIGINT: cortar el flujo
+                self._thread.join(timeout)
+        return self.bytes_written
@@ -0,0 +1,280 @@
+import math
+import os
+import re
+import shlex
+import threading
+import time
+from array import array
+
+import adb_session
+
+# ----------------------
+# Telemetría del dispositivo: CPU, memoria, batería, temperatura y FPS
+# ----------------------
+# Cada INTERVAL s se lanza UN script por una sesión `adb shell` propia del muestreador
+# (no la del pool: así no hace esperar a los comandos del usuario) que imprime, con
+# separadores @sección:
+#   /proc/stat (línea cpu), /proc/meminfo, dumpsys battery, thermal_zone*/temp y,
+#   si hay app elegida, dumpsys gfxinfo <pkg> (contador de frames y frames con jank).
+# CPU y FPS salen de la diferencia con la muestra anterior (son contadores).
+#
+# Las muestras van a un RingBuffer por dispositivo: una array('d') por métrica con
+# capacidad fija (sin objetos por muestra; NaN = sin dato) y, cada FLUSH_EVERY
+# muestras, se añaden a telemetry/<serial>.csv (solo append, cabecera al crearlo).
+
+INTERVAL = 1.0
+CAPACITY = 3600               # 1 h a 1 muestra/s
+FLUSH_EVERY = 10
+TIMEOUT = 10
+
+METRICS = ("cpu", "mem_used_mb", "mem_pct", "battery", "battery_temp", "thermal", "fps", "jank_pct")
+UNITS = {"cpu": "%", "mem_used_mb": "MB", "mem_pct": "%", "battery": "%", "battery_temp": "°C",
+         "thermal": "°C", "fps": "fps", "jank_pct": "%"}
+
+NAN = float("nan")
+_SECTION_RE = re.compile(r"^@(\w+)$")
+_KV_RE = re.compile(r"^\s*([\w ]+):\s*(-?\d+)")
+_FRAMES_RE = re.compile(r"Total frames rendered:\s*(\d+)")
+_JANK_RE = re.compile(r"Janky frames:\s*(\d+)")
+
+
+def build_script(package=None):
+    parts = [
+        "echo @stat; head -n 1 /proc/stat",
+        "echo @mem; grep -E '^(MemTotal|MemAvailable):' /proc/meminfo",
+        "echo @battery; dumpsys battery",
+        "echo @thermal; cat /sys/class/thermal/thermal_zone*/temp 2>/dev/null",
+    ]
+    if package:
+        parts.append(f"echo @gfx; dumpsys gfxinfo {shlex.quote(package)} | grep -E '^(Total frames rendered|Janky frames):'")
+    return "; ".join(parts)
+
+
+def split_sections(text):
+    sections, current = {}, None
+    for line in text.splitlines():
+        m = _SECTION_RE.match(line.strip())
+        if m:
+            current = sections.setdefault(m.group(1), [])
+        elif current is not None:
+            current.append(line)
+    return sections
+
+
+def parse_cpu(lines):
+    """(ocupado, total) en jiffies de la línea `cpu` de /proc/stat."""
+    for line in lines:
+        if line.startswith("cpu "):
+            v = [int(x) for x in line.split()[1:]]
+            idle = v[3] + (v[4] if len(v) > 4 else 0)   # idle + iowait
+            total = sum(v[:8])
+            return total - idle, total
+    return None
+
+
+def parse_meminfo(lines):
+    kv = {}
+    for line in lines:
+        m = _KV_RE.match(line)
+        if m:
+            kv[m.group(1)] = int(m.group(2))
+    total, avail = kv.get("MemTotal"), kv.get("MemAvailable")
+    if not total or avail is None:
+        return NAN, NAN
+    return (total - avail) / 1024, 100.0 * (total - avail) / total
+
+
+def parse_battery(lines):
+    """(nivel %, temperatura °C) de `dumpsys battery`."""
+    kv = {}
+    for line in lines:
+        m = _KV_RE.match(line)
+        if m:
+            kv[m.group(1).strip()] = int(m.group(2))
+    level = kv.get("level")
+    temp = kv.get("temperature")
+    return (float(level) if level is not None else NAN), (temp / 10 if temp is not None else NAN)
+
+
+def parse_thermal(lines):
+    """Temperatura máxima de las thermal zones (miligrados en casi todos los kernels)."""
+    temps = []
+    for line in lines:
+        line = line.strip()
+        if line.lstrip("-").isdigit():
+            t = int(line)
+            temps.append(t / 1000 if abs(t) > 200 else float(t))
+    temps = [t for t in temps if 0 < t < 150]   # zonas sin sensor dan 0 o valores absurdos
+    return max(temps) if temps else NAN
+
+
+def parse_gfx(lines):
+    """(frames totales, frames con jank) del resumen de gfxinfo, o None."""
+    text = "\n".join(lines)
+    frames, jank = _FRAMES_RE.search(text), _JANK_RE.search(text)
+    if not frames:
+        return None
+    return int(frames.group(1)), int(jank.group(1)) if jank else 0
+
+
+# ----------------------
+# Buffer circular columnar
+# ----------------------
+class RingBuffer:
+    def __init__(self, metrics=METRICS, capacity=CAPACITY):
+        self.metrics = tuple(metrics)
+        self.capacity = capacity
+        self.ts = array("d", bytes(8 * capacity))
+        self.columns = {m: array("d", [NAN]) * capacity for m in self.metrics}
+        self.count = 0          # muestras añadidas desde el principio
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, ts, values):
+        with self._lock:
+            i = self.count % self.capacity
+            self.ts[i] = ts
+            for m, col in self.columns.items():
+                col[i] = values.get(m, NAN)
+            self.count += 1
+
+    def _order(self, n):
+        size = len(self)
+        n = size if n is None else min(n, size)
+        start = self.count - n
+        return [(start + k) % self.capacity for k in range(n)]
+
+    def series(self, metric, n=None):
+        """Los últimos n valores de una métrica, del más antiguo al más reciente."""
+        with self._lock:
+            col = self.columns[metric]
+            return [col[i] for i in self._order(n)]
+
+    def times(self, n=None):
+        with self._lock:
+            return [self.ts[i] for i in self._order(n)]
+
+    def last(self, metric):
+        with self._lock:
+            if not self.count:
+                return NAN
+            return self.columns[metric][(self.count - 1) % self.capacity]
+
+    def rows(self, since):
+        """Filas (ts, valores...) con índice absoluto >= since (para volcar a disco)."""
+        with self._lock:
+            first = max(since, self.count - self.capacity)
+            idx = [k % self.capacity for k in range(first, self.count)]
+            return [(self.ts[i], *(self.columns[m][i] for m in self.metrics)) for i in idx]
+
+
+# ----------------------
+# Muestreador
+# ----------------------
+class TelemetrySampler:
+    def __init__(self, serial=None, adb="adb", interval=INTERVAL, package=None,
+                 capacity=CAPACITY, log_dir=None, on_sample=None):
+        self.serial = serial
+        self.adb = adb
+        self.interval = interval
+        self.package = package
+        self.buffer = RingBuffer(capacity=capacity)
+        self.log_path = None
+        if log_dir:
+            name = re.sub(r"[^0-9A-Za-z.-]", "_", serial or "default")
+            self.log_path = os.path.join(str(log_dir), f"{name}.csv")
+        self.on_sample = on_sample
+        self.error = None
+        self._session = adb_session.ShellSession(serial, adb)
+        self._prev_cpu = None
+        self._prev_gfx = None       # (paquete, t, frames, jank)
+        self._flushed = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def set_package(self, package):
+        self.package = package or None
+        self._prev_gfx = None
+
+    # --- una muestra ---
+    def sample(self):
+        package = self.package
+        _, out, _ = self._session.run(build_script(package), timeout=TIMEOUT)
+        now = time.time()
+        sec = split_sections(out)
+        values = {}
+
+        cpu = parse_cpu(sec.get("stat", []))
+        if cpu and self._prev_cpu:
+            busy, total = cpu[0] - self._prev_cpu[0], cpu[1] - self._prev_cpu[1]
+            values["cpu"] = 100.0 * busy / total if total > 0 else NAN
+        self._prev_cpu = cpu
+        values["mem_used_mb"], values["mem_pct"] = parse_meminfo(sec.get("mem", []))
+        values["battery"], values["battery_temp"] = parse_battery(sec.get("battery", []))
+        values["thermal"] = parse_thermal(sec.get("thermal", []))
+
+        gfx = parse_gfx(sec.get("gfx", [])) if package else None
+        prev = self._prev_gfx
+        if gfx and prev and prev[0] == package and gfx[0] >= prev[2]:
+            frames, jank = gfx[0] - prev[2], gfx[1] - prev[3]
+            values["fps"] = frames / (now - prev[1]) if now > prev[1] else NAN
+            values["jank_pct"] = 100.0 * jank / frames if frames else 0.0
+        self._prev_gfx = (package, now, *gfx) if gfx else None
+
+        self.buffer.append(now, values)
+        if self.on_sample:
+            self.on_sample(self, values)
+        if self.buffer.count - self._flushed >= FLUSH_EVERY:
+            self.flush()
+        return values
+
+    # --- disco ---
+    def flush(self):
+        if not self.log_path:
+            return
+        rows = self.buffer.rows(self._flushed)
+        if not rows:
+            return
+        new = not os.path.exists(self.log_path)
+        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            if new:
+                f.write("ts," + ",".join(self.buffer.metrics) + "\n")
+            f.write("".join(f"{r[0]:.3f}," + ",".join("" if math.isnan(v) else f"{v:.2f}" for v in r[1:]) + "\n"
+                            for r in rows))
+        self._flushed = self.buffer.count
+
+    # --- hilo ---
+    def start(self):
+        if self.running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=f"telemetry-{self.serial}", daemon=True)
+        self._thread.start()
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _loop(self):
+        next_t = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.sample()
+                self.error = None
+            except (adb_session.AdbSessionError, OSError) as e:
+                self.error = e   # la sesión se reabre sola en la siguiente muestra
+            # a intervalo fijo: lo que tarda la muestra no se acumula
+            next_t = max(next_t + self.interval, time.monotonic())
+            self._stop.wait(next_t - time.monotonic())
+
+    def stop(self, timeout=TIMEOUT):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._session.close()
+        try:
+            self.flush()
+        except OSError:
+            pass
@@ -0,0 +1,125 @@
+import math
+import tkinter as tk
+from tkinter import ttk
+
+from telemetry import UNITS
+
+# ----------------------
+# Vista de telemetría: una sparkline por métrica
+# ----------------------
+# Un solo Canvas; cada REFRESH_MS se repinta solo si el muestreador ha añadido
+# muestras. Se dibujan las últimas WINDOW muestras (los huecos NaN cortan la línea).
+
+REFRESH_MS = 1000
+WINDOW = 300
+ROW_H = 56
+LABEL_W = 190
+COLORS = {"cpu": "#3a7bd5", "mem_used_mb": "#8e44ad", "mem_pct": "#8e44ad", "battery": "#2e9e44",
+          "battery_temp": "#c98a00", "thermal": "#d35400", "fps": "#16a085", "jank_pct": "#c0392b"}
+LABELS = {"cpu": "CPU", "mem_used_mb": "Memoria usada", "mem_pct": "Memoria", "battery": "Batería",
+          "battery_temp": "Temp. batería", "thermal": "Temp. máx. (thermal)", "fps": "FPS app",
+          "jank_pct": "Jank"}
+SHOWN = ("cpu", "mem_pct", "battery", "battery_temp", "thermal", "fps", "jank_pct")
+
+
+class TelemetryView(ttk.Frame):
+    def __init__(self, parent, on_start=None, on_stop=None):
+        super().__init__(parent, padding=8)
+        self.on_start = on_start
+        self.on_stop = on_stop
+        self.sampler = None
+        self._drawn = -1
+
+        bar = ttk.Frame(self)
+        bar.grid(row=0, column=0, sticky="ew", pady=(0, 6))
+        self.package_var = tk.StringVar()
+        ttk.Label(bar, text="App (FPS):").pack(side=tk.LEFT)
+        ttk.Entry(bar, textvariable=self.package_var, width=32).pack(side=tk.LEFT, padx=(2, 8))
+        ttk.Button(bar, text="Iniciar", command=self._start).pack(side=tk.LEFT, padx=2)
+        ttk.Button(bar, text="Parar", command=self._stop).pack(side=tk.LEFT, padx=2)
+        self.status = ttk.Label(bar, text="")
+        self.status.pack(side=tk.RIGHT)
+        self.package_var.trace_add("write", lambda *a: self._package_changed())
+
+        self.canvas = tk.Canvas(self, height=ROW_H * len(SHOWN), background="white", highlightthickness=0)
+        self.canvas.grid(row=1, column=0, sticky="nsew")
+        self.canvas.bind("<Configure>", lambda e: self.redraw(force=True))
+        self.rowconfigure(1, weight=1)
+        self.columnconfigure(0, weight=1)
+        self.after(REFRESH_MS, self._tick)
+
+    # --- muestreador ---
+    def attach(self, sampler):
+        self.sampler = sampler
+        self._drawn = -1
+        if sampler is not None:
+            sampler.set_package(self.package_var.get().strip())
+        self.redraw(force=True)
+
+    def _start(self):
+        if self.on_start:
+            self.on_start(self.package_var.get().strip() or None)
+
+    def _stop(self):
+        if self.on_stop:
+            self.on_stop()
+
+    def _package_changed(self):
+        if self.sampler is not None:
+            self.sampler.set_package(self.package_var.get().strip())
+
+    # --- pintado ---
+    def _tick(self):
+        try:
+            self.redraw()
+        finally:
+            self.after(REFRESH_MS, self._tick)
+
+    def redraw(self, force=False):
+        s = self.sampler
+        count = s.buffer.count if s else 0
+        if not force and count == self._drawn:
+            return
+        self._drawn = count
+        c = self.canvas
+        c.delete("all")
+        width = max(c.winfo_width(), LABEL_W + 100)
+        if s is None:
+            self.status.config(text="Sin muestreo")
+            return
+        err = f" — error: {s.error}" if s.error else ""
+        self.status.config(text=f"{s.serial or 'por defecto'} · {count} muestras{err}")
+        plot_w = width - LABEL_W - 10
+        for row, metric in enumerate(SHOWN):
+            self._draw_row(metric, s.buffer.series(metric, WINDOW), row * ROW_H, plot_w)
+
+    def _draw_row(self, metric, values, y0, plot_w):
+        c = self.canvas
+        color = COLORS.get(metric, "black")
+        valid = [v for v in values if not math.isnan(v)]
+        last = values[-1] if values else float("nan")
+        text = f"{LABELS[metric]}: " + ("—" if math.isnan(last) else f"{last:.1f} {UNITS[metric]}")
+        c.create_text(6, y0 + ROW_H / 2 - 8, anchor="w", text=text, fill=color)
+        if valid:
+            c.create_text(6, y0 + ROW_H / 2 + 10, anchor="w", fill="gray",
+                          text=f"min {min(valid):.1f} · máx {max(valid):.1f}")
+        c.create_line(LABEL_W, y0 + ROW_H - 2, LABEL_W + plot_w, y0 + ROW_H - 2, fill="#eeeeee")
+        if len(valid) < 2:
+            return
+        lo, hi = min(valid), max(valid)
+        if metric in ("cpu", "mem_pct", "battery", "jank_pct"):
+            lo, hi = 0.0, max(100.0, hi)
+        span = (hi - lo) or 1.0
+        step = plot_w / max(1, WINDOW - 1)
+        x0 = LABEL_W + plot_w - step * (len(values) - 1)
+        top, h = y0 + 6, ROW_H - 12
+        points = []
+        for i, v in enumerate(values):
+            if math.isnan(v):
+                if len(points) >= 4:
+                    c.create_line(*points, fill=color, width=1.5)
+                points = []
+                continue
+            points += [x0 + i * step, top + h - (v - lo) / span * h]
+        if len(points) >= 4:
+            c.create_line(*points, fill=color, width=1.5)
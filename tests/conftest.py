@@ -0,0 +1,10 @@
+import os
+import sys
+
+# ----------------------
+# Los módulos están en la raíz del repo y el servidor adb falso en bench/
+# ----------------------
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "bench")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
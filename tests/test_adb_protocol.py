@@ -0,0 +1,153 @@
+import socket
+
+import pytest
+
+import adb_protocol
+from adb_protocol import AdbClient, AdbProtocolError
+from fake_adb import SERIAL, FakeAdbServer
+
+# ----------------------
+# AdbClient contra bench/fake_adb.FakeAdbServer (sin dispositivo ni adb real)
+# ----------------------
+
+
+@pytest.fixture
+def server():
+    srv = FakeAdbServer().start()
+    yield srv
+    srv.stop()
+
+
+@pytest.fixture
+def client(server):
+    c = AdbClient(port=server.port)
+    yield c
+    c.close()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# --- host ---
+def test_version(client):
+    assert client.version() == 0x29
+
+
+def test_devices(client):
+    assert [(s, st) for s, st, _ in client.devices()] == [(SERIAL, "device")]
+    serial, state, extra = client.devices(long=True)[0]
+    assert (serial, state) == (SERIAL, "device")
+    assert "model:Fake_Device" in extra
+
+
+def test_connect_disconnect(client):
+    assert client.connect("10.0.0.7:5555") == "connected to 10.0.0.7:5555"
+    assert "10.0.0.7:5555" in [s for s, _, _ in client.devices()]
+    client.disconnect("10.0.0.7:5555")
+    assert "10.0.0.7:5555" not in [s for s, _, _ in client.devices()]
+
+
+def test_fail_from_host_service(client):
+    with pytest.raises(AdbProtocolError, match="unknown host service"):
+        client._host_query("host:nope")
+
+
+def test_fail_unknown_device(client):
+    with pytest.raises(AdbProtocolError, match="not found"):
+        client.shell("true", serial="no-such-device")
+
+
+def test_server_down():
+    c = AdbClient(port=_free_port())
+    with pytest.raises(adb_protocol.AdbServerUnavailable):
+        c.version()
+    with pytest.raises(ConnectionRefusedError):   # lo que capturan los llamantes para usar adb
+        c.devices()
+
+
+# --- shell v2 ---
+def test_shell_v2_stdout_and_rc(client):
+    assert client.shell("wm size", SERIAL) == (0, "Physical size: 1080x2400\n", "")
+
+
+def test_shell_v2_separates_stderr_and_exit_code(client, server):
+    server.shell_results["ls /nope"] = ("parcial\n", "ls: /nope: No such file or directory\n", 1)
+    rc, out, err = client.shell("ls /nope", SERIAL)
+    assert rc == 1
+    assert out == "parcial\n"
+    assert err == "ls: /nope: No such file or directory\n"
+
+
+def test_shell_v2_large_output(client, server):
+    big = "x" * 300_000 + "\n"
+    server.shell_results["cat big"] = (big, "", 0)
+    assert client.shell("cat big", SERIAL) == (0, big, "")
+
+
+def test_exec_out_binary(client):
+    data = client.exec_out("screencap -p", SERIAL)
+    assert data.startswith(b"\x89PNG\r\n\x1a\n")
+
+
+# --- sync ---
+def test_push_stat_pull_roundtrip(client, server, tmp_path):
+    local = tmp_path / "datos.bin"
+    payload = bytes(range(256)) * 1000   # más de un bloque SYNC_CHUNK
+    local.write_bytes(payload)
+    assert client.push(str(local), "/sdcard/", SERIAL) == len(payload)   # carpeta -> /sdcard/datos.bin
+    mode, size, _ = client.stat("/sdcard/datos.bin", SERIAL)
+    assert mode & 0o170000 == 0o100000
+    assert size == len(payload)
+    dest = tmp_path / "vuelta.bin"
+    assert client.pull("/sdcard/datos.bin", str(dest), SERIAL) == len(payload)
+    assert dest.read_bytes() == payload
+
+
+def test_stat_missing(client):
+    assert client.stat("/sdcard/no-existe", SERIAL)[0] == 0
+
+
+def test_pull_fail_leaves_no_partial_file(client, tmp_path):
+    dest = tmp_path / "nada.bin"
+    with pytest.raises(AdbProtocolError, match="No such file"):
+        client.pull("/sdcard/no-existe", str(dest), SERIAL)
+    assert not dest.exists()
+    assert not (tmp_path / "nada.bin.part").exists()
+
+
+def test_sync_connection_is_reused(client, server):
+    client.stat("/sdcard", SERIAL)
+    client.stat("/sdcard", SERIAL)
+    assert server.count("sync") == 1
+
+
+def test_stale_pooled_sync_connection_is_retried(client, server, tmp_path):
+    client.stat("/sdcard", SERIAL)
+    server.drop_connections()   # la conexión del pool ya no vale
+    local = tmp_path / "f.txt"
+    local.write_bytes(b"hola")
+    assert client.push(str(local), "/sdcard/f.txt", SERIAL) == 4
+    assert server.files["/sdcard/f.txt"][0] == b"hola"
+    assert server.count("sync") == 2
+
+
+# --- try_native (lo que usa adb_commands.exec_adb) ---
+def test_try_native_falls_back_only_when_server_is_down(monkeypatch):
+    monkeypatch.setattr(adb_protocol, "_client", AdbClient(port=_free_port()))
+    assert adb_protocol.try_native(["devices"]) is None
+
+
+def test_try_native_reports_errors_after_sending(monkeypatch, client, tmp_path):
+    monkeypatch.setattr(adb_protocol, "_client", client)
+    rc, out, err = adb_protocol.try_native(["pull", "/sdcard/no-existe", str(tmp_path / "x")], SERIAL)
+    assert rc == 1 and "No such file" in err
+
+
+def test_try_native_devices(monkeypatch, client):
+    monkeypatch.setattr(adb_protocol, "_client", client)
+    rc, out, _ = adb_protocol.try_native(["devices"])
+    assert rc == 0
+    assert out.startswith("List of devices attached\n") and SERIAL in out
@@ -0,0 +1,67 @@
+import pytest
+
+from event_recorder import Recording, build_sendevent_script, parse_getevent_line
+
+# ----------------------
+# Parser de `getevent -t` y agrupación en tramas
+# ----------------------
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("[   12.000345] /dev/input/event2: 0003 0035 0000021c", (12_000_345, "/dev/input/event2", 3, 0x35, 540)),
+    ("[ 1.5] /dev/input/event0: 0001 014a 00000001\r\n", (1_500_000, "/dev/input/event0", 1, 0x14a, 1)),
+    ("[   12.000345] /dev/input/event2: 0003 0039 ffffffff", (12_000_345, "/dev/input/event2", 3, 0x39, -1)),
+])
+def test_parse_getevent_line(line, expected):
+    assert parse_getevent_line(line) == expected
+
+
+@pytest.mark.parametrize("line", [
+    "add device 1: /dev/input/event2",
+    '  name:     "sec_touchscreen"',
+    "",
+    "[   12.000345] /dev/input/event2: EV_ABS ABS_MT_POSITION_X 0000021c",
+])
+def test_parse_getevent_line_ignores_other_output(line):
+    assert parse_getevent_line(line) is None
+
+
+def _recording():
+    t, k = "/dev/input/event2", "/dev/input/event0"
+    return Recording([
+        [0, t, 3, 0x35, 100], [0, t, 3, 0x36, 200], [0, t, 0, 0, 0],
+        [5_000, k, 1, 116, 1],
+        [10_000, t, 3, 0x39, -1], [10_000, t, 0, 0, 0],
+        [12_000, k, 0, 0, 0],
+        [20_000, t, 3, 0x35, 300],   # sin SYN_REPORT: trama abierta al final
+    ])
+
+
+def test_frames_group_until_syn_report_per_node():
+    frames = _recording().frames()
+    assert frames == [
+        (0, "/dev/input/event2", [(3, 0x35, 100), (3, 0x36, 200), (0, 0, 0)]),
+        (5_000, "/dev/input/event0", [(1, 116, 1), (0, 0, 0)]),
+        (10_000, "/dev/input/event2", [(3, 0x39, -1), (0, 0, 0)]),
+        (20_000, "/dev/input/event2", [(3, 0x35, 300)]),
+    ]
+
+
+def test_sendevent_script_maps_nodes_and_sleeps():
+    script = build_sendevent_script(_recording(), speed=2.0, nodes={"/dev/input/event2": "/dev/input/event7"})
+    lines = script.splitlines()
+    assert lines[0] == "sendevent /dev/input/event7 3 53 100"
+    assert "sleep 0.003" in lines    # 5 ms a velocidad x2 (redondeado)
+    assert "sendevent /dev/input/event0 1 116 1" in lines
+    assert lines[-1] == "sendevent /dev/input/event7 3 53 300"
+
+
+def test_save_load_roundtrip(tmp_path):
+    rec = _recording()
+    rec.devices = {"/dev/input/event2": "touch"}
+    path = str(tmp_path / "x.events")
+    rec.save(path)
+    loaded = Recording.load(path)
+    assert loaded.events == rec.events
+    assert loaded.devices == rec.devices
+    assert loaded.duration == 0.02
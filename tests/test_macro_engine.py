@@ -0,0 +1,104 @@
+import glob
+import os
+
+import pytest
+
+import macro_engine
+from macro_engine import MacroError, import_bat, parse
+
+# ----------------------
+# Parser de macros e importador de .bat (sin dispositivo)
+# ----------------------
+BATS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(__file__)), "antique_bats", "*.bat")))
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+# --- parse ---
+def test_parse_blocks():
+    program = parse("set X 5\nrepeat 3\n  tap ${X} 10\n  for B from 0 to 255 step 20\n    key 24\n  end\nend\n")
+    assert [st.cmd for st in program] == ["set", "repeat"]
+    loop = program[1]
+    assert loop.count == "3"
+    assert [st.cmd for st in loop.body] == ["tap", "for"]
+    assert loop.body[1].var == "B"
+    assert loop.body[1].values == ("range", "0", "255", "20")
+
+
+def test_parse_for_in_and_comments():
+    (st,) = parse("# comentario\n\nfor P in com.a com.b\n  shell am force-stop ${P}\nend\n")
+    assert st.values == ("list", "com.a com.b")
+
+
+@pytest.mark.parametrize("text, line", [
+    ("tap 1 2\nend\n", 2),
+    ("repeat\n  tap 1 2\n", 1),
+    ("repeat many\nend\n", 1),
+    ("for X\nend\n", 1),
+    ("tap 1 2\nbogus 3\n", 2),
+])
+def test_parse_errors(text, line):
+    with pytest.raises(MacroError, match=f"línea {line}"):
+        parse(text)
+
+
+# --- import_bat ---
+@pytest.mark.parametrize("path", BATS, ids=os.path.basename)
+def test_antique_bats_import_and_parse(path):
+    text, _ = import_bat(_read(path))
+    parse(text)
+
+
+def test_bats_fixture_present():
+    assert BATS
+
+
+def test_goto_loop_becomes_repeat():
+    text, warnings = import_bat(_read(os.path.join(os.path.dirname(BATS[0]), "toques.bat")))
+    assert text == "repeat\n    tap 100 500\n    tap 500 100\n    tap 300 800\n    sleep 1\nend\n"
+    assert warnings == []
+
+
+def test_tail_comment_kept():
+    text, _ = import_bat(_read(os.path.join(os.path.dirname(BATS[0]), "Home.bat")))
+    assert text == '# Este es el botón de "Home", que minimiza la app.\nkey 3\n'
+
+
+def test_for_l_and_random():
+    text, warnings = import_bat(
+        "for /L %%X in (1,1,10) do (\n"
+        "    set /a xpos=!random! %% 1080\n"
+        "    adb shell input tap !xpos! 5\n"
+        ")\n")
+    assert text == ("for X from 1 to 10 step 1\n"
+                    "    set xpos random 0 1080\n"
+                    "    tap ${xpos} 5\n"
+                    "end\n")
+    assert warnings == []
+
+
+def test_goto_inside_if_is_not_a_loop():
+    text, warnings = import_bat("@echo off\n:a\nif x==y (\n goto a\n)\n")
+    assert "repeat" not in text
+    assert all(line.startswith("# [bat]") for line in text.splitlines())
+    assert warnings
+
+
+def test_unsupported_substring_is_commented():
+    text, warnings = import_bat("echo %x:~1%\n")
+    assert text == "# [bat] echo %x:~1%\n"
+    assert warnings == ["línea 1: echo %x:~1%"]
+
+
+def test_adb_args_quoted_and_vars():
+    text, _ = import_bat("set N=5\nadb shell input tap %N% 10\nadb push C:\\ADB\\foto.png /sdcard/\n")
+    assert text == "set N 5\ntap ${N} 10\nadb push 'C:\\ADB\\foto.png' /sdcard/\n"
+
+
+def test_input_text_space_escape():
+    text, _ = import_bat("adb shell input text hola%sMundo\n")
+    assert text == "text hola Mundo\n"
+    assert macro_engine.parse(text)[0].arg == "hola Mundo"
@@ -0,0 +1,73 @@
+import pytest
+
+from profile_store import ProfileQuery, ProfileStore, normalize_tags
+
+# ----------------------
+# Consultas y búsqueda del almacén de perfiles (SQLite en tmp_path)
+# ----------------------
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = ProfileStore(tmp_path / "profiles.db")
+    s.update_many({
+        "pixel-lab": {"mac": "AA-BB-CC-00-00-01", "ip": "192.168.1.10", "tags": "lab, android"},
+        "pixel-casa": {"mac": "aa:bb:cc:00:00:02", "ip": "192.168.1.11", "tags": ["casa"]},
+        "tablet": {"mac": "dd:ee:ff:00:00:03", "ip": "10.0.0.5", "notes": "la del salón", "tags": ["lab"]},
+    })
+    yield s
+    s.close()
+
+
+def test_normalize_tags():
+    assert normalize_tags(" Lab, android ,lab,") == ["lab", "android"]
+
+
+def test_query_terms():
+    q = ProfileQuery("Pixel tag:lab mac:AA-BB ip: ")
+    assert q.terms == [("", "pixel"), ("tag", "lab"), ("mac", "aa:bb")]
+
+
+@pytest.mark.parametrize("new, old, expected", [
+    ("pixel", "pix", True),           # más caracteres
+    ("pix lab", "pix", True),         # más términos
+    ("tag:lab", "tag:la", True),      # prefijo más largo
+    ("pix", "pixel", False),          # menos estricta
+    ("tag:lab", "lab", False),        # otro campo
+    ("pixel", None, False),
+])
+def test_narrows(new, old, expected):
+    assert ProfileQuery(new).narrows(ProfileQuery(old) if old is not None else None) is expected
+
+
+def test_search(store):
+    assert store.search("") == ["pixel-lab", "pixel-casa", "tablet"]
+    assert store.search("pixel") == ["pixel-lab", "pixel-casa"]
+    assert store.search("tag:lab") == ["pixel-lab", "tablet"]
+    assert store.search("mac:aa:bb:cc:00:00:0") == ["pixel-lab", "pixel-casa"]
+    assert store.search("ip:192.168.1.1") == ["pixel-lab", "pixel-casa"]
+    assert store.search("salón") == ["tablet"]
+
+
+def test_search_narrowing_matches_full_search(store):
+    # cada consulta estrecha la anterior: se filtra sobre el resultado previo
+    for text in ("p", "pi", "pixel", "pixel tag:l", "pixel tag:lab"):
+        narrowed = store.search(text)
+        store._last = (None, None)
+        assert narrowed == store.search(text)
+    assert narrowed == ["pixel-lab"]
+
+
+def test_search_after_change_is_not_stale(store):
+    assert store.search("pixel") == ["pixel-lab", "pixel-casa"]
+    store["pixel-nuevo"] = {"tags": []}
+    assert store.search("pixel-") == ["pixel-lab", "pixel-casa", "pixel-nuevo"]
+    del store["pixel-lab"]
+    assert store.search("pixel-") == ["pixel-casa", "pixel-nuevo"]
+
+
+def test_indexes(store):
+    assert store.by_mac("AA-BB-CC-00-00-01") == ["pixel-lab"]
+    assert store.by_ip("10.0.0.5") == ["tablet"]
+    assert store.by_tag(" LAB ") == ["pixel-lab", "tablet"]
+    assert store.tags() == ["android", "casa", "lab"]
@@ -0,0 +1,86 @@
+import shlex
+
+import pytest
+
+import adb_input
+from text_input import TextInputError, _utf8_chunks, input_scripts
+
+# ----------------------
+# Troceado y escapado de texto (sin dispositivo)
+# ----------------------
+_KEYS = {"66": "\n", "61": "\t"}
+
+
+def _android_input_text(arg):
+    """Lo que teclea `input text ARG` (Input/InputShellCommand.sendText): %s -> espacio."""
+    out, escape = [], False
+    for ch in arg:
+        if escape:
+            escape = False
+            if ch == "s":
+                out[-1] = " "
+                continue
+        out.append(ch)
+        if ch == "%":
+            escape = True
+    return "".join(out)
+
+
+def _typed(script):
+    """Texto que resulta de ejecutar los `input text`/`input keyevent` del script."""
+    lex = shlex.shlex(script, posix=True, punctuation_chars=";")
+    lex.whitespace_split = True
+    words, typed = [], []
+    for tok in list(lex) + [";"]:
+        if tok != ";":
+            words.append(tok)
+            continue
+        if words[:2] == ["input", "text"]:
+            assert len(words) == 3, words
+            typed.append(_android_input_text(words[2]))
+        elif words[:2] == ["input", "keyevent"]:
+            typed += [_KEYS[k] for k in words[2:]]
+        words = []
+    return "".join(typed)
+
+
+@pytest.mark.parametrize("text", [
+    "hola mundo",
+    "100%s",
+    "50% off",
+    "%%s y %s",
+    "a %s b%",
+    "comillas 'simples' y \"dobles\"; $HOME `ls` | & > <",
+    "linea 1\nlinea\t2\n",
+])
+def test_input_scripts_type_the_same_text(text):
+    assert "".join(_typed(script) for script, _ in input_scripts(text)) == text
+
+
+def test_input_scripts_split_long_text():
+    text = ("abc%s " * 400)[:2500]
+    scripts = input_scripts(text)
+    assert [n for _, n in scripts] == [1024, 1024, 352]
+    assert "".join(_typed(s) for s, _ in scripts) == text
+
+
+def test_split_text_chunk_size():
+    chunks = adb_input.split_text("x" * 600, 256)
+    assert [len(c) for c in chunks] == [256, 256, 88]
+
+
+def test_input_scripts_reject_non_ascii():
+    with pytest.raises(TextInputError):
+        input_scripts("¡hola!")
+
+
+def test_utf8_chunks_do_not_split_characters():
+    text = "añ€😀" * 10
+    chunks = _utf8_chunks(text, 7)
+    assert "".join(chunks) == text
+    assert all(len(c.encode("utf-8")) <= 7 for c in chunks)
+    assert _utf8_chunks("", 7) == []
+
+
+def test_utf8_chunks_character_larger_than_size():
+    assert _utf8_chunks("😀a", 2) == ["😀", "a"]
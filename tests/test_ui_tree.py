@@ -0,0 +1,75 @@
+import pytest
+
+from ui_tree import UiError, parse, parse_focus
+
+# ----------------------
+# Parser de `uiautomator dump` y selectores
+# ----------------------
+DUMP = (
+    "<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>"
+    "<hierarchy rotation=\"0\">"
+    "<node index=\"0\" text=\"\" resource-id=\"\" class=\"android.widget.FrameLayout\" package=\"com.app\" "
+    "content-desc=\"\" clickable=\"false\" enabled=\"true\" bounds=\"[0,0][1080,2400]\">"
+    "<node index=\"0\" text=\"Aceptar\" resource-id=\"com.app:id/ok\" class=\"android.widget.Button\" "
+    "package=\"com.app\" content-desc=\"\" clickable=\"true\" enabled=\"true\" bounds=\"[100,200][300,260]\" />"
+    "<node index=\"1\" text=\"Cancelar\" resource-id=\"com.app:id/cancel\" class=\"android.widget.Button\" "
+    "package=\"com.app\" content-desc=\"Buscar\" clickable=\"true\" enabled=\"false\" bounds=\"[400,200][600,260]\" />"
+    "<node index=\"2\" text=\"Aceptar\" resource-id=\"\" class=\"android.widget.TextView\" "
+    "package=\"com.app\" content-desc=\"\" clickable=\"false\" enabled=\"true\" bounds=\"[0,300][1080,400]\" />"
+    "</node></hierarchy>"
+)
+
+
+@pytest.fixture
+def tree():
+    # uiautomator deja un aviso tras el XML cuando vuelca a /dev/tty
+    return parse("UI hierchary dumped to: /dev/tty\n" + DUMP + "\nUI hierchary dumped to: /dev/tty", focus="com.app/.Main")
+
+
+def test_parse_nodes(tree):
+    assert len(tree.nodes) == 4
+    root, ok, cancel, label = tree.nodes
+    assert ok.parent is root and label.parent is root
+    assert ok.bounds == (100, 200, 300, 260)
+    assert ok.center == (200, 230)
+    assert ok.clickable and not cancel.enabled
+    assert tree.screen_size == (1080, 2400)
+    assert tree.focus == "com.app/.Main"
+
+
+@pytest.mark.parametrize("selector, index", [
+    ("id=com.app:id/ok", 1),
+    ("id=ok", 1),
+    ("text=Aceptar", 1),
+    ("text=Aceptar#1", 3),
+    ("text~=cancel", 2),
+    ("desc=Buscar", 2),
+    ("desc~=busc", 2),
+    ("class=android.widget.TextView", 3),
+    ("cancel", 2),
+    ("Buscar", 2),
+])
+def test_find(tree, selector, index):
+    assert tree.find(selector) is tree.nodes[index]
+
+
+def test_find_missing(tree):
+    assert tree.find("text=Nada") is None
+    assert tree.find("text=Aceptar#5") is None
+
+
+def test_bad_selector(tree):
+    with pytest.raises(UiError):
+        tree.find("foo=bar")
+
+
+@pytest.mark.parametrize("text", ["", "ERROR: could not get idle state.", "<hierarchy><node></hierarchy>"])
+def test_parse_errors_are_ui_errors(text):
+    with pytest.raises(UiError):
+        parse(text)
+
+
+def test_parse_focus():
+    line = "  mCurrentFocus=Window{5e1b2c u0 com.app/com.app.MainActivity}"
+    assert parse_focus(line) == "com.app/com.app.MainActivity"
+    assert parse_focus("") is None
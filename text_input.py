@@ -0,0 +1,165 @@
+import base64
+import shlex
+import threading
+import time
+
+import adb_input
+import adb_session
+
+# ----------------------
+# Envío de texto al dispositivo
+# ----------------------
+# Tres métodos, todos por la sesión persistente (un script por lote, sin procesos
+# nuevos por trozo):
+#   "input"     -> `input text` troceado y escapado (ver adb_input.text_commands).
+#                  Siempre disponible, pero solo ASCII y lento: inyecta tecla a tecla.
+#   "ime"       -> ADBKeyboard (com.android.adbkeyboard) como teclado activo:
+#                  `am broadcast -a ADB_INPUT_B64` con el texto en base64. Unicode y
+#                  kilobytes de golpe.
+#   "clipboard" -> Clipper (ca.zgrs.clipper): `am broadcast -a clipper.set` y pegar
+#                  con KEYCODE_PASTE.
+# method="auto" usa input para textos cortos ASCII y, para el resto, el más rápido
+# medido en ese dispositivo entre los instalados (ime por defecto). Cada envío deja
+# los caracteres por segundo en throughput() para poder elegir.
+
+METHODS = ("input", "ime", "clipboard")
+FAST_THRESHOLD = 256          # caracteres a partir de los que compensa ime/clipboard
+BROADCAST_CHUNK = 16 * 1024   # bytes de texto por broadcast (el Intent va por binder)
+SCRIPT_CHARS = 1024           # caracteres por script con `input text` (una ida y vuelta)
+CHAR_TIMEOUT = 0.02           # s de margen por carácter tecleado con input text
+KEYCODE_PASTE = 279
+
+IME_ID = "com.android.adbkeyboard/.AdbIME"
+CLIPPER_PACKAGE = "ca.zgrs.clipper"
+
+
+class TextInputError(Exception):
+    pass
+
+
+class TextResult:
+    __slots__ = ("method", "chars", "elapsed", "batches")
+
+    def __init__(self, method, chars, elapsed, batches):
+        self.method = method
+        self.chars = chars
+        self.elapsed = elapsed
+        self.batches = batches
+
+    @property
+    def cps(self):
+        return self.chars / self.elapsed if self.elapsed > 0 else float("inf")
+
+    def __str__(self):
+        return f"{self.chars} caracteres por {self.method} en {self.elapsed * 1000:.0f} ms ({self.cps:.0f} car/s)"
+
+
+_caps = {}          # (adb, serial) -> {"ime": bool, "clipboard": bool}
+_throughput = {}    # (adb, serial) -> {método: car/s del último envío}
+_lock = threading.Lock()
+
+
+def capabilities(serial=None, adb="adb", refresh=False):
+    """Métodos rápidos disponibles: ADBKeyboard activo y/o Clipper instalado (una consulta)."""
+    key = (adb, serial)
+    with _lock:
+        if key in _caps and not refresh:
+            return _caps[key]
+    script = f"settings get secure default_input_method; echo; pm path {CLIPPER_PACKAGE} 2>/dev/null"
+    _, out, _ = adb_session.run_shell(script, serial, adb, timeout=adb_session.DEFAULT_TIMEOUT)
+    caps = {"ime": IME_ID in out, "clipboard": "package:" in out}
+    with _lock:
+        _caps[key] = caps
+    return caps
+
+
+def forget(serial=None, adb="adb"):
+    """Olvida lo sabido de un dispositivo (reconexión, teclado cambiado...)."""
+    with _lock:
+        _caps.pop((adb, serial), None)
+        _throughput.pop((adb, serial), None)
+
+
+def throughput(serial=None, adb="adb"):
+    """{método: caracteres/s} del último envío por cada método en este dispositivo."""
+    with _lock:
+        return dict(_throughput.get((adb, serial), {}))
+
+
+def choose_method(text, serial=None, adb="adb"):
+    if text.isascii() and len(text) < FAST_THRESHOLD:
+        return "input"
+    caps = capabilities(serial, adb)
+    fast = [m for m in ("ime", "clipboard") if caps.get(m)]
+    if not fast:
+        if not text.isascii():
+            raise TextInputError("texto no ASCII: hace falta ADBKeyboard activo o Clipper instalado")
+        return "input"
+    measured = throughput(serial, adb)
+    return max(fast, key=lambda m: measured.get(m, 0))
+
+
+# --- scripts por método ---
+def _utf8_chunks(text, size):
+    """Trozos de texto de como mucho `size` bytes en UTF-8 sin partir caracteres."""
+    chunks, cur, n = [], [], 0
+    for ch in text:
+        b = len(ch.encode("utf-8"))
+        if cur and n + b > size:
+            chunks.append("".join(cur))
+            cur, n = [], 0
+        cur.append(ch)
+        n += b
+    if cur:
+        chunks.append("".join(cur))
+    return chunks
+
+
+def input_scripts(text, input_cmd="input"):
+    """[(script, caracteres)] con `input text`, de como mucho SCRIPT_CHARS caracteres cada uno."""
+    if not text.isascii():
+        raise TextInputError("input text solo admite ASCII (usa ime o clipboard)")
+    parts = (text[i:i + SCRIPT_CHARS] for i in range(0, len(text), SCRIPT_CHARS))
+    return [("; ".join(adb_input.text_commands(part, input_cmd)), len(part)) for part in parts]
+
+
+def ime_scripts(text):
+    return [(f"am broadcast -a ADB_INPUT_B64 --es msg {base64.b64encode(chunk.encode('utf-8')).decode('ascii')} >/dev/null",
+             len(chunk)) for chunk in _utf8_chunks(text, BROADCAST_CHUNK)]
+
+
+def clipboard_scripts(text, input_cmd="input"):
+    return [(f"am broadcast -a clipper.set -e text {shlex.quote(chunk)} >/dev/null; {input_cmd} keyevent {KEYCODE_PASTE}",
+             len(chunk)) for chunk in _utf8_chunks(text, BROADCAST_CHUNK)]
+
+
+# --- envío ---
+def send_text(text, serial=None, adb="adb", method="auto", cancel=None):
+    """Escribe `text` en el campo con foco. Devuelve un TextResult."""
+    if not text:
+        return TextResult("input", 0, 0.0, 0)
+    if method == "auto":
+        method = choose_method(text, serial, adb)
+    elif method not in METHODS:
+        raise ValueError(f"Método desconocido: {method}")
+    if method == "ime":
+        scripts = ime_scripts(text)
+    elif method == "clipboard":
+        scripts = clipboard_scripts(text, adb_input.input_command(serial, adb))
+    else:
+        scripts = input_scripts(text, adb_input.input_command(serial, adb))
+
+    t0 = time.perf_counter()
+    sent = 0
+    for script, n in scripts:
+        if cancel is not None and cancel.is_set():
+            break
+        timeout = adb_session.DEFAULT_TIMEOUT + (n * CHAR_TIMEOUT if method == "input" else 0)
+        rc, out, err = adb_session.run_shell(script, serial, adb, timeout=timeout)
+        if rc != 0:
+            raise TextInputError((err or out).strip() or f"{method}: rc={rc}")
+        sent += n
+    result = TextResult(method, sent, time.perf_counter() - t0, len(scripts))
+    with _lock:
+        _throughput.setdefault((adb, serial), {})[method] = result.cps
+    return result
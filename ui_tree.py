@@ -0,0 +1,258 @@
+import re
+import shlex
+import subprocess
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+
+import adb_input
+import adb_protocol
+import adb_session
+
+# ----------------------
+# Jerarquía de UI (uiautomator) cacheada por ventana, para tocar elementos por selector
+# ----------------------
+# `uiautomator dump /dev/tty` por exec: (sin fichero en /sdcard ni pull) tarda 1-2 s;
+# se parsea una vez a un UiTree con índices por resource-id, texto y content-desc, y
+# se guarda por (dispositivo, ventana con foco). Mientras el foco no cambie, buscar un
+# elemento es una consulta a un dict.
+# tap_element() comprueba el foco y toca en el MISMO script de shell: si la ventana ya
+# no es la cacheada no toca, vuelve a volcar la jerarquía y lo intenta otra vez.
+#
+# Selectores:
+#   id=com.app:id/boton      resource-id (también vale solo "boton")
+#   text=Aceptar             texto exacto;  text~=acep  contiene (sin mayúsculas)
+#   desc=Buscar              content-desc;  desc~=busc
+#   class=android.widget.EditText
+#   Aceptar                  sin prefijo: id, luego texto, luego desc
+#   ...#2                    el tercer elemento que coincide (empieza en 0)
+
+MAX_WINDOWS = 16   # ventanas cacheadas por dispositivo
+
+_BOUNDS_RE = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+_FOCUS_RE = re.compile(r"mCurrentFocus=Window\{\S+ \S+ ([^}\s]+)\}")
+_FOCUS_CMD = "dumpsys window | grep -m 1 mCurrentFocus"
+
+
+class UiError(Exception):
+    pass
+
+
+class Node:
+    __slots__ = ("index", "text", "resource_id", "desc", "cls", "package", "bounds",
+                 "clickable", "enabled", "parent")
+
+    def __init__(self, index, attrib, parent):
+        self.index = index
+        self.text = attrib.get("text", "")
+        self.resource_id = attrib.get("resource-id", "")
+        self.desc = attrib.get("content-desc", "")
+        self.cls = attrib.get("class", "")
+        self.package = attrib.get("package", "")
+        m = _BOUNDS_RE.match(attrib.get("bounds", ""))
+        self.bounds = tuple(int(v) for v in m.groups()) if m else (0, 0, 0, 0)
+        self.clickable = attrib.get("clickable") == "true"
+        self.enabled = attrib.get("enabled", "true") == "true"
+        self.parent = parent
+
+    @property
+    def center(self):
+        x1, y1, x2, y2 = self.bounds
+        return (x1 + x2) // 2, (y1 + y2) // 2
+
+    def __repr__(self):
+        label = self.resource_id or self.text or self.desc or self.cls
+        return f"<Node {label!r} {self.bounds}>"
+
+
+class UiTree:
+    """Nodos en orden del documento e índices exactos por id, texto y desc."""
+
+    def __init__(self, nodes, focus=None):
+        self.nodes = nodes
+        self.focus = focus
+        self.by_id, self.by_text, self.by_desc = {}, {}, {}
+        for n in nodes:
+            if n.resource_id:
+                self.by_id.setdefault(n.resource_id, []).append(n)
+                short = n.resource_id.rpartition(":id/")[2]
+                if short != n.resource_id:
+                    self.by_id.setdefault(short, []).append(n)
+            if n.text:
+                self.by_text.setdefault(n.text, []).append(n)
+            if n.desc:
+                self.by_desc.setdefault(n.desc, []).append(n)
+
+    def find_all(self, selector):
+        key, _, value = selector.partition("=") if "=" in selector else ("", "", selector)
+        if key.endswith("~"):
+            key, needle = key[:-1], value.lower()
+            attr = {"text": "text", "desc": "desc", "id": "resource_id", "class": "cls"}.get(key)
+            if attr is None:
+                raise UiError(f"Selector no válido: {selector}")
+            return [n for n in self.nodes if needle in getattr(n, attr).lower()]
+        if key == "id":
+            return self.by_id.get(value, [])
+        if key == "text":
+            return self.by_text.get(value, [])
+        if key == "desc":
+            return self.by_desc.get(value, [])
+        if key == "class":
+            return [n for n in self.nodes if n.cls == value]
+        if key:
+            raise UiError(f"Selector no válido: {selector}")
+        return self.by_id.get(value) or self.by_text.get(value) or self.by_desc.get(value) or []
+
+    def find(self, selector):
+        """Primer nodo (o el #n) que coincide, o None."""
+        selector, _, nth = selector.rpartition("#") if re.search(r"#\d+$", selector) else (selector, "", "0")
+        matches = self.find_all(selector)
+        n = int(nth)
+        return matches[n] if n < len(matches) else None
+
+    @property
+    def screen_size(self):
+        """(ancho, alto) del nodo raíz: la pantalla en la orientación actual."""
+        x1, y1, x2, y2 = self.nodes[0].bounds if self.nodes else (0, 0, 0, 0)
+        return x2 - x1, y2 - y1
+
+
+def parse(xml_text, focus=None):
+    """UiTree de la salida de `uiautomator dump` (se ignora lo que haya tras </hierarchy>)."""
+    end = xml_text.rfind("</hierarchy>")
+    start = xml_text.find("<?xml")
+    if end < 0:
+        raise UiError((xml_text.strip() or "uiautomator no devolvió nada")[:200])
+    try:
+        root = ET.fromstring(xml_text[max(0, start):end + len("</hierarchy>")])
+    except ET.ParseError as e:
+        raise UiError(f"XML de uiautomator no válido: {e}") from e
+    nodes = []
+
+    def walk(elem, parent):
+        for child in elem:
+            if child.tag != "node":
+                continue
+            node = Node(len(nodes), child.attrib, parent)
+            nodes.append(node)
+            walk(child, node)
+    walk(root, None)
+    return UiTree(nodes, focus)
+
+
+def parse_focus(text):
+    m = _FOCUS_RE.search(text)
+    return m.group(1) if m else text.strip() or None
+
+
+# ----------------------
+# Volcado
+# ----------------------
+def dump_xml(serial=None, adb="adb"):
+    """XML de la jerarquía por exec-out (servidor adb o, si no está, el ejecutable).
+    Los errores de adb (dispositivo no encontrado, offline...) salen como UiError."""
+    try:
+        data = adb_protocol.get_client().exec_out("uiautomator dump /dev/tty", serial)
+    except ConnectionRefusedError:
+        cmd = [adb] + (["-s", serial] if serial else []) + ["exec-out", "uiautomator", "dump", "/dev/tty"]
+        try:
+            proc = subprocess.run(cmd, capture_output=True)
+        except OSError as e:
+            raise UiError(f"adb: {e}") from e
+        if proc.returncode != 0:
+            raise UiError(proc.stderr.decode("utf-8", "replace").strip() or f"exec-out rc={proc.returncode}")
+        data = proc.stdout
+    except (adb_protocol.AdbProtocolError, OSError) as e:
+        raise UiError(f"adb: {e}") from e
+    return data.decode("utf-8", "replace")
+
+
+def current_focus(serial=None, adb="adb"):
+    _, out, _ = adb_session.run_shell(_FOCUS_CMD, serial, adb, timeout=adb_session.DEFAULT_TIMEOUT)
+    return parse_focus(out)
+
+
+class UiCache:
+    def __init__(self, adb="adb"):
+        self.adb = adb
+        self._trees = {}        # serial -> OrderedDict(ventana -> UiTree)
+        self._lock = threading.Lock()
+
+    def get(self, serial=None, refresh=False, focus=None):
+        """UiTree de la ventana con foco; solo vuelca si no está cacheada o refresh=True."""
+        if focus is None:
+            focus = current_focus(serial, self.adb)
+        key = serial or ""
+        if not refresh:
+            with self._lock:
+                tree = self._trees.get(key, {}).get(focus)
+            if tree is not None:
+                return tree
+        tree = parse(dump_xml(serial, self.adb), focus)
+        with self._lock:
+            windows = self._trees.setdefault(key, OrderedDict())
+            windows[focus] = tree
+            windows.move_to_end(focus)
+            while len(windows) > MAX_WINDOWS:
+                windows.popitem(last=False)
+        return tree
+
+    def cached(self, serial=None):
+        """El último árbol cacheado del dispositivo (sin tocar adb), o None."""
+        with self._lock:
+            windows = self._trees.get(serial or "")
+            return next(reversed(windows.values())) if windows else None
+
+    def invalidate(self, serial=None):
+        with self._lock:
+            self._trees.pop(serial or "", None)
+
+    def find(self, selector, serial=None, refresh=False):
+        node = self.get(serial, refresh).find(selector)
+        if node is None and not refresh:
+            node = self.get(serial, refresh=True).find(selector)   # la pantalla ha cambiado sin cambiar de ventana
+        return node
+
+    def tap_element(self, selector, serial=None):
+        """Toca el centro del elemento. Devuelve el Node tocado (UiError si no aparece)."""
+        tree = self.cached(serial) or self.get(serial)
+        for _ in range(3):
+            node = tree.find(selector)
+            if node is None:
+                tree = self.get(serial, refresh=True)   # la pantalla ha cambiado sin cambiar de ventana
+                node = tree.find(selector)
+                if node is None:
+                    break
+            if self._tap_if_focus(node, tree.focus, serial):
+                return node
+            tree = self.get(serial)   # otra ventana: su árbol cacheado o un volcado nuevo
+        raise UiError(f"No se encontró el elemento '{selector}' en {tree.focus or 'la pantalla'}")
+
+    def _tap_if_focus(self, node, focus, serial):
+        """Comprueba el foco y toca en una sola ida y vuelta; False si el foco ha cambiado."""
+        x, y = node.center
+        cmd = adb_input.input_command(serial, self.adb)
+        script = (f"f=$({_FOCUS_CMD}); echo \"$f\"; "
+                  f"case \"$f\" in *{shlex.quote(focus or '')}*) {cmd} tap {x} {y};; *) (exit 3);; esac")
+        rc, _, err = adb_session.run_shell(script, serial, self.adb, timeout=adb_session.DEFAULT_TIMEOUT)
+        if rc == 3:
+            return False
+        if rc != 0:
+            raise UiError(err.strip() or f"tap rc={rc}")
+        return True
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(adb="adb"):
+    with _caches_lock:
+        cache = _caches.get(adb)
+        if cache is None:
+            cache = _caches[adb] = UiCache(adb)
+        return cache
+
+
+def tap_element(selector, serial=None, adb="adb"):
+    return get_cache(adb).tap_element(selector, serial)